@@ -0,0 +1,263 @@
+# Нагрузочные замеры без экрана: прогоняет полные игры на синтетических пакетах разного размера
+# через GameController, HostWindow и PlayerWindow и сохраняет перцентили задержек в JSON.
+# Запуск: python benchmark.py --output bench.json [--compare old.json]
+# Память на параллельную игру: python benchmark.py --cases 10x10x20 --games 5
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # на Windows пик RSS не замеряется
+    resource = None
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+DEFAULT_CASES = ["5x5x10", "10x10x100", "20x10x300", "50x20x1000"]
+ROUNDS = 3
+
+
+def synthetic_pack(topics, values, rounds=ROUNDS, seed=0):
+    rng = random.Random(seed)
+    pack = {}
+    for r in range(rounds):
+        pack[f"Раунд {r + 1}"] = {
+            f"Тема {r + 1}.{t + 1}": [
+                {
+                    "question": f"Вопрос {t + 1}.{v + 1} раунда {r + 1}: " + " ".join(
+                        rng.choice(["кто", "что", "где", "когда", "почему", "сколько"]) for _ in range(8)
+                    ),
+                    "answer": f"Ответ {t + 1}.{v + 1}",
+                    "value": (v + 1) * 100 * (r + 1),
+                    "cat_in_bag": rng.random() < 0.05,
+                }
+                for v in range(values)
+            ]
+            for t in range(topics)
+        }
+    return pack
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    n = len(samples)
+
+    def pick(q):
+        return samples[min(n - 1, int(q * n))] * 1000
+
+    return {
+        "count": n,
+        "mean_ms": sum(samples) / n * 1000,
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p99_ms": pick(0.99),
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+# Один прогон: полная игра на пакете topics x values с players игроками
+def run_case(topics, values, players, seed=0, trace_memory=False):
+    from PyQt6.QtWidgets import QApplication
+
+    import si_game
+
+    if trace_memory:
+        tracemalloc.start()
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    timings = {}
+
+    def timed(name, func, *args):
+        start = time.perf_counter()
+        func(*args)
+        app.processEvents()  # раскладка и отрисовка входят в замер
+        timings.setdefault(name, []).append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    controller = si_game.GameController(synthetic_pack(topics, values, seed=seed))
+    player_window = si_game.PlayerWindow(controller)
+    host_window = si_game.HostWindow(controller, player_window)
+    host_window.show()
+    player_window.show()
+    app.processEvents()
+    startup = time.perf_counter() - start
+    widgets_start = len(app.allWidgets())
+
+    names = [f"Игрок {i + 1}" for i in range(players)]
+    for name in names:
+        timed("add_player", controller.add_player, name)
+
+    rng = random.Random(seed)
+    widgets_peak = widgets_start
+    for round_pos, round_name in enumerate(controller.round_names):
+        timed("show_board", player_window.set_board_page)
+        for topic, questions in controller.rounds[round_name].items():
+            for q_index in range(len(questions)):
+                timed("select_question", host_window.select_question, topic, q_index)
+                cat_in_bag = controller.state["record"].cat_in_bag
+                # До двух неверных ответов, затем верный; у "Кота в мешке" сразу верный,
+                # чтобы не ждать отложенного показа ответа
+                for _ in range(0 if cat_in_bag else rng.randint(0, 2)):
+                    timed("mark_answer", controller.mark_answer, rng.choice(names), False)
+                timed("mark_answer", controller.mark_answer, rng.choice(names), True)
+                timed("emit_state", controller.emit_state)
+                timed("finish_question", host_window.finish_question)
+                widgets_peak = max(widgets_peak, len(app.allWidgets()))
+        timed("show_results", player_window.set_results_page)
+        if round_pos + 1 < len(controller.round_names):
+            timed("advance_round", host_window.advance_round)
+
+    result = {
+        "topics": topics,
+        "values": values,
+        "players": players,
+        "startup_ms": startup * 1000,
+        "ops": {name: percentiles(samples) for name, samples in timings.items()},
+        "widgets": {"start": widgets_start, "peak": widgets_peak, "end": len(app.allWidgets())},
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+        "game_over": controller.is_game_over(),
+    }
+    if trace_memory:
+        result["tracemalloc_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    host_window.close()
+    player_window.close()
+    return result
+
+
+# Память на дополнительную игру: N игр одной сессии на общем пакете, прирост RSS
+# и памяти Python (tracemalloc) после каждой игры, включая её первый показ
+def run_sessions(topics, values, players, games, seed=0):
+    from PyQt6.QtWidgets import QApplication
+
+    import si_game
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    manager = si_game.SessionManager(synthetic_pack(topics, values, seed=seed))
+    window = si_game.SessionWindow(manager)
+    window.show()
+    names = [f"Игрок {i + 1}" for i in range(players)]
+    tracemalloc.start()
+    rss, python_kb = [], []
+    for _ in range(games):
+        rss_before = si_game.current_rss_kb()
+        traced_before = tracemalloc.get_traced_memory()[0]
+        game = manager.add_game(names)
+        game.player_window.set_board_page()
+        app.processEvents()
+        if rss_before is not None:
+            rss.append(si_game.current_rss_kb() - rss_before)
+        python_kb.append((tracemalloc.get_traced_memory()[0] - traced_before) // 1024)
+    tracemalloc.stop()
+    manager.close()
+    return {
+        "topics": topics,
+        "values": values,
+        "players": players,
+        "games": games,
+        # Первая игра включает разовую загрузку каталогов раундов, поэтому среднее – по остальным
+        "rss_kb_per_game": rss,
+        "python_kb_per_game": python_kb,
+        "extra_game_rss_kb": sum(rss[1:]) // (len(rss) - 1) if len(rss) > 1 else None,
+        "extra_game_python_kb": sum(python_kb[1:]) // (len(python_kb) - 1) if len(python_kb) > 1 else None,
+    }
+
+
+def parse_case(case):
+    topics, values, players = (int(x) for x in case.lower().split("x"))
+    return topics, values, players
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_case(result):
+    print(f"\n{result['topics']}x{result['values']} доска, {result['players']} игроков: "
+          f"старт {result['startup_ms']:.0f} мс, виджетов {result['widgets']['start']}"
+          f" -> пик {result['widgets']['peak']}, RSS {(result['peak_rss_kb'] or 0) // 1024} МБ")
+    for name, stats in result["ops"].items():
+        print(f"  {name:16} n={stats['count']:6}  p50 {stats['p50_ms']:7.3f}  p90 {stats['p90_ms']:7.3f}  "
+              f"p99 {stats['p99_ms']:7.3f}  max {stats['max_ms']:7.3f} мс")
+
+
+def print_sessions(result):
+    print(f"\n{result['games']} игр на доске {result['topics']}x{result['values']}, {result['players']} игроков: "
+          f"на каждую игру после первой RSS +{result['extra_game_rss_kb']} КБ, "
+          f"Python +{result['extra_game_python_kb']} КБ")
+    print(f"  по играм, RSS КБ: {result['rss_kb_per_game']}")
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    old_cases = {(c["topics"], c["values"], c["players"]): c for c in baseline["cases"] if "ops" in c}
+    print(f"\nСравнение с {baseline_path} (коммит {baseline.get('commit')}), p90 новое/старое:")
+    for case in results["cases"]:
+        if "ops" not in case:
+            continue
+        old = old_cases.get((case["topics"], case["values"], case["players"]))
+        if old is None:
+            continue
+        for name, stats in case["ops"].items():
+            if name in old["ops"] and old["ops"][name]["p90_ms"] > 0:
+                ratio = stats["p90_ms"] / old["ops"][name]["p90_ms"]
+                mark = "  <-- медленнее" if ratio > 1.2 else ""
+                print(f"  {case['topics']}x{case['values']}x{case['players']} {name:16} {ratio:5.2f}{mark}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Замеры производительности Своей игры")
+    parser.add_argument("--cases", default=",".join(DEFAULT_CASES),
+                        help="размеры через запятую: темы x вопросы x игроки, например 10x10x100")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="пик памяти Python через tracemalloc (медленнее)")
+    parser.add_argument("--games", type=int, help="вместо игры замерить память на N параллельных игр сессии")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="JSON с прошлого прогона для сравнения")
+    parser.add_argument("--single", help=argparse.SUPPRESS)  # один случай в дочернем процессе
+    args = parser.parse_args()
+
+    if args.single:
+        if args.games:
+            result = run_sessions(*parse_case(args.single), args.games, seed=args.seed)
+        else:
+            result = run_case(*parse_case(args.single), seed=args.seed, trace_memory=args.trace_memory)
+        json.dump(result, sys.stdout)
+        sys.exit(0)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cases": [],
+    }
+    # Каждый размер – в отдельном процессе, чтобы пик памяти и число виджетов не смешивались
+    for case in args.cases.split(","):
+        command = [sys.executable, os.path.abspath(__file__), "--single", case, "--seed", str(args.seed)]
+        if args.trace_memory:
+            command.append("--trace-memory")
+        if args.games:
+            command += ["--games", str(args.games)]
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output)
+        results["cases"].append(result)
+        (print_sessions if args.games else print_case)(result)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nРезультаты сохранены в {args.output}")
+    if args.compare:
+        compare(results, args.compare)
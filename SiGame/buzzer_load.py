@@ -0,0 +1,90 @@
+# Нагрузочный тест сервера пультов: поднимает много WebSocket-клиентов, которые
+# подключаются, представляются и жмут кнопку, как только ведущий открывает вопрос.
+# Запуск: python buzzer_load.py --clients 300 --port 8765
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import time
+
+from buzzer_server import OP_CLOSE, OP_PING, OP_PONG, OP_TEXT, encode_frame, read_frame
+
+
+async def run_client(host, port, name, stats, stop):
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(
+        f"GET /ws HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+    )
+    await reader.readuntil(b"\r\n\r\n")
+    stats["connected"] += 1
+
+    def send(message):
+        writer.write(encode_frame(json.dumps(message, ensure_ascii=False).encode(), mask=True))
+
+    send({"type": "join", "name": name})
+    pressed_at = None
+    try:
+        while not stop.is_set():
+            opcode, payload = await read_frame(reader, from_client=False)
+            if opcode == OP_CLOSE:
+                break
+            if opcode == OP_PING:
+                writer.write(encode_frame(payload, OP_PONG, mask=True))
+                continue
+            if opcode != OP_TEXT:
+                continue
+            message = json.loads(payload)
+            stats["messages"] += 1
+            if message["type"] == "ping":
+                send({"type": "pong", "t": message["t"]})
+            elif message["type"] == "state" and message.get("question") and not message.get("answer"):
+                pressed_at = time.perf_counter()
+                send({"type": "buzz"})
+            elif message["type"] == "winner" and pressed_at is not None:
+                stats["latency"].append(time.perf_counter() - pressed_at)
+                if message["name"] == name:
+                    stats["wins"] += 1
+                pressed_at = None
+    except (asyncio.IncompleteReadError, ConnectionError):
+        stats["dropped"] += 1
+    finally:
+        writer.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервера пультов")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=30.0, help="сколько секунд держать подключения")
+    args = parser.parse_args()
+
+    stats = {"connected": 0, "messages": 0, "wins": 0, "dropped": 0, "latency": []}
+    stop = asyncio.Event()
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(run_client(args.host, args.port, f"Игрок {i + 1}", stats, stop))
+        for i in range(args.clients)
+    ]
+    await asyncio.sleep(args.duration)
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    print(f"Подключено: {stats['connected']} из {args.clients} за {time.perf_counter() - started:.1f} с")
+    print(f"Сообщений получено: {stats['messages']}, обрывов: {stats['dropped']}, побед: {stats['wins']}")
+    if stats["latency"]:
+        latency = sorted(stats["latency"])
+        print(
+            f"Нажатие -> объявление победителя: медиана {statistics.median(latency) * 1000:.1f} мс, "
+            f"p95 {latency[int(len(latency) * 0.95) - 1] * 1000:.1f} мс"
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,375 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+# Нажатия, пришедшие в пределах этого окна после первого, считаются одновременными
+# и сравниваются по времени с поправкой на задержку сети игрока
+ARBITRATION_WINDOW_NS = 8_000_000
+PING_INTERVAL = 2.0
+PINGS_KEPT = 4  # на сколько последних пингов принимается ответ
+# Больше половины окна арбитража поправка не даёт: иначе задержанными ответами на пинг
+# игрок мог бы отодвинуть своё нажатие в прошлое и обойти нажавших раньше
+MAX_CORRECTION_NS = ARBITRATION_WINDOW_NS // 2
+# Клиент, у которого в буфере отправки скопилось больше, считается зависшим и отключается
+MAX_CLIENT_BUFFER = 256 * 1024
+# Сообщения пультов – короткий JSON; кадр длиннее не читается, а клиент отключается
+MAX_PAYLOAD = 4096
+
+OP_TEXT, OP_CLOSE, OP_PING, OP_PONG = 0x1, 0x8, 0x9, 0xA
+CLOSE_PROTOCOL_ERROR, CLOSE_TOO_BIG = 1002, 1009
+
+
+# Кадр клиента не по протоколу; code – код закрытия, с которым сервер отключает клиента
+class FrameError(ValueError):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+def encode_frame(payload, opcode=OP_TEXT, mask=False):
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack(">H", length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack(">Q", length)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return bytes(header) + payload
+
+
+async def read_frame(reader, from_client=True):
+    # Кадры клиента по RFC 6455 обязаны быть замаскированы; длина проверяется до чтения данных.
+    # Клиент нагрузочного теста читает кадры сервера с from_client=False
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack(">H", await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack(">Q", await reader.readexactly(8))
+    if from_client:
+        if not second & 0x80:
+            raise FrameError(CLOSE_PROTOCOL_ERROR, "незамаскированный кадр клиента")
+        if length > MAX_PAYLOAD:
+            raise FrameError(CLOSE_TOO_BIG, f"кадр клиента длиной {length} байт")
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if key:
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+
+# Подключённый экран или пульт игрока
+class Client:
+    __slots__ = ("writer", "name", "rtt_ns", "pings")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.name = None
+        self.rtt_ns = 0  # сглаженная задержка туда-обратно
+        self.pings = deque(maxlen=PINGS_KEPT)  # метки отправленных клиенту пингов, ещё без ответа
+
+    def send(self, frame):
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+            transport.abort()
+            return
+        self.writer.write(frame)
+
+
+# Сервер пультов: asyncio-цикл в отдельном потоке раздаёт состояние игры по WebSocket
+# и принимает нажатия кнопки. Со стороны Qt общение идёт только через сигналы
+class BuzzerServer(QObject):
+    player_joined = pyqtSignal(str)
+    buzzed = pyqtSignal(str)  # имя игрока, выигравшего право ответа
+
+    def __init__(self, controller, host="0.0.0.0", port=8765):
+        super().__init__()
+        self.controller = controller
+        self.host = host
+        self.port = port
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.error = None
+        self.clients = set()
+        # Состояние арбитража живёт только в потоке сервера
+        self.is_open = False
+        self.locked = set()    # игроки, уже отвечавшие на текущий вопрос
+        self.presses = []      # (скорректированное время, время прихода, имя)
+        self.window_handle = None
+        self.last_state = encode_frame(b'{"type": "state"}')
+        controller.update_player_state.connect(self.on_state)
+        controller.question_selected.connect(self.on_question_selected)
+        controller.answer_marked.connect(self.on_answer_marked)
+        controller.score_changed.connect(self.on_score_changed)
+        controller.roster_changed.connect(self.on_roster_changed)
+
+    def start(self):
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(ready,), name="buzzer-server", daemon=True)
+        self.thread.start()
+        ready.wait()
+        if self.error is not None:
+            raise self.error
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop = None
+
+    def run(self, ready):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self.handle_connection, self.host, self.port, backlog=1024)
+            )
+        except OSError as e:
+            self.error = e
+            self.loop.close()
+            self.loop = None
+            ready.set()
+            return
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.loop.create_task(self.ping_clients())
+        ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            for client in self.clients:
+                client.writer.transport.abort()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.run_until_complete(self.server.wait_closed())
+            self.loop.close()
+
+    # --- Вызовы из Qt-потока: только планируют работу в цикле сервера ---
+
+    def broadcast(self, message):
+        if self.loop is not None:
+            frame = encode_frame(json.dumps(message, ensure_ascii=False).encode())
+            self.loop.call_soon_threadsafe(self.send_all, frame)
+
+    def on_state(self, data):
+        st = data["state"]
+        record = st["record"]
+        message = {
+            "type": "state",
+            "round": data["current_round"],
+            "topic": record.topic if record else None,
+            "value": record.value if record else None,
+            "question": record.question if record else None,
+            "answer": record.answer if record and st["show_answer"] else None,
+            "incorrect": st["incorrect"],
+            "game_over": data["game_over"],
+        }
+        is_open = bool(record) and not st["show_answer"]
+        if self.loop is not None:
+            frame = encode_frame(json.dumps(message, ensure_ascii=False).encode())
+            self.loop.call_soon_threadsafe(self.apply_state, frame, is_open)
+
+    def on_question_selected(self, topic, q_index):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.locked.clear)
+
+    def on_answer_marked(self, player, correct):
+        if self.loop is not None and not correct:
+            self.loop.call_soon_threadsafe(self.locked.add, player)
+
+    def on_score_changed(self, player, score):
+        self.broadcast({"type": "score", "player": player, "score": score})
+
+    def on_roster_changed(self, changes):
+        # Одно сообщение на весь пакет; выбывшие игроки приходят со счётом null
+        self.broadcast({"type": "scores", "scores": {player: new for player, (_, new) in changes.items()}})
+
+    # --- Поток сервера ---
+
+    def apply_state(self, frame, is_open):
+        self.last_state = frame
+        if is_open != self.is_open:
+            self.is_open = is_open
+            self.presses.clear()
+        self.send_all(frame)
+
+    def send_all(self, frame):
+        for client in list(self.clients):
+            client.send(frame)
+
+    async def ping_clients(self):
+        while True:
+            await asyncio.sleep(PING_INTERVAL)
+            t = time.monotonic_ns()
+            frame = encode_frame(json.dumps({"type": "ping", "t": t}).encode())
+            for client in list(self.clients):
+                client.pings.append(t)
+                client.send(frame)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        lines = request.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        if headers.get("upgrade", "").lower() != "websocket":
+            body = CLIENT_PAGE.encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body
+            )
+            await writer.drain()
+            writer.close()
+            return
+        key = headers.get("sec-websocket-key")
+        if not key:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            writer.close()
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest())
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+        client = Client(writer)
+        self.clients.add(client)
+        client.send(self.last_state)
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                arrived = time.monotonic_ns()
+                if opcode == OP_CLOSE:
+                    break
+                if opcode == OP_PING:
+                    client.send(encode_frame(payload, OP_PONG))
+                elif opcode == OP_TEXT:
+                    self.handle_message(client, json.loads(payload), arrived)
+        except FrameError as e:
+            # Закрывающий кадр с кодом уходит клиенту до закрытия соединения
+            client.send(encode_frame(struct.pack(">H", e.code), OP_CLOSE))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.clients.discard(client)
+            writer.close()
+
+    def handle_message(self, client, message, arrived):
+        # Сообщения приходят с телефонов игроков – всё, что не по протоколу, молча отбрасывается
+        if not isinstance(message, dict):
+            return
+        kind = message.get("type")
+        if kind == "pong":
+            # Принимается только ответ на пинг, который сервер отправил этому клиенту и ещё ждёт
+            t = message.get("t")
+            if type(t) is not int or t not in client.pings:
+                return
+            while client.pings.popleft() != t:
+                pass  # более старые пинги остались без ответа
+            rtt = arrived - t
+            client.rtt_ns = rtt if not client.rtt_ns else (client.rtt_ns * 7 + rtt) // 8
+        elif kind == "join":
+            client.name = str(message.get("name", "")).strip()[:64]
+            if client.name:
+                self.player_joined.emit(client.name)
+        elif kind == "buzz":
+            self.register_press(client, arrived)
+
+    def register_press(self, client, arrived):
+        if not self.is_open or not client.name or client.name in self.locked:
+            return
+        if any(name == client.name for _, _, name in self.presses):
+            return
+        # Поправка на половину задержки сети: игрок с медленным каналом нажал раньше, чем пришёл пакет
+        correction = min(max(client.rtt_ns // 2, 0), MAX_CORRECTION_NS)
+        self.presses.append((arrived - correction, arrived, client.name))
+        if self.window_handle is None:
+            self.window_handle = self.loop.call_later(ARBITRATION_WINDOW_NS / 1e9, self.resolve_presses)
+
+    def resolve_presses(self):
+        self.window_handle = None
+        if not self.is_open or not self.presses:
+            return
+        _, _, winner = min(self.presses)
+        self.is_open = False
+        self.presses.clear()
+        self.send_all(encode_frame(json.dumps({"type": "winner", "name": winner}, ensure_ascii=False).encode()))
+        self.buzzed.emit(winner)
+
+
+CLIENT_PAGE = """<!DOCTYPE html>
+<html lang="ru"><head><meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Своя игра</title>
+<style>
+body { font-family: sans-serif; background: #232629; color: #fff; text-align: center; margin: 0; padding: 16px; }
+input, button { font-size: 24px; padding: 12px; margin: 8px; }
+#buzz { width: 80vw; height: 40vh; border-radius: 24px; background: #448aff; color: #fff; border: none; font-size: 48px; }
+#buzz:disabled { background: #4f5b62; }
+</style></head>
+<body>
+<div id="join"><input id="name" placeholder="Имя игрока"><button onclick="join()">Войти</button></div>
+<h2 id="round"></h2><h3 id="topic"></h3><p id="question"></p><p id="answer"></p>
+<button id="buzz" disabled onclick="buzz()">Ответить!</button>
+<p id="status"></p>
+<script>
+let ws, me = null;
+function connect() {
+  ws = new WebSocket("ws://" + location.host + "/ws");
+  ws.onmessage = (e) => {
+    const m = JSON.parse(e.data);
+    if (m.type === "ping") { ws.send(JSON.stringify({type: "pong", t: m.t})); }
+    else if (m.type === "state") {
+      document.getElementById("round").textContent = m.round || "";
+      document.getElementById("topic").textContent = m.topic ? m.topic + " – " + m.value : "";
+      document.getElementById("question").textContent = m.question || "";
+      document.getElementById("answer").textContent = m.answer || (m.incorrect ? "Неправильный ответ!" : "");
+      document.getElementById("buzz").disabled = !me || !m.question || !!m.answer;
+      document.getElementById("status").textContent = "";
+    } else if (m.type === "winner") {
+      document.getElementById("buzz").disabled = true;
+      document.getElementById("status").textContent = "Отвечает: " + m.name;
+    }
+  };
+  ws.onclose = () => setTimeout(connect, 1000);
+  ws.onopen = () => { if (me) ws.send(JSON.stringify({type: "join", name: me})); };
+}
+function join() {
+  me = document.getElementById("name").value.trim();
+  if (!me) return;
+  ws.send(JSON.stringify({type: "join", name: me}));
+  document.getElementById("join").style.display = "none";
+}
+function buzz() { ws.send(JSON.stringify({type: "buzz"})); }
+connect();
+</script></body></html>
+"""
@@ -0,0 +1,203 @@
+import functools
+import json
+import os
+import time
+from collections import deque
+
+from PyQt6 import sip
+from PyQt6.QtCore import QObject, Qt, QTimer
+from PyQt6.QtGui import QKeySequence, QShortcut
+from PyQt6.QtWidgets import QApplication, QLabel
+
+from replay import positional_limit
+
+HEARTBEAT_MS = 50         # период контрольного таймера для замера задержки цикла событий
+OVERLAY_REFRESH_MS = 500
+SAMPLES = 500             # сколько последних замеров на операцию держать для перцентилей
+MAX_FILE_BYTES = 10 * 1024 * 1024  # после этого размера файл уходит в .1 и начинается заново
+CSV_HEADER = "time_s,name,duration_ms,widgets_created,widgets_destroyed\n"
+
+
+def widget_ids():
+    return {sip.unwrapinstance(w) for w in QApplication.allWidgets()}
+
+
+# Файл, который при превышении размера переименовывается в .1 и пишется с начала
+class RollingFile:
+    def __init__(self, path, header=""):
+        self.path = path
+        self.header = header
+        self.file = None
+        self.open()
+
+    def open(self):
+        self.file = open(self.path, "w", encoding="utf-8")
+        self.file.write(self.header)
+
+    def write(self, text):
+        self.file.write(text)
+        if self.file.tell() > MAX_FILE_BYTES:
+            self.file.close()
+            os.replace(self.path, self.path + ".1")
+            self.open()
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+# Замеры горячих мест по запросу: длительность вызовов контроллера и обновлений окон,
+# число созданных и удалённых виджетов за вызов, задержка цикла событий по контрольному таймеру.
+# Результаты видны в накладке поверх окна ведущего (F12) и пишутся в CSV и в trace-файл
+# формата Chrome (открывается в chrome://tracing или Perfetto)
+class Instrumentation(QObject):
+    def __init__(self, directory=None):
+        super().__init__()
+        self.samples = {}  # имя -> последние длительности, с
+        self.counts = {}   # имя -> [вызовов, создано виджетов, удалено виджетов]
+        self.lag = deque(maxlen=SAMPLES)
+        self.patched = []
+        self.overhead = 0.0  # суммарное время самих замеров
+        self.origin = time.perf_counter()
+        self.csv = self.trace = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.csv = RollingFile(os.path.join(directory, "timings.csv"), CSV_HEADER)
+            # Формат массива событий допускает файл без закрывающей скобки – его можно открыть в любой момент
+            self.trace = RollingFile(os.path.join(directory, "trace.json"), "[\n")
+            self.flush_timer = QTimer(self)
+            self.flush_timer.timeout.connect(self.flush)
+            self.flush_timer.start(1000)
+        self.last_beat = time.perf_counter()
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setTimerType(Qt.TimerType.PreciseTimer)
+        self.heartbeat.timeout.connect(self.on_heartbeat)
+        self.heartbeat.start(HEARTBEAT_MS)
+        self.overlay = None
+
+    # --- Замеры ---
+
+    def install(self, targets):
+        # targets: класс -> имена методов. Методы подменяются на уровне класса до создания окон,
+        # чтобы замеры попали и в слоты, подключённые к сигналам в конструкторах
+        for cls, names in targets.items():
+            for name in names:
+                original = cls.__dict__[name]
+                setattr(cls, name, self.timed(f"{cls.__name__}.{name}", original))
+                self.patched.append((cls, name, original))
+
+    def uninstall(self):
+        for cls, name, original in reversed(self.patched):
+            setattr(cls, name, original)
+        self.patched.clear()
+
+    def timed(self, name, func):
+        # Лишние аргументы сигнала (checked у clicked) отрезаются, как это делает PyQt для самих методов
+        limit = positional_limit(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if limit is not None:
+                args = args[:limit]
+            entered = time.perf_counter()
+            before = widget_ids()
+            start = time.perf_counter()
+            self.overhead += start - entered
+            overhead = self.overhead
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                # Время на подсчёт виджетов во вложенных замерах не относится к самой операции
+                elapsed = end - start - (self.overhead - overhead)
+                after = widget_ids()
+                self.add(name, start, elapsed, len(after - before), len(before - after))
+                self.overhead += time.perf_counter() - end
+        return wrapper
+
+    def add(self, name, start, elapsed, created, destroyed):
+        self.samples.setdefault(name, deque(maxlen=SAMPLES)).append(elapsed)
+        counts = self.counts.setdefault(name, [0, 0, 0])
+        counts[0] += 1
+        counts[1] += created
+        counts[2] += destroyed
+        ts = start - self.origin
+        if self.csv is not None:
+            self.csv.write(f"{ts:.6f},{name},{elapsed * 1000:.3f},{created},{destroyed}\n")
+        if self.trace is not None:
+            self.trace.write(json.dumps({
+                "name": name, "ph": "X", "pid": os.getpid(), "tid": 0,
+                "ts": round(ts * 1e6), "dur": round(elapsed * 1e6),
+                "args": {"created": created, "destroyed": destroyed},
+            }, ensure_ascii=False) + ",\n")
+
+    def on_heartbeat(self):
+        # Насколько позже положенного сработал таймер – столько цикл событий был занят
+        now = time.perf_counter()
+        lag = max(0.0, now - self.last_beat - HEARTBEAT_MS / 1000)
+        self.last_beat = now
+        self.lag.append(lag)
+        if self.trace is not None and lag > HEARTBEAT_MS / 1000:
+            self.trace.write(json.dumps({
+                "name": "event loop lag", "ph": "C", "pid": os.getpid(),
+                "ts": round((now - self.origin) * 1e6), "args": {"lag_ms": round(lag * 1000, 3)},
+            }) + ",\n")
+
+    # --- Накладка ---
+
+    def attach_overlay(self, window, shortcut="F12"):
+        self.overlay = QLabel(window)
+        self.overlay.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.overlay.setStyleSheet(
+            "background: rgba(0, 0, 0, 180); color: #9f9; font-family: monospace; font-size: 11px; padding: 6px;"
+        )
+        self.overlay.hide()
+        QShortcut(QKeySequence(shortcut), window, self.toggle_overlay)
+        self.overlay_timer = QTimer(self)
+        self.overlay_timer.timeout.connect(self.refresh_overlay)
+        self.overlay_timer.start(OVERLAY_REFRESH_MS)
+
+    def toggle_overlay(self):
+        self.overlay.setVisible(not self.overlay.isVisible())
+        self.refresh_overlay()
+
+    def refresh_overlay(self):
+        if self.overlay is None or not self.overlay.isVisible():
+            return
+        self.overlay.setText(self.report())
+        self.overlay.adjustSize()
+        window = self.overlay.parentWidget()
+        self.overlay.move(window.width() - self.overlay.width() - 8, 8)
+        self.overlay.raise_()
+
+    def report(self):
+        lines = [f"{'операция':34} {'n':>6} {'p50':>7} {'p90':>7} {'max':>7} {'+w':>5} {'-w':>5}"]
+        for name in sorted(self.samples):
+            samples = sorted(self.samples[name])
+            n = len(samples)
+            calls, created, destroyed = self.counts[name]
+            lines.append(
+                f"{name:34} {calls:6} {samples[n // 2] * 1000:7.2f} {samples[min(n - 1, n * 9 // 10)] * 1000:7.2f} "
+                f"{samples[-1] * 1000:7.2f} {created:5} {destroyed:5}"
+            )
+        if self.lag:
+            lag = sorted(self.lag)
+            lines.append(
+                f"задержка цикла событий: p50 {lag[len(lag) // 2] * 1000:.1f} мс, "
+                f"max {lag[-1] * 1000:.1f} мс за последние {len(lag) * HEARTBEAT_MS / 1000:.0f} с"
+            )
+        return "\n".join(lines)
+
+    def flush(self):
+        for f in (self.csv, self.trace):
+            if f is not None:
+                f.flush()
+
+    def close(self):
+        self.heartbeat.stop()
+        for f in (self.csv, self.trace):
+            if f is not None:
+                f.close()
+        self.csv = self.trace = None
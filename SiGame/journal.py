@@ -0,0 +1,393 @@
+import json
+import os
+
+from PyQt6.QtCore import QObject, QTimer
+
+# Записи журнала – короткие списки, первый элемент задаёт тип:
+#   ["q", раунд, тема, индекс]        выбран вопрос
+#   ["m", игрок, правильно]           ведущий отметил ответ
+#   ["u", раунд, тема, индекс, флаг]  вопрос отмечен (или снова не отмечен) использованным
+#   ["s", игрок, было, стало]         изменился счёт
+#   ["a", игрок]                      игрок добавлен
+#   ["r", игрок, счёт]                игрок удалён
+#   ["R", было, стало]                сменился раунд
+#   ["P", {игрок: [было, стало]}]     состав изменён пакетом; null – игрока нет
+#   ["undo"], ["redo"]                отмена и повтор последнего действия
+# "q", "m", "a", "r", "R" и "P" начинают новое действие ведущего; "u" и "s" относятся к текущему
+MARKERS = {"q", "m", "a", "r", "R", "P"}
+EFFECTS = {"u", "s", "a", "r", "R", "P"}
+
+SNAPSHOT_NAME = "snapshot.json"
+SNAPSHOT_VERSION = 2  # маски использованных вопросов – шестнадцатеричные числа
+SEGMENT_PREFIX = "events-"
+
+
+def segment_name(first_seq):
+    return f"{SEGMENT_PREFIX}{first_seq:012d}.log"
+
+
+def cut_torn_tail(path):
+    # Обрезает последнюю строку, если запись оборвалась на ней при падении: новые записи
+    # не должны начинаться посреди неё
+    with open(path, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            f.truncate(end)
+
+
+# Журнал игры: все изменения состояния контроллера дописываются в конец файла,
+# fsync выполняется пачками, периодически пишется компактный снимок.
+# При запуске состояние восстанавливается из снимка и короткого хвоста журнала
+class GameJournal(QObject):
+    def __init__(self, controller, directory, batch_size=32, flush_interval=200,
+                 snapshot_every=1000, history=100):
+        super().__init__()
+        self.controller = controller
+        self.directory = directory
+        self.batch_size = batch_size
+        self.snapshot_every = snapshot_every
+        self.history = history  # сколько действий хранить для отмены
+        self.seq = 0
+        self.snapshot_seq = 0
+        self.unsynced = 0
+        self.file = None
+        self.applying = False
+        self.undo_stack = []
+        self.redo_stack = []
+        self.action = []
+        self.scores = dict(controller.players)
+        self.round = controller.current_round
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(flush_interval)
+        controller.question_selected.connect(
+            lambda topic, q_index: self.record(["q", self.controller.current_round, topic, q_index])
+        )
+        controller.answer_marked.connect(lambda player, correct: self.record(["m", player, correct]))
+        controller.question_used.connect(
+            lambda round_name, topic, q_index, used: self.record(["u", round_name, topic, q_index, used])
+        )
+        controller.score_changed.connect(self.on_score_changed)
+        controller.player_added.connect(self.on_player_added)
+        controller.player_removed.connect(self.on_player_removed)
+        controller.roster_changed.connect(self.on_roster_changed)
+        controller.round_changed.connect(self.on_round_changed)
+
+    # --- Запись ---
+
+    def on_score_changed(self, player, score):
+        old = self.scores.get(player, 0)
+        self.scores[player] = score
+        self.record(["s", player, old, score])
+
+    def on_player_added(self, name):
+        self.scores[name] = self.controller.players[name]
+        self.record(["a", name])
+
+    def on_player_removed(self, name):
+        self.record(["r", name, self.scores.pop(name, 0)])
+
+    def on_roster_changed(self, changes):
+        self.update_scores(changes)
+        self.record(["P", {player: [old, new] for player, (old, new) in changes.items()}])
+
+    def update_scores(self, changes):
+        for player, (_, new) in changes.items():
+            if new is None:
+                self.scores.pop(player, None)
+            else:
+                self.scores[player] = new
+
+    def on_round_changed(self, round_name):
+        old, self.round = self.round, round_name
+        self.record(["R", old, round_name])
+
+    def record(self, event):
+        if self.applying:
+            return
+        self.track(event)
+        self.write(event)
+
+    def write(self, event):
+        if self.file is None:
+            return
+        self.seq += 1
+        self.file.write(json.dumps([self.seq] + event, ensure_ascii=False) + "\n")
+        self.unsynced += 1
+        if self.unsynced >= self.batch_size:
+            self.flush()
+        if self.seq - self.snapshot_seq >= self.snapshot_every:
+            self.snapshot()
+
+    def flush(self):
+        if self.file is not None and self.unsynced:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.unsynced = 0
+
+    # --- Группировка действий для отмены ---
+
+    def track(self, event):
+        kind = event[0]
+        if kind in MARKERS:
+            self.close_action()
+        self.action.append(event)
+        if kind in EFFECTS:
+            self.redo_stack.clear()
+
+    def close_action(self):
+        if any(e[0] in EFFECTS for e in self.action):
+            self.undo_stack.append(self.action)
+            del self.undo_stack[:-self.history]
+        self.action = []
+
+    def can_undo(self):
+        return bool(self.undo_stack) or any(e[0] in EFFECTS for e in self.action)
+
+    def undo(self):
+        self.close_action()
+        if not self.undo_stack:
+            return
+        action = self.undo_stack.pop()
+        self.apply_effects(action, reverse=True)
+        self.redo_stack.append(action)
+        self.write(["undo"])
+
+    def redo(self):
+        self.close_action()
+        if not self.redo_stack:
+            return
+        action = self.redo_stack.pop()
+        self.apply_effects(action, reverse=False)
+        self.undo_stack.append(action)
+        self.write(["redo"])
+
+    def apply_effects(self, action, reverse):
+        self.applying = True
+        try:
+            for event in (reversed(action) if reverse else action):
+                self.apply(event, reverse)
+        finally:
+            self.applying = False
+
+    def apply(self, event, reverse=False):
+        c = self.controller
+        kind = event[0]
+        if kind == "u":
+            _, round_name, topic, q_index, used = event
+            c.set_question_used(round_name, topic, q_index, used != reverse)
+        elif kind == "s":
+            _, player, old, new = event
+            score = old if reverse else new
+            c.set_score(player, score)
+            self.scores[player] = score
+        elif kind in ("a", "r") and (kind == "a") != reverse:
+            # Добавление игрока или отмена его удаления
+            score = event[2] if kind == "r" else 0
+            c.add_player(event[1])
+            c.set_score(event[1], score)
+            self.scores[event[1]] = score
+        elif kind in ("a", "r"):
+            c.remove_player(event[1])
+            self.scores.pop(event[1], None)
+        elif kind == "R":
+            self.round = event[1] if reverse else event[2]
+            c.set_round(self.round)
+        elif kind == "P":
+            changes = {player: ((new, old) if reverse else (old, new)) for player, (old, new) in event[1].items()}
+            c.update_players(changes)
+            self.update_scores(changes)
+
+    # --- Снимки и восстановление ---
+
+    def snapshot(self):
+        c = self.controller
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "seq": self.seq,
+            "round": c.current_round,
+            "players": dict(c.players),
+            "used": {round_name: format(index.used, "x") for round_name, index in c.index.items()},
+            "undo": self.undo_stack,
+            "redo": self.redo_stack,
+            "action": self.action,
+        }
+        path = os.path.join(self.directory, SNAPSHOT_NAME)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        self.snapshot_seq = self.seq
+        # Новый сегмент журнала; старые больше не нужны для восстановления
+        self.open_segment()
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name != os.path.basename(self.file.name):
+                os.remove(os.path.join(self.directory, name))
+
+    def open_segment(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+        self.file = open(os.path.join(self.directory, segment_name(self.seq + 1)), "a", encoding="utf-8")
+
+    def open(self):
+        # Восстанавливает состояние из каталога журнала (если он не пуст) и продолжает запись.
+        # Возвращает True, если игра продолжена из журнала
+        os.makedirs(self.directory, exist_ok=True)
+        self.applying = True
+        try:
+            restored = self.load_snapshot()
+            self.replay_tail()
+        finally:
+            self.applying = False
+        segments = sorted(name for name in os.listdir(self.directory) if name.startswith(SEGMENT_PREFIX))
+        if segments:
+            path = os.path.join(self.directory, segments[-1])
+            cut_torn_tail(path)
+            self.file = open(path, "a", encoding="utf-8")
+        else:
+            self.open_segment()
+        return restored or self.seq > 0
+
+    def seed(self, players):
+        # Начальный состав новой игры – не действие ведущего: он не попадает в отмену,
+        # а записывается базовым снимком, от которого идёт журнал
+        self.applying = True
+        try:
+            self.controller.apply_roster(players)
+        finally:
+            self.applying = False
+        self.snapshot()
+
+    def load_snapshot(self):
+        path = os.path.join(self.directory, SNAPSHOT_NAME)
+        if not os.path.exists(path):
+            return False
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        c = self.controller
+        c.apply_roster(snapshot["players"].items())
+        for round_name, used in snapshot["used"].items():
+            if snapshot.get("version", 1) == 1:
+                # Первая версия хранила по байту на вопрос
+                used = sum(1 << pos for pos, flag in enumerate(bytes.fromhex(used)) if flag)
+            else:
+                used = int(used, 16)
+            c.index[round_name].load_used(used)
+        if snapshot["round"] != c.current_round:
+            c.set_round(snapshot["round"])
+        self.scores = dict(c.players)
+        self.round = c.current_round
+        self.undo_stack = snapshot["undo"]
+        self.redo_stack = snapshot["redo"]
+        self.action = snapshot["action"]
+        self.seq = self.snapshot_seq = snapshot["seq"]
+        return True
+
+    def replay_tail(self):
+        segments = sorted(name for name in os.listdir(self.directory) if name.startswith(SEGMENT_PREFIX))
+        for name in segments:
+            with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        seq, *event = json.loads(line)
+                    except ValueError:
+                        # Оборванная при падении строка. Журналы прежних версий дописывали
+                        # после неё, поэтому следующие строки читаются дальше
+                        continue
+                    if seq <= self.seq:
+                        continue
+                    self.seq = seq
+                    self.replay(event)
+
+    def replay(self, event):
+        kind = event[0]
+        if kind == "undo":
+            self.close_action()
+            if self.undo_stack:
+                action = self.undo_stack.pop()
+                for e in reversed(action):
+                    self.apply(e, reverse=True)
+                self.redo_stack.append(action)
+        elif kind == "redo":
+            self.close_action()
+            if self.redo_stack:
+                action = self.redo_stack.pop()
+                for e in action:
+                    self.apply(e)
+                self.undo_stack.append(action)
+        else:
+            if kind in EFFECTS:
+                self.apply(event)
+            self.track(event)
+
+    def close(self):
+        self.timer.stop()
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+
+# Проверка восстановления после падения: падение посреди записи, продолжение игры, ещё один перезапуск.
+# Запуск: python journal.py
+def check_recovery(directory):
+    from PyQt6.QtCore import QCoreApplication
+
+    from si_game import GameController
+
+    app = QCoreApplication.instance() or QCoreApplication([])
+
+    def restart():
+        controller = GameController()
+        journal = GameJournal(controller, directory)
+        if not journal.open():
+            journal.seed(["A", "B"])
+        return controller, journal
+
+    controller, journal = restart()
+    controller.set_score("A", 100)
+    journal.flush()
+    # Падение: последняя запись оборвалась на середине, файл не закрыт штатно
+    journal.file.write('[999, "s", "A", 100')
+    journal.file.flush()
+    journal.timer.stop()
+    journal.file = None
+    controller, journal = restart()
+    problems = []
+    if dict(controller.players) != {"A": 100, "B": 0}:
+        problems.append(f"после падения: {dict(controller.players)}")
+    controller.set_score("B", 200)
+    journal.close()
+    controller, journal = restart()
+    if dict(controller.players) != {"A": 100, "B": 200}:
+        problems.append(f"после второго перезапуска: {dict(controller.players)}")
+    controller.remove_player("B")
+    journal.close()
+    # Стартовый состав не возвращается при продолжении и не отменяется
+    controller, journal = restart()
+    if dict(controller.players) != {"A": 100}:
+        problems.append(f"после удаления игрока: {dict(controller.players)}")
+    for _ in range(5):
+        journal.undo()
+    if dict(controller.players) != {"A": 0, "B": 0}:
+        problems.append(f"после отмены всех действий: {dict(controller.players)}")
+    journal.close()
+    app.processEvents()
+    return problems
+
+
+if __name__ == '__main__':
+    import sys
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        problems = check_recovery(directory)
+    for problem in problems:
+        print(problem)
+    print("Ошибки восстановления" if problems else "Восстановление после падения: OK")
+    sys.exit(1 if problems else 0)
@@ -0,0 +1,225 @@
+import atexit
+from collections import OrderedDict
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QObject, QRunnable, QSize, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+from PyQt6.QtWidgets import QLabel, QStackedWidget
+
+
+# QtMultimedia грузится при первом вопросе со звуком или видео: библиотека и её бэкенд
+# заметно удлиняют запуск, а во многих пакетах медиа нет вовсе
+def multimedia():
+    global MULTIMEDIA
+    if MULTIMEDIA is None:
+        try:
+            from PyQt6.QtMultimedia import QAudioOutput, QMediaPlayer
+            from PyQt6.QtMultimediaWidgets import QVideoWidget
+            MULTIMEDIA = (QAudioOutput, QMediaPlayer, QVideoWidget)
+        except ImportError:  # без QtMultimedia вопросы показываются без звука и видео
+            MULTIMEDIA = ()
+    return MULTIMEDIA
+
+
+MULTIMEDIA = None
+
+
+# LRU-кэш медиа с ограничением по суммарному размеру в байтах
+class MediaCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.items = OrderedDict()  # ключ -> (значение, размер)
+
+    def get(self, key):
+        item = self.items.get(key)
+        if item is None:
+            return None
+        self.items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, value, size):
+        if key in self.items:
+            self.total_bytes -= self.items.pop(key)[1]
+        self.items[key] = (value, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and len(self.items) > 1:
+            _, (_, old_size) = self.items.popitem(last=False)
+            self.total_bytes -= old_size
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def clear(self):
+        self.items.clear()
+        self.total_bytes = 0
+
+
+# Сигналы фоновой задачи: QRunnable сам не является QObject
+class MediaTaskSignals(QObject):
+    done = pyqtSignal(object, object, int)  # ключ, декодированное медиа (или None), размер
+
+
+# Фоновая загрузка одного медиафайла. Картинки декодируются и масштабируются в QImage прямо в потоке,
+# аудио и видео кэшируются сырыми байтами – их разбирает QMediaPlayer в GUI-потоке
+class MediaTask(QRunnable):
+    def __init__(self, pack, key, max_size):
+        super().__init__()
+        self.pack = pack
+        self.key = key
+        self.max_size = max_size
+        self.signals = MediaTaskSignals()
+
+    def run(self):
+        media_type, ref = self.key
+        try:
+            data = self.pack.read_media(media_type, ref)
+        except (OSError, KeyError):
+            self.signals.done.emit(self.key, None, 0)
+            return
+        if media_type == "image":
+            image = QImage.fromData(data)
+            if image.isNull():
+                self.signals.done.emit(self.key, None, 0)
+                return
+            if image.width() > self.max_size.width() or image.height() > self.max_size.height():
+                image = image.scaled(
+                    self.max_size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation
+                )
+            self.signals.done.emit(self.key, image, image.sizeInBytes())
+        else:
+            self.signals.done.emit(self.key, data, len(data))
+
+
+# Загрузчик медиа: подгружает медиа ещё не сыгранных вопросов в пуле потоков,
+# чтобы страница вопроса показывалась сразу из кэша. Медиа открытого вопроса идут в пул
+# вперёд заранее подгружаемых
+class MediaLoader(QObject):
+    loaded = pyqtSignal(object)  # ключ (тип, ссылка) загруженного медиа
+
+    def __init__(self, pack, max_bytes=256 * 1024 * 1024, max_size=QSize(960, 540), threads=2):
+        super().__init__()
+        self.pack = pack
+        self.max_size = max_size
+        self.cache = MediaCache(max_bytes)
+        self.pending = {}  # ключ -> задача; держим ссылку, пока сигнал не дошёл
+        self.failed = set()
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(threads)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def request(self, key, priority=1):
+        if key in self.cache or key in self.pending or key in self.failed:
+            return
+        task = MediaTask(self.pack, key, self.max_size)
+        task.signals.done.connect(self.on_done)
+        self.pending[key] = task
+        self.pool.start(task, priority)
+
+    def prefetch(self, keys):
+        for key in keys:
+            self.request(key, 0)
+
+    def on_done(self, key, value, size):
+        if self.pending.pop(key, None) is None:
+            return  # кэш успели очистить, пока файл грузился
+        if value is None:
+            self.failed.add(key)
+            return
+        self.cache.put(key, value, size)
+        self.loaded.emit(key)
+
+    def close(self):
+        # Задачи в очереди снимаются, выполняющиеся дожидаются: поток пула не должен пережить интерпретатор
+        self.pool.clear()
+        self.pending.clear()
+        self.pool.waitForDone()
+
+
+LOADERS = {}  # id пакета -> загрузчик; сам пакет держит загрузчик
+
+
+def shared_loader(pack):
+    # Один загрузчик с одним кэшем и пулом на все окна игроков и игры процесса по одному пакету
+    loader = LOADERS.get(id(pack))
+    if loader is None:
+        loader = LOADERS[id(pack)] = MediaLoader(pack)
+    return loader
+
+
+@atexit.register
+def close_loaders():
+    for loader in LOADERS.values():
+        loader.close()
+
+
+# Зона медиа на странице вопроса: картинка берётся из кэша, звук и видео играются из памяти
+class MediaView(QStackedWidget):
+    def __init__(self, loader):
+        super().__init__()
+        self.loader = loader
+        self.media = ()
+        self.image_label = QLabel()
+        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.addWidget(self.image_label)
+        self.player = self.buffer = self.video_widget = None
+        self.loader.loaded.connect(self.on_loaded)
+        self.hide()
+
+    def create_player(self):
+        if self.player is None and multimedia():
+            audio_output, media_player, video_widget = multimedia()
+            self.player = media_player(self)
+            self.player.setAudioOutput(audio_output(self))
+            self.video_widget = video_widget()
+            self.player.setVideoOutput(self.video_widget)
+            self.addWidget(self.video_widget)
+        return self.player
+
+    def show_media(self, media):
+        media = tuple(media or ())
+        if media == self.media:
+            return
+        self.stop()
+        self.media = media
+        for key in media:
+            self.loader.request(key)
+        self.refresh()
+
+    def refresh(self):
+        for key in self.media:
+            value = self.loader.get(key)
+            if value is None:
+                continue
+            media_type = key[0]
+            if media_type == "image":
+                if self.image_label.pixmap().isNull():
+                    self.image_label.setPixmap(QPixmap.fromImage(value))
+                self.setCurrentWidget(self.image_label)
+                self.show()
+            elif self.buffer is None and self.create_player() is not None:
+                self.buffer = QBuffer(self)
+                self.buffer.setData(QByteArray(value))
+                self.buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+                self.player.setSourceDevice(self.buffer)
+                if media_type == "video":
+                    self.setCurrentWidget(self.video_widget)
+                    self.show()
+                self.player.play()
+
+    def on_loaded(self, key):
+        if key in self.media:
+            self.refresh()
+
+    def stop(self):
+        self.media = ()
+        self.image_label.clear()
+        if self.player is not None:
+            self.player.stop()
+            self.player.setSourceDevice(None)
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer.deleteLater()
+            self.buffer = None
+        self.hide()
@@ -0,0 +1,118 @@
+# Проверка пакета вопросов: почти одинаковые вопросы (в том числе из разных пакетов, слитых в один)
+# и одинаковые ответы в разных темах. Похожие вопросы ищутся через MinHash по символьным шинглам
+# и LSH по полосам подписи, поэтому сравниваются только пары-кандидаты, а не все со всеми –
+# проверка укладывается в секунды и на десятках тысяч вопросов.
+# Запуск: python pack_lint.py [пакет] --threshold 0.7
+import argparse
+import sys
+import time
+import zlib
+from collections import defaultdict
+from itertools import combinations
+
+import numpy as np
+
+from pack_loader import load_pack
+from search import tokenize
+
+SHINGLE = 5          # длина символьного шингла
+NUM_PERM = 128       # длина подписи MinHash
+BANDS = 16           # полос LSH; порог срабатывания ~ (1 / BANDS) ** (BANDS / NUM_PERM) ≈ 0.7
+PRIME = (1 << 31) - 1
+
+
+def shingles(text):
+    # Шинглы по нормализованному тексту (регистр, ё/е, знаки препинания не важны)
+    text = " ".join(tokenize(text))
+    if len(text) <= SHINGLE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+
+
+# Подписи MinHash: для каждой из NUM_PERM хэш-функций вида (a*x + b) mod PRIME – минимум по шинглам.
+# Доля совпавших позиций двух подписей оценивает коэффициент Жаккара их множеств шинглов
+class MinHasher:
+    def __init__(self, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, PRIME, NUM_PERM, dtype=np.uint64)[:, None]
+        self.b = rng.integers(0, PRIME, NUM_PERM, dtype=np.uint64)[:, None]
+
+    def signature(self, shingle_set):
+        hashes = np.fromiter((zlib.crc32(s.encode()) % PRIME for s in shingle_set), np.uint64, len(shingle_set))
+        return ((self.a * hashes + self.b) % PRIME).min(axis=1)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def iter_questions(pack):
+    for round_name, topics in pack.items():
+        for topic, questions in topics.items():
+            for i, q in enumerate(questions):
+                yield (round_name, topic, i), q
+
+
+def near_duplicates(questions, threshold):
+    # questions: список (ключ, вопрос). Возвращает [(сходство, ключ1, ключ2)] по убыванию сходства
+    hasher = MinHasher()
+    sets = [shingles(q["question"]) for _, q in questions]
+    signatures = np.stack([hasher.signature(s) if s else np.zeros(NUM_PERM, np.uint64) for s in sets])
+    rows = NUM_PERM // BANDS
+    candidates = set()
+    for band in range(BANDS):
+        buckets = defaultdict(list)
+        for doc, part in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            if sets[doc]:
+                buckets[part.tobytes()].append(doc)
+        for docs in buckets.values():
+            candidates.update(combinations(docs, 2))
+    found = []
+    for first, second in candidates:
+        similarity = jaccard(sets[first], sets[second])  # точное сходство – только для кандидатов
+        if similarity >= threshold:
+            found.append((similarity, questions[first][0], questions[second][0]))
+    found.sort(key=lambda item: -item[0])
+    return found
+
+
+def shared_answers(questions):
+    # Одинаковые (после нормализации) ответы у вопросов из разных тем
+    by_answer = defaultdict(list)
+    for key, q in questions:
+        answer = " ".join(tokenize(q["answer"]))
+        if answer:
+            by_answer[answer].append(key)
+    return {
+        answer: keys for answer, keys in by_answer.items()
+        if len({(round_name, topic) for round_name, topic, _ in keys}) > 1
+    }
+
+
+def describe(pack, key):
+    round_name, topic, i = key
+    q = pack[round_name][topic][i]
+    return f"{round_name} / {topic} / {q['value']}: {q['question']}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Проверка пакета вопросов на повторы")
+    parser.add_argument("pack", nargs="?", help="пакет вопросов (.json, .yaml или .siq)")
+    parser.add_argument("--threshold", type=float, default=0.7,
+                        help="минимальное сходство вопросов (коэффициент Жаккара по шинглам), 0..1")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    pack = load_pack(args.pack)
+    questions = list(iter_questions(pack))
+    duplicates = near_duplicates(questions, args.threshold)
+    answers = shared_answers(questions)
+    for similarity, first, second in duplicates:
+        print(f"{similarity:.2f}  {describe(pack, first)}\n      {describe(pack, second)}")
+    for answer, keys in sorted(answers.items()):
+        print(f"Ответ «{answer}» в разных темах:")
+        for key in keys:
+            print(f"      {describe(pack, key)}")
+    print(f"Вопросов: {len(questions)}, похожих пар: {len(duplicates)}, общих ответов: {len(answers)}, "
+          f"{time.perf_counter() - started:.2f} с")
+    sys.exit(1 if duplicates or answers else 0)
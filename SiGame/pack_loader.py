@@ -0,0 +1,233 @@
+import hashlib
+import json
+import os
+import pickle
+import struct
+import zipfile
+import xml.etree.ElementTree as ET
+from collections.abc import Mapping
+from urllib.parse import quote
+
+# Версия формата кэша: при изменении структуры раундов старые файлы кэша просто не находятся
+CACHE_VERSION = 2
+CACHE_DIR_NAME = ".pack_cache"
+CACHE_MAGIC = b"SIPK"
+
+DEFAULT_PACK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "packs", "8marta.json")
+
+# Типы вопросов "Кот в мешке" в SIGame: name у <type> в формате v4 и type у <question> в v5
+SIQ_CAT_TYPES = {"cat", "bagcat", "secret", "secretPublicPrice", "secretNoQuestion"}
+SIQ_TEXT_TYPES = {None, "", "text", "say"}
+# Типы медиа в пакете и папки, в которых SIGame хранит их внутри архива
+MEDIA_TYPES = {"image": "image", "voice": "audio", "audio": "audio", "video": "video"}
+SIQ_MEDIA_DIRS = {"image": "Images", "audio": "Audio", "video": "Video"}
+
+
+# Пакет вопросов, скомпилированный в кэш. Ведёт себя как словарь {раунд: {тема: [вопросы]}},
+# но раунд читается с диска и распаковывается только при первом обращении к нему
+class QuestionPack(Mapping):
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.loaded = {}
+        with open(cache_path, "rb") as f:
+            if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                raise ValueError(f"Файл не является кэшем пакета: {cache_path}")
+            version, = struct.unpack("<I", f.read(4))
+            if version != CACHE_VERSION:
+                raise ValueError(f"Устаревшая версия кэша пакета: {version}")
+            f.seek(-8, os.SEEK_END)
+            header_pos, = struct.unpack("<Q", f.read(8))
+            f.seek(header_pos)
+            header = pickle.load(f)
+        self.name = header["name"]
+        self.round_names = header["rounds"]
+        self.offsets = header["offsets"]
+        self.source = header["source"]
+
+    def __getitem__(self, round_name):
+        if round_name not in self.loaded:
+            offset, length = self.offsets[round_name]
+            with open(self.cache_path, "rb") as f:
+                f.seek(offset)
+                self.loaded[round_name] = pickle.loads(f.read(length))
+        return self.loaded[round_name]
+
+    def __iter__(self):
+        return iter(self.round_names)
+
+    def __len__(self):
+        return len(self.round_names)
+
+    # Чтение сырых байтов медиафайла; вызывается и из фоновых потоков, поэтому архив открывается заново
+    def read_media(self, media_type, ref):
+        if self.source.lower().endswith(".siq"):
+            folder = SIQ_MEDIA_DIRS[media_type]
+            with zipfile.ZipFile(self.source) as zf:
+                for name in (f"{folder}/{ref}", f"{folder}/{quote(ref)}", ref):
+                    try:
+                        return zf.read(name)
+                    except KeyError:
+                        continue
+            raise FileNotFoundError(f"{folder}/{ref}")
+        with open(os.path.join(os.path.dirname(self.source), ref), "rb") as f:
+            return f.read()
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_question(q):
+    # Медиа задаются списком {"type": ..., "file": ...} или ключами image/audio/video
+    media = [(MEDIA_TYPES[m["type"]], m["file"]) for m in q.get("media", ())]
+    media += [(media_type, q[media_type]) for media_type in ("image", "audio", "video") if q.get(media_type)]
+    return {
+        "question": str(q["question"]),
+        "answer": str(q["answer"]),
+        "value": int(q["value"]),
+        "cat_in_bag": bool(q.get("cat_in_bag", False)),
+        "media": media,
+    }
+
+
+# Чтение пакета в формате {"name": ..., "rounds": {раунд: {тема: [вопросы]}}}
+def iter_dict_rounds(data, meta):
+    meta["name"] = data.get("name", "")
+    for round_name, topics in data["rounds"].items():
+        yield round_name, {
+            topic: [normalize_question(q) for q in questions] for topic, questions in topics.items()
+        }
+
+
+def iter_json_rounds(path, meta):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    yield from iter_dict_rounds(data, meta)
+
+
+def iter_yaml_rounds(path, meta):
+    # PyYAML импортируется только для YAML-пакетов: на запуске с другими пакетами он не нужен
+    try:
+        import yaml
+    except ImportError:  # YAML-пакеты поддерживаются только при установленном PyYAML
+        raise RuntimeError("Для загрузки YAML-пакетов установите PyYAML")
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    yield from iter_dict_rounds(data, meta)
+
+
+# Потоковое чтение content.xml из .siq: в памяти одновременно держится только один раунд
+def iter_siq_rounds(path, meta):
+    with zipfile.ZipFile(path) as zf, zf.open("content.xml") as content:
+        round_name = theme_name = None
+        topics = questions = question = None
+        param_name = None
+        after_marker = False
+        for event, elem in ET.iterparse(content, events=("start", "end")):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if event == "start":
+                if tag == "package":
+                    meta["name"] = elem.get("name", "")
+                elif tag == "round":
+                    round_name, topics = elem.get("name", ""), {}
+                elif tag == "theme":
+                    theme_name, questions = elem.get("name", ""), []
+                elif tag == "question":
+                    question = {"text": [], "media": [], "answer": None, "value": elem.get("price", "0"),
+                                "cat_in_bag": elem.get("type") in SIQ_CAT_TYPES}
+                    after_marker = False
+                elif tag == "type" and question is not None:
+                    question["cat_in_bag"] = question["cat_in_bag"] or elem.get("name") in SIQ_CAT_TYPES
+                elif tag == "param" and question is not None:
+                    param_name = elem.get("name")
+                continue
+
+            if question is not None:
+                if tag == "atom":
+                    if elem.get("type") == "marker":
+                        after_marker = True
+                    elif not after_marker and elem.get("type") in SIQ_TEXT_TYPES and elem.text:
+                        question["text"].append(elem.text.strip())
+                    elif not after_marker and elem.get("type") in MEDIA_TYPES and elem.text:
+                        question["media"].append({"type": elem.get("type"), "file": elem.text.strip().lstrip("@")})
+                elif tag == "item" and param_name == "question":
+                    if elem.get("type") in SIQ_TEXT_TYPES and elem.text:
+                        question["text"].append(elem.text.strip())
+                    elif elem.get("type") in MEDIA_TYPES and elem.text:
+                        question["media"].append({"type": elem.get("type"), "file": elem.text.strip()})
+                elif tag == "param":
+                    param_name = None
+                elif tag == "answer" and question["answer"] is None:
+                    question["answer"] = (elem.text or "").strip()
+                elif tag == "question":
+                    questions.append(normalize_question({
+                        "question": "\n".join(question["text"]),
+                        "answer": question["answer"] or "",
+                        "value": question["value"] or 0,
+                        "cat_in_bag": question["cat_in_bag"],
+                        "media": question["media"],
+                    }))
+                    question = None
+            elif tag == "theme":
+                topics[theme_name] = questions
+            elif tag == "round":
+                yield round_name, topics
+                topics = None
+                elem.clear()
+
+
+PACK_READERS = {
+    ".json": iter_json_rounds,
+    ".yaml": iter_yaml_rounds,
+    ".yml": iter_yaml_rounds,
+    ".siq": iter_siq_rounds,
+}
+
+
+# Компиляция пакета в кэш: раунды пишутся по мере разбора, заголовок со смещениями – в конец файла
+def compile_pack(path, cache_path):
+    reader = PACK_READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        raise ValueError(f"Неизвестный формат пакета: {path}")
+    meta = {}
+    offsets = {}
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(CACHE_MAGIC + struct.pack("<I", CACHE_VERSION))
+        for round_name, topics in reader(path, meta):
+            blob = pickle.dumps(topics, protocol=pickle.HIGHEST_PROTOCOL)
+            offsets[round_name] = (f.tell(), len(blob))
+            f.write(blob)
+        header_pos = f.tell()
+        pickle.dump({
+            "name": meta.get("name", ""),
+            "rounds": list(offsets),
+            "offsets": offsets,
+            "source": os.path.abspath(path),
+        }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.write(struct.pack("<Q", header_pos))
+    os.replace(tmp_path, cache_path)
+
+
+def cache_path_for(path, digest, cache_dir=None):
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}-{digest[:16]}.v{CACHE_VERSION}.bin")
+
+
+def load_pack(path=None, cache_dir=None):
+    path = path or DEFAULT_PACK
+    cache_path = cache_path_for(path, file_digest(path), cache_dir)
+    if not os.path.exists(cache_path):
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        compile_pack(path, cache_path)
+    try:
+        return QuestionPack(cache_path)
+    except (ValueError, EOFError, pickle.UnpicklingError, struct.error):
+        # Повреждённый кэш пересобираем из исходного пакета
+        compile_pack(path, cache_path)
+        return QuestionPack(cache_path)
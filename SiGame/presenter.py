@@ -0,0 +1,199 @@
+from PyQt6.QtCore import QObject, QRectF, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QGuiApplication, QPainter
+from PyQt6.QtWidgets import QComboBox, QDialog, QGridLayout, QHBoxLayout, QLabel, QPushButton, QVBoxLayout, QWidget
+
+from recorder import FrameSource
+
+
+def screen_title(screen):
+    geometry = screen.geometry()
+    return f"{screen.name()} ({geometry.width()}×{geometry.height()})"
+
+
+def pixel_size(size, ratio):
+    return QSize(round(size.width() * ratio), round(size.height() * ratio))
+
+
+def place_on_screen(window, screen):
+    # screen=None – обычное окно; иначе окно разворачивается на весь указанный экран
+    if screen is None:
+        if window.isFullScreen():
+            window.showNormal()
+        else:
+            window.show()
+        return
+    window.showNormal()
+    window.setScreen(screen)
+    window.setGeometry(screen.geometry())
+    window.showFullScreen()
+
+
+# Дополнительный экран игроков (проектор, монитор на сцене, выход на трансляцию). Своих виджетов
+# и модели у него нет: он только выводит последний кадр общего FrameSource, вписывая его в себя
+class MirrorDisplay(QWidget):
+    closed = pyqtSignal(object)
+    resized = pyqtSignal()
+
+    def __init__(self, source, title):
+        super().__init__()
+        self.setWindowTitle(title)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.resize(800, 600)
+        self.screen_choice = None
+        self.image = source.last_image
+        source.frame.connect(self.on_frame)
+
+    def on_frame(self, image):
+        self.image = image
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.black)
+        if self.image is None:
+            return
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        size = self.image.deviceIndependentSize()
+        scale = min(self.width() / size.width(), self.height() / size.height())
+        target = QRectF(0, 0, size.width() * scale, size.height() * scale)
+        target.moveCenter(QRectF(self.rect()).center())
+        painter.drawImage(target, self.image)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.resized.emit()
+
+    def target_size(self):
+        # Размер в пикселях устройства, в котором выводится кадр: весь экран или окно
+        if self.screen_choice is not None:
+            return pixel_size(self.screen_choice.geometry().size(), self.screen_choice.devicePixelRatio())
+        return pixel_size(self.size(), self.devicePixelRatioF())
+
+    def closeEvent(self, event):
+        super().closeEvent(event)
+        self.closed.emit(self)
+
+
+# Режим ведущего с несколькими экранами игроков. Первый экран – само окно игроков: только оно
+# строит страницы и модели. Его кадр рисуется один раз на изменение (FrameSource) в разрешении
+# самого крупного из экранов и раздаётся всем зеркалам, так что каждый следующий экран добавляет
+# лишь вывод готовой картинки. source – общий с записью источник; без него свой создаётся
+# с первым зеркалом
+class Presenter(QObject):
+    displays_changed = pyqtSignal()
+
+    def __init__(self, player_window, source=None):
+        super().__init__()
+        self.player_window = player_window
+        self.shared = source is not None
+        self.source = source
+        self.base_size = source.size if source is not None else None  # размер кадра без зеркал
+        self.mirrors = []
+        self.primary_screen = None
+
+    def displays(self):
+        return [self.player_window] + self.mirrors
+
+    def add_display(self, screen=None):
+        if self.source is None:
+            self.source = FrameSource(self.player_window)
+        # По перерисовкам – чтобы на зеркала попадала и анимация доски
+        self.source.set_follow_paints(True)
+        mirror = MirrorDisplay(self.source, f"{self.player_window.windowTitle()} – экран {len(self.mirrors) + 2}")
+        mirror.closed.connect(self.remove_display)
+        mirror.resized.connect(self.update_frame_size)
+        self.mirrors.append(mirror)
+        self.assign(mirror, screen)
+        self.displays_changed.emit()
+        return mirror
+
+    def update_frame_size(self):
+        # Кадр – в разрешении самого крупного зеркала (и не меньше кадра записи): на проекторе 4K
+        # текст не растягивается из окна меньшего размера, а на меньших экранах кадр уменьшается
+        sizes = [mirror.target_size() for mirror in self.mirrors]
+        if self.base_size is not None:
+            sizes.append(self.base_size)
+        if self.source is not None and sizes:
+            self.source.set_size(max(sizes, key=lambda size: size.width() * size.height()))
+
+    def remove_display(self, mirror):
+        if mirror not in self.mirrors:
+            return
+        self.mirrors.remove(mirror)
+        self.source.frame.disconnect(mirror.on_frame)
+        mirror.closed.disconnect(self.remove_display)
+        mirror.resized.disconnect(self.update_frame_size)
+        mirror.close()
+        mirror.deleteLater()
+        if self.mirrors:
+            self.update_frame_size()
+        elif self.shared:
+            # Источник остаётся записи – в её прежнем режиме
+            self.source.set_follow_paints(False)
+            self.source.set_size(self.base_size)
+        else:
+            self.source.close()
+            self.source = None
+        self.displays_changed.emit()
+
+    def assign(self, display, screen):
+        if display is self.player_window:
+            self.primary_screen = screen
+        else:
+            display.screen_choice = screen
+        place_on_screen(display, screen)
+        if display is not self.player_window:
+            self.update_frame_size()
+
+    def screen_of(self, display):
+        return self.primary_screen if display is self.player_window else display.screen_choice
+
+    def close(self):
+        for mirror in list(self.mirrors):
+            self.remove_display(mirror)
+
+
+# Назначение экранов игроков из окна ведущего: по строке на экран, в строке – монитор или "в окне"
+class ScreenDialog(QDialog):
+    def __init__(self, presenter, parent=None):
+        super().__init__(parent)
+        self.presenter = presenter
+        self.setWindowTitle("Экраны игроков")
+        self.rows = QGridLayout()
+        btn_add = QPushButton("Добавить экран")
+        btn_add.clicked.connect(lambda: self.presenter.add_display())
+        btn_remove = QPushButton("Убрать последний")
+        btn_remove.clicked.connect(self.remove_last)
+        buttons = QHBoxLayout()
+        buttons.addWidget(btn_add)
+        buttons.addWidget(btn_remove)
+        layout = QVBoxLayout()
+        layout.addLayout(self.rows)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+        presenter.displays_changed.connect(self.refresh)
+        QGuiApplication.instance().screenAdded.connect(self.refresh)
+        QGuiApplication.instance().screenRemoved.connect(self.refresh)
+        self.refresh()
+
+    def refresh(self, *args):
+        while self.rows.count():
+            self.rows.takeAt(0).widget().deleteLater()
+        screens = QGuiApplication.screens()
+        for row, display in enumerate(self.presenter.displays()):
+            title = "Экран 1 (окно игроков)" if row == 0 else f"Экран {row + 1}"
+            self.rows.addWidget(QLabel(title), row, 0)
+            choice = QComboBox()
+            choice.addItem("В окне", None)
+            for screen in screens:
+                choice.addItem(screen_title(screen), screen)
+            current = self.presenter.screen_of(display)
+            choice.setCurrentIndex(screens.index(current) + 1 if current in screens else 0)
+            choice.currentIndexChanged.connect(
+                lambda i, d=display, c=choice: self.presenter.assign(d, c.itemData(i))
+            )
+            self.rows.addWidget(choice, row, 1)
+
+    def remove_last(self):
+        if self.presenter.mirrors:
+            self.presenter.remove_display(self.presenter.mirrors[-1])
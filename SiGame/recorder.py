@@ -0,0 +1,249 @@
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+from PyQt6.QtCore import QEvent, QObject, Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtWidgets import QApplication, QWidget
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".mov", ".webm")
+POLL_MS = 1000  # контрольный кадр: ловит то, что меняется без сигналов игры (подсветка строк, дорисовка медиа)
+MAX_QUEUE = 8
+
+
+# Кадры в каталог PNG-файлами. Одинаковые кадры не пишутся вовсе: длительность каждого кадра
+# попадает в список frames.ffconcat, из которого ffmpeg собирает видео с правильным таймингом:
+#   ffmpeg -f concat -i frames.ffconcat -fps_mode vfr -pix_fmt yuv420p game.mp4
+class PngSequence:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.playlist = open(os.path.join(directory, "frames.ffconcat"), "w", encoding="utf-8")
+        self.playlist.write("ffconcat version 1.0\n")
+        self.count = 0
+        self.last = None  # (имя файла, время) предыдущего кадра: его длительность известна с приходом следующего
+
+    def write(self, timestamp, image):
+        self.count += 1
+        name = f"frame_{self.count:06d}.png"
+        image.save(os.path.join(self.directory, name))
+        self.end_frame(timestamp)
+        self.last = (name, timestamp)
+
+    def end_frame(self, timestamp):
+        if self.last is not None:
+            name, started = self.last
+            self.playlist.write(f"file {name}\nduration {timestamp - started:.3f}\n")
+            self.playlist.flush()
+
+    def close(self, timestamp):
+        self.end_frame(timestamp)
+        if self.last is not None:
+            # Последний файл повторяется без длительности – так concat не теряет его показ
+            self.playlist.write(f"file {self.last[0]}\n")
+        self.playlist.close()
+
+
+# Сырые кадры в stdin внешнего кодировщика (по умолчанию ffmpeg). Кадры приходят только при изменениях,
+# и кодировщик ставит им метки времени по часам в момент получения – поток с переменной частотой
+class EncoderPipe:
+    def __init__(self, path, size, command=None):
+        if command is None:
+            ffmpeg = shutil.which("ffmpeg")
+            if ffmpeg is None:
+                raise RuntimeError("Для записи видео нужен ffmpeg в PATH; для PNG-кадров укажите каталог")
+            command = [
+                ffmpeg, "-loglevel", "error", "-y",
+                "-f", "rawvideo", "-pix_fmt", "bgra", "-s", f"{size.width()}x{size.height()}",
+                "-use_wallclock_as_timestamps", "1", "-i", "-",
+                "-fps_mode", "vfr", "-pix_fmt", "yuv420p", path,
+            ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, timestamp, image):
+        # Format_ARGB32 в памяти little-endian машины – это BGRA; строки без выравнивания, ширина*4
+        self.process.stdin.write(image.constBits().asstring(image.sizeInBytes()))
+
+    def close(self, timestamp):
+        self.process.stdin.close()
+        self.process.wait()
+
+
+def open_sink(path, size):
+    if path.lower().endswith(VIDEO_EXTENSIONS):
+        return EncoderPipe(path, size)
+    return PngSequence(path)
+
+
+def game_record_path(path, number):
+    # Первая игра пишет прямо в path, как и без сессий; остальные – в подкаталог или файл с номером игры
+    if number == 1:
+        return path
+    if path.lower().endswith(VIDEO_EXTENSIONS):
+        base, ext = os.path.splitext(path)
+        return f"{base}-game-{number}{ext}"
+    return os.path.join(path, f"game-{number}")
+
+
+# Кадры окна игроков без захвата экрана: текущая страница QStackedWidget рисуется в QImage только
+# при изменениях (сигналы игры сводятся в один кадр на проход цикла событий) и раз в POLL_MS.
+# Кадр, совпадающий с предыдущим, отбрасывается сравнением пикселей, остальные уходят сигналом frame.
+# size – размер кадра (страница вписывается в него с полями); без него кадр в размер окна.
+# follow_paints – ещё и по каждой перерисовке страницы, чтобы в кадры попадала анимация.
+# Один источник разделяют запись и экраны ведущего: страница рисуется один раз на изменение
+class FrameSource(QObject):
+    frame = pyqtSignal(object)  # QImage
+
+    def __init__(self, player_window, size=None, follow_paints=False):
+        super().__init__()
+        self.window = player_window
+        self.size = size
+        self.last_image = None
+        self.rendering = False
+        self.following = False
+        self.rendered = self.duplicates = 0
+        # Несколько сигналов одного действия ведущего дают один кадр
+        self.capture_timer = QTimer(self)
+        self.capture_timer.setSingleShot(True)
+        self.capture_timer.setInterval(0)
+        self.capture_timer.timeout.connect(self.capture)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.capture)
+        self.poll_timer.start(POLL_MS)
+        controller = player_window.controller
+        for signal in (controller.update_player_state, controller.score_changed, controller.roster_changed,
+                       controller.countdown, controller.round_changed, player_window.stack.currentChanged,
+                       player_window.texts.rendered, player_window.media.loaded):
+            signal.connect(self.request)
+        self.set_follow_paints(follow_paints)
+        self.request()
+
+    def set_follow_paints(self, follow):
+        if follow == self.following:
+            return
+        self.following = follow
+        if follow:
+            QApplication.instance().installEventFilter(self)
+        else:
+            QApplication.instance().removeEventFilter(self)
+
+    def set_size(self, size):
+        if size != self.size:
+            self.size = size
+            self.request()
+
+    def eventFilter(self, obj, event):
+        # Отрисовка самого кадра тоже шлёт виджетам события Paint – их пропускаем
+        if (event.type() == QEvent.Type.Paint and not self.rendering and isinstance(obj, QWidget)
+                and self.window.stack.isAncestorOf(obj)):
+            self.request()
+        return False
+
+    def request(self, *args):
+        self.capture_timer.start()
+
+    def render(self):
+        stack = self.window.stack
+        ratio = stack.devicePixelRatioF()
+        size = self.size or stack.size() * ratio
+        image = QImage(size, QImage.Format.Format_ARGB32)
+        if self.size is None:
+            image.setDevicePixelRatio(ratio)
+        image.fill(stack.palette().color(stack.backgroundRole()))
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        if self.size is not None and stack.width() and stack.height():
+            scale = min(size.width() / stack.width(), size.height() / stack.height())
+            painter.translate((size.width() - stack.width() * scale) / 2,
+                              (size.height() - stack.height() * scale) / 2)
+            painter.scale(scale, scale)
+        self.rendering = True
+        try:
+            stack.currentWidget().render(painter)
+        finally:
+            self.rendering = False
+        painter.end()
+        return image
+
+    def capture(self):
+        image = self.render()
+        self.rendered += 1
+        if image == self.last_image:
+            self.duplicates += 1
+            return
+        self.last_image = image
+        self.frame.emit(image)
+
+    def close(self):
+        self.capture_timer.stop()
+        self.poll_timer.stop()
+        QApplication.instance().removeEventFilter(self)
+
+
+def fit_frame(image, size):
+    # Кадр другого размера (источник рисует крупнее для экранов ведущего) – вписывается в размер записи
+    if image.size() == size:
+        return image
+    scaled = image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    framed = QImage(size, QImage.Format.Format_ARGB32)
+    framed.fill(image.pixelColor(0, 0))
+    painter = QPainter(framed)
+    painter.drawImage((size.width() - scaled.width()) // 2, (size.height() - scaled.height()) // 2, scaled)
+    painter.end()
+    return framed
+
+
+# Запись кадров FrameSource: через ограниченную очередь в поток записи. Если запись не успевает,
+# из очереди выпадают самые старые кадры, а не подвисает интерфейс. size – размер кадров записи,
+# если источник может отдавать кадры другого размера; приводятся к нему в потоке записи
+class FrameRecorder(QObject):
+    def __init__(self, source, sink, max_queue=MAX_QUEUE, size=None):
+        super().__init__()
+        self.source = source
+        self.sink = sink
+        self.size = size
+        self.dropped = self.written = 0
+        self.frames = queue.Queue(max_queue)
+        self.thread = threading.Thread(target=self.run, name="frame-writer", daemon=True)
+        self.thread.start()
+        source.frame.connect(self.on_frame)
+
+    def on_frame(self, image):
+        self.push((time.monotonic(), image))
+
+    def push(self, frame):
+        while True:
+            try:
+                self.frames.put_nowait(frame)
+                return
+            except queue.Full:
+                try:
+                    self.frames.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def run(self):
+        while True:
+            frame = self.frames.get()
+            if frame is None:
+                break
+            timestamp, image = frame
+            if self.size is not None:
+                image = fit_frame(image, self.size)
+            self.sink.write(timestamp, image)
+            self.written += 1
+        self.sink.close(time.monotonic())
+
+    def close(self):
+        self.source.capture()
+        self.source.close()
+        self.frames.put(None)
+        self.thread.join()
+
+    def report(self):
+        return (f"кадров отрисовано {self.source.rendered}, повторов отброшено {self.source.duplicates}, "
+                f"записано {self.written}, потеряно при перегрузке {self.dropped}")
@@ -0,0 +1,356 @@
+# Запись действий ведущего и их воспроизведение для поиска регрессий. Во время игры каждое действие
+# (выбор вопроса, отметка ответа, смена раунда и слайда, отсчёт, игроки, отмена) пишется в файл
+# вместе со временем и состоянием игры после него. Воспроизведение подаёт те же действия контроллеру
+# и обоим окнам – в реальном темпе или мгновенно на виртуальных часах, где отложенные задачи
+# (показ ответа "Кота в мешке", возврат к доске, автопереход) срабатывают в тех же местах между
+# действиями, – сверяет состояние и отправленные окнам обновления и отмечает действия, обновление
+# окон после которых заняло больше бюджета.
+# Запись: python si_game.py --record-actions игра.jsonl; проверка: python replay.py игра.jsonl --budget 30
+import argparse
+import functools
+import inspect
+import json
+import sys
+import tempfile
+import time
+
+from PyQt6.QtCore import QEventLoop, QObject, QTimer
+from PyQt6.QtWidgets import QApplication
+
+LOG_VERSION = 1
+DEFAULT_BUDGET_MS = 50.0
+MAX_SHOWN = 20  # сколько расхождений и медленных действий выводить
+# Действия ведущего по целям. Вложенные вызовы (окно ведущего само переключает слайд)
+# и задачи планировщика действиями не считаются – при воспроизведении они повторятся сами
+ACTIONS = {
+    "host": ["select_question", "mark_correct", "mark_incorrect", "add_player", "remove_player",
+             "advance_round", "go_previous_round"],
+    "players": ["set_welcome_page", "set_board_page", "set_question_page", "set_results_page",
+                "set_credits_page", "set_cat_page"],
+    "controller": ["start_countdown", "add_player", "remove_player", "apply_roster"],
+    "journal": ["undo", "redo"],
+}
+# Действия окна ведущего, которые берут игрока из полей ввода, а не из аргументов
+INPUTS = {"mark_correct": "player_select", "mark_incorrect": "player_select",
+          "remove_player": "player_select", "add_player": "player_input"}
+RECORDERS = {}  # объект игры (контроллер, окно, журнал) -> ActionRecorder этой игры
+
+
+def game_state(controller, player_window):
+    # Состояние игры после действия – то, что сверяется при воспроизведении
+    return {
+        "round": controller.current_round,
+        "question": list(controller.current) if controller.current else None,
+        "show_answer": controller.state["show_answer"],
+        "incorrect": controller.state["incorrect"],
+        "countdown": controller.countdown_left,
+        "used": format(controller.index[controller.current_round].used, "x"),
+        "players": dict(controller.players),
+        "page": player_window.PAGES[player_window.stack.currentIndex()],
+    }
+
+
+def emitted_state(data):
+    # Сокращённое update_player_state: раунд, вопрос, показан ли ответ, был ли неверный, конец игры
+    state = data["state"]
+    record = state["record"]
+    return [data["current_round"], [record.topic, record.index] if record else None,
+            state["show_answer"], state["incorrect"], data["game_over"]]
+
+
+def read_input(widget):
+    return widget.currentText() if hasattr(widget, "currentText") else widget.text()
+
+
+def write_input(widget, value):
+    if hasattr(widget, "setCurrentText"):
+        widget.setCurrentText(value)
+    else:
+        widget.setText(value)
+
+
+def plain_args(name, args):
+    # Аргументы в виде для JSON: список игроков apply_roster может прийти генератором
+    if name == "apply_roster" and args:
+        roster = [item if isinstance(item, str) else list(item) for item in args[0]]
+        return (roster,) + tuple(args[1:])
+    return tuple(args)
+
+
+def positional_limit(func):
+    # Сколько позиционных аргументов принимает метод: сигнал clicked передаёт лишний checked,
+    # и PyQt отбрасывает его сам только у методов, а не у обёрток с *args
+    params = inspect.signature(func).parameters.values()
+    if any(p.kind is inspect.Parameter.VAR_POSITIONAL for p in params):
+        return None
+    return sum(p.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+               for p in params)
+
+
+def recorded(target, name, func):
+    limit = positional_limit(func)
+
+    @functools.wraps(func)
+    def wrapper(obj, *args):
+        if limit is not None:
+            args = args[:limit - 1]
+        recorder = RECORDERS.get(obj)
+        if recorder is None:
+            return func(obj, *args)
+        return recorder.call(target, name, func, obj, args)
+    return wrapper
+
+
+def install_recording(classes):
+    # classes: цель -> класс. Методы подменяются на уровне класса до создания игр, чтобы запись
+    # попала и в слоты, подключённые к сигналам в конструкторах; без ActionRecorder обёртка
+    # только вызывает исходный метод
+    for target, cls in classes.items():
+        for name in ACTIONS[target]:
+            setattr(cls, name, recorded(target, name, cls.__dict__[name]))
+
+
+# Запись действий ведущего одной игры в файл JSON Lines: заголовок с исходным состоянием,
+# по строке на действие (время от начала, аргументы, поля ввода, длительность, состояние после
+# и обновления окон с прошлого действия) и итоговая строка с отложенными последствиями
+class ActionRecorder(QObject):
+    def __init__(self, path, controller, player_window, host_window, journal=None, pack_path=None, board="widgets"):
+        super().__init__()
+        self.controller = controller
+        self.player_window = player_window
+        self.host_window = host_window
+        self.depth = 0
+        self.count = 0
+        self.emitted = []
+        self.start = controller.scheduler.now()
+        self.file = open(path, "w", encoding="utf-8")
+        self.write({
+            "type": "session", "version": LOG_VERSION, "pack": pack_path, "board": board,
+            "rounds": controller.round_names, "auto_advance": controller.auto_advance,
+            "used_all": {round_name: format(index.used, "x") for round_name, index in controller.index.items()},
+            "state": game_state(controller, player_window),
+        })
+        controller.update_player_state.connect(self.on_state)
+        for obj in (controller, player_window, host_window, journal):
+            if obj is not None:
+                RECORDERS[obj] = self
+
+    def on_state(self, data):
+        self.emitted.append(emitted_state(data))
+
+    def call(self, target, name, func, obj, args):
+        if self.depth or self.controller.scheduler.running:
+            return func(obj, *args)
+        args = plain_args(name, args)
+        entry = {"type": "action", "t": round(self.controller.scheduler.now() - self.start, 3),
+                 "target": target, "action": name, "args": list(args)}
+        if target == "host" and name in INPUTS:
+            entry["input"] = read_input(getattr(self.host_window, INPUTS[name]))
+        self.depth += 1
+        started = time.perf_counter()
+        try:
+            return func(obj, *args)
+        finally:
+            entry["ms"] = round((time.perf_counter() - started) * 1000, 3)
+            self.depth -= 1
+            self.count += 1
+            self.finish(entry)
+
+    def finish(self, entry):
+        entry["state"] = game_state(self.controller, self.player_window)
+        entry["emitted"], self.emitted = self.emitted, []
+        self.write(entry)
+
+    def write(self, entry):
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.finish({"type": "end", "t": round(self.controller.scheduler.now() - self.start, 3)})
+        self.file.close()
+        for obj, recorder in list(RECORDERS.items()):
+            if recorder is self:
+                del RECORDERS[obj]
+
+
+def game_log_path(path, number):
+    # Первая игра пишет прямо в path, остальные – в файл с номером игры
+    if number == 1:
+        return path
+    base, ext = path.rsplit(".", 1) if "." in path else (path, "jsonl")
+    return f"{base}-game-{number}.{ext}"
+
+
+# Итоги воспроизведения: расхождения состояния и действия сверх бюджета задержки
+class ReplayReport:
+    def __init__(self):
+        self.actions = 0
+        self.mismatches = []  # (номер, действие, поле, ожидалось, получено)
+        self.slow = []        # (номер, действие, мс, бюджет, мс при записи)
+        self.latency = {}     # действие -> задержки, мс
+
+    @property
+    def ok(self):
+        return not self.mismatches and not self.slow
+
+    def lines(self):
+        for number, action, field, expected, actual in self.mismatches[:MAX_SHOWN]:
+            yield f"#{number} {action}: {field} ожидалось {expected!r}, получено {actual!r}"
+        for number, action, ms, budget, recorded_ms in self.slow[:MAX_SHOWN]:
+            yield f"#{number} {action}: {ms:.1f} мс при бюджете {budget:g} мс (при записи {recorded_ms:.1f} мс)"
+        for action, samples in sorted(self.latency.items()):
+            samples = sorted(samples)
+            yield (f"{action:<20} {len(samples):>5} раз, медиана {samples[len(samples) // 2]:.1f} мс, "
+                   f"максимум {samples[-1]:.1f} мс")
+        yield (f"Действий: {self.actions}, расхождений: {len(self.mismatches)}, "
+               f"сверх бюджета: {len(self.slow)}")
+
+
+# Воспроизведение записи на новой игре с обоими окнами. realtime=False – виртуальные часы:
+# паузы между действиями проматываются, игра проходит так быстро, как успевают окна.
+# budgets – бюджеты отдельных действий (мс), остальным – budget_ms
+class SessionReplayer:
+    def __init__(self, log_path, pack_path=None, realtime=False, budget_ms=DEFAULT_BUDGET_MS, budgets=None):
+        from journal import GameJournal
+        from pack_loader import load_pack
+        from scheduler import GameScheduler, VirtualClock
+        from si_game import GameController, HostWindow, PlayerWindow
+
+        self.log_path = log_path
+        self.realtime = realtime
+        self.budget_ms = budget_ms
+        self.budgets = budgets or {}
+        with open(log_path, encoding="utf-8") as f:
+            header = json.loads(f.readline())
+        if header.get("type") != "session" or header.get("version") != LOG_VERSION:
+            raise ValueError(f"Не запись действий ведущего или другая версия: {log_path}")
+        self.header = header
+        scheduler = GameScheduler() if realtime else GameScheduler(VirtualClock())
+        controller = GameController(load_pack(pack_path or header["pack"]), scheduler=scheduler)
+        if controller.round_names != header["rounds"]:
+            raise ValueError("Раунды пакета не совпадают с записью – укажите пакет, на котором шла игра")
+        controller.auto_advance = header["auto_advance"]
+        controller.apply_roster(header["state"]["players"].items())
+        for round_name, used in header["used_all"].items():
+            controller.index[round_name].load_used(int(used, 16))
+        if header["state"]["round"] != controller.current_round:
+            controller.set_round(header["state"]["round"])
+        self.controller = controller
+        # Отмена и повтор работают через журнал – ему хватает временного каталога
+        self.journal_dir = tempfile.TemporaryDirectory(prefix="si-replay-")
+        self.journal = GameJournal(controller, self.journal_dir.name)
+        self.journal.open()
+        self.player_window = PlayerWindow(controller, board=header["board"])
+        self.host_window = HostWindow(controller, self.player_window, self.journal)
+        self.targets = {"host": self.host_window, "players": self.player_window,
+                        "controller": controller, "journal": self.journal}
+        self.emitted = []
+        controller.update_player_state.connect(lambda data: self.emitted.append(emitted_state(data)))
+        self.player_window.show_page(self.player_window.PAGES.index(header["state"]["page"]))
+        self.host_window.show()
+        self.player_window.show()
+        QApplication.processEvents()
+        self.start = scheduler.now()
+
+    def wait_until(self, t):
+        delay = t - (self.controller.scheduler.now() - self.start)
+        if not self.realtime:
+            self.controller.scheduler.advance(max(0.0, delay))
+        elif delay > 0:
+            loop = QEventLoop()
+            QTimer.singleShot(round(delay * 1000), loop.quit)
+            loop.exec()
+
+    def perform(self, entry):
+        # Возвращает задержку действия в мс: сам вызов и обработка отложенных им событий окон
+        name = entry["action"]
+        if "input" in entry:
+            value = entry["input"].strip()
+            # С пустым или неизвестным игроком ведущий получил предупреждение и ничего не изменилось –
+            # модальное окно при воспроизведении не показываем
+            if not value or (INPUTS[name] == "player_select" and value not in self.controller.players):
+                return 0.0
+            write_input(getattr(self.host_window, INPUTS[name]), entry["input"])
+        started = time.perf_counter()
+        getattr(self.targets[entry["target"]], name)(*entry["args"])
+        QApplication.processEvents()
+        return (time.perf_counter() - started) * 1000
+
+    def check(self, report, number, name, entry):
+        state = game_state(self.controller, self.player_window)
+        for field, expected in entry["state"].items():
+            if state.get(field) != expected:
+                report.mismatches.append((number, name, field, expected, state.get(field)))
+        emitted, self.emitted = self.emitted, []
+        if emitted != entry["emitted"]:
+            report.mismatches.append((number, name, "обновления окон", entry["emitted"], emitted))
+
+    def run(self):
+        report = ReplayReport()
+        with open(self.log_path, encoding="utf-8") as f:
+            f.readline()
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self.wait_until(entry["t"])
+                if entry["type"] == "end":
+                    QApplication.processEvents()
+                    self.check(report, number, "конец записи", entry)
+                    break
+                name = entry["action"]
+                ms = self.perform(entry)
+                report.actions += 1
+                report.latency.setdefault(name, []).append(ms)
+                budget = self.budgets.get(name, self.budget_ms)
+                if ms > budget:
+                    report.slow.append((number, name, ms, budget, entry["ms"]))
+                self.check(report, number, name, entry)
+        return report
+
+    def close(self):
+        self.controller.scheduler.cancel_all()
+        self.journal.close()
+        self.player_window.texts.close()
+        self.host_window.close()
+        self.player_window.close()
+        self.journal_dir.cleanup()
+
+
+def parse_budgets(values):
+    # "30" – общий бюджет, "select_question=80" – бюджет одного действия
+    budget, budgets = DEFAULT_BUDGET_MS, {}
+    for value in values or ():
+        name, _, ms = value.rpartition("=")
+        if name:
+            budgets[name] = float(ms)
+        else:
+            budget = float(ms)
+    return budget, budgets
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Воспроизведение записи действий ведущего с проверкой состояния")
+    parser.add_argument("log", help="запись действий (--record-actions в si_game.py)")
+    parser.add_argument("--pack", help="пакет вопросов, если он лежит не там, где при записи")
+    parser.add_argument("--realtime", action="store_true",
+                        help="с паузами, как при записи; по умолчанию – на виртуальных часах, без ожидания")
+    parser.add_argument("--budget", action="append", metavar="[ACTION=]MS",
+                        help=f"бюджет задержки обновления окон после действия, мс (по умолчанию {DEFAULT_BUDGET_MS:g}); "
+                             "можно несколько раз, в том числе для отдельных действий")
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    from theme import apply_theme
+    apply_theme(app)
+    budget, budgets = parse_budgets(args.budget)
+    replayer = SessionReplayer(args.log, args.pack, args.realtime, budget, budgets)
+    started = time.perf_counter()
+    report = replayer.run()
+    replayer.close()
+    for line in report.lines():
+        print(line)
+    print(f"Воспроизведение: {time.perf_counter() - started:.2f} с")
+    sys.exit(0 if report.ok else 1)
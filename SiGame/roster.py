@@ -0,0 +1,200 @@
+# Списки игроков и итоги игр в файлах: .csv, .jsonl (объект на строку) или .json (массив объектов).
+# Все файлы читаются и пишутся построчно: итоги лиги из тысяч команд и сотен игр дописываются
+# в конец одного файла и сводятся в таблицу без загрузки всего файла в память.
+#   список игроков: player,score          (score можно не указывать)
+#   итоги игр:      game,player,score,place
+# Сводная таблица лиги: python roster.py итоги.csv [ещё файлы] --output лига.csv --top 20
+import argparse
+import csv
+import heapq
+import json
+import os
+import sys
+import time
+
+CHUNK = 1 << 16  # сколько символов JSON-массива читается за раз
+ROSTER_FIELDS = ["player", "score"]
+RESULT_FIELDS = ["game", "player", "score", "place"]
+LEAGUE_FIELDS = ["place", "player", "games", "total", "best", "wins", "average"]
+JSON_SEPARATORS = " \t\r\n,"
+
+
+def file_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if ext == ".json":
+        return "json"
+    raise ValueError(f"Неизвестный формат файла {path}: нужен .csv, .jsonl или .json")
+
+
+def iter_json_array(f):
+    # Элементы JSON-массива по одному: файл читается кусками по CHUNK, в памяти – только текущий кусок
+    decoder = json.JSONDecoder()
+    buffer, pos, eof, opened = "", 0, False, False
+    while True:
+        while pos < len(buffer) and buffer[pos] in JSON_SEPARATORS:
+            pos += 1
+        if pos < len(buffer):
+            if not opened:
+                if buffer[pos] != "[":
+                    raise ValueError("Ожидался JSON-массив")
+                opened = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                end = None  # элемент ещё не дочитан
+            # Элемент, упёршийся в конец куска, мог оборваться (число) – сначала дочитываем
+            if end is not None and (end < len(buffer) or eof):
+                yield item
+                pos = end
+                continue
+        if eof:
+            raise ValueError("JSON-массив оборван")
+        chunk = f.read(CHUNK)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+def read_rows(path):
+    fmt = file_format(path)
+    # utf-8-sig – CSV, сохранённые из Excel, начинаются с BOM
+    with open(path, encoding="utf-8-sig", newline="" if fmt == "csv" else None) as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        elif fmt == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(f)
+
+
+def write_rows(path, fields, rows, append=False):
+    # append=True дописывает в конец (заголовок CSV – только в новый файл) и сбрасывает данные на диск
+    fmt = file_format(path)
+    if append and fmt == "json":
+        raise ValueError(f"Дописывать можно только в .csv или .jsonl: {path}")
+    fresh = not (append and os.path.exists(path) and os.path.getsize(path))
+    count = 0
+    with open(path, "a" if append else "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fields, extrasaction="ignore")
+            if fresh:
+                writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            if fmt == "json":
+                f.write("[")
+            for row in rows:
+                line = json.dumps({field: row.get(field) for field in fields}, ensure_ascii=False)
+                if fmt == "json":
+                    f.write(",\n" if count else "\n")
+                    f.write(line)
+                else:
+                    f.write(line + "\n")
+                count += 1
+            if fmt == "json":
+                f.write("\n]\n")
+        if append:
+            f.flush()
+            os.fsync(f.fileno())
+    return count
+
+
+def parse_score(value):
+    # Пустой счёт – None: новый игрок начнёт с нуля, у уже играющего счёт останется прежним
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def read_roster(path):
+    # Пары (игрок, счёт или None) – в виде, который принимает GameController.apply_roster
+    for row in read_rows(path):
+        name = str(row.get("player") or "").strip()
+        if name:
+            yield name, parse_score(row.get("score"))
+
+
+def write_roster(path, players):
+    return write_rows(path, ROSTER_FIELDS, ({"player": name, "score": score} for name, score in players.items()))
+
+
+def game_results(game, players):
+    # Строки итогов одной игры по убыванию очков; у равных по очкам одно место, как в таблице результатов
+    place, previous = 0, None
+    for position, (name, score) in enumerate(sorted(players.items(), key=lambda item: -item[1]), 1):
+        if score != previous:
+            place, previous = position, score
+        yield {"game": game, "player": name, "score": score, "place": place}
+
+
+def append_results(path, game, players):
+    return write_rows(path, RESULT_FIELDS, game_results(game, players), append=True)
+
+
+# Сводка итогов по игрокам за один проход: в памяти по записи на игрока, а не все строки файлов.
+# Победа – первое место в игре (столбец place, его пишет append_results)
+class League:
+    def __init__(self):
+        self.players = {}  # игрок -> [игр, сумма очков, лучший счёт, побед]
+        self.rows = 0
+
+    def add(self, row):
+        name = str(row.get("player") or "").strip()
+        score = parse_score(row.get("score"))
+        if not name or score is None:
+            return
+        self.rows += 1
+        entry = self.players.get(name)
+        if entry is None:
+            entry = self.players[name] = [0, 0, score, 0]
+        entry[0] += 1
+        entry[1] += score
+        entry[2] = max(entry[2], score)
+        if str(row.get("place")) == "1":
+            entry[3] += 1
+
+    def add_file(self, path):
+        for row in read_rows(path):
+            self.add(row)
+
+    def standings(self, top=None):
+        # По сумме очков, затем по победам; top – только первые строки (частичная сортировка кучей)
+        order = lambda item: (-item[1][1], -item[1][3], item[0])
+        items = heapq.nsmallest(top, self.players.items(), key=order) if top else sorted(self.players.items(), key=order)
+        place, previous = 0, None
+        for position, (name, (games, total, best, wins)) in enumerate(items, 1):
+            if total != previous:
+                place, previous = position, total
+            yield {"place": place, "player": name, "games": games, "total": total, "best": best,
+                   "wins": wins, "average": round(total / games, 1)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Сводная таблица лиги по итогам игр")
+    parser.add_argument("results", nargs="+", help="файлы итогов (.csv, .jsonl или .json)")
+    parser.add_argument("--output", help="сохранить всю таблицу в файл (.csv, .jsonl или .json)")
+    parser.add_argument("--top", type=int, default=20, help="сколько строк показать")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    league = League()
+    for path in args.results:
+        league.add_file(path)
+    for row in league.standings(args.top):
+        print(f"{row['place']:>5}  {row['player']:<30} {row['total']:>8}  игр {row['games']:>4}  побед {row['wins']:>4}")
+    if args.output:
+        write_rows(args.output, LEAGUE_FIELDS, league.standings())
+    print(f"Строк итогов: {league.rows}, игроков: {len(league.players)}, {time.perf_counter() - started:.2f} с")
+    sys.exit(0 if league.players else 1)
@@ -0,0 +1,194 @@
+import math
+
+from PyQt6.QtCore import QEasingCurve, QRectF, Qt, QVariantAnimation
+from PyQt6.QtGui import QColor, QFont, QFontMetricsF, QPainter, QPalette, QPen, QPixmap, QPixmapCache, QTransform
+from PyQt6.QtWidgets import QFrame, QGraphicsItem, QGraphicsScene, QGraphicsSimpleTextItem, QGraphicsView
+
+CELL_W, CELL_H, GAP = 140, 80, 12  # размеры ячейки в единицах сцены; на экран сцена вписывается целиком
+FLIP_MS = 450
+USED_COLOR = QColor("#b9d1f8")  # как у сыгранной ячейки в theme.APP_QSS
+
+
+# Картинка лицевой стороны ячейки нужного размера в пикселях экрана. Хранится в общем QPixmapCache:
+# одинаковые ячейки (все "300" доски) рисуются один раз, а при смене масштаба – один раз на размер
+def cell_face(text, used, width, height, palette):
+    fill = palette.color(QPalette.ColorRole.Highlight)
+    key = f"sicell:{text}:{int(used)}:{width}x{height}:{fill.rgba():x}"
+    pixmap = QPixmapCache.find(key)
+    if pixmap is None:
+        pixmap = QPixmap(width, height)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rect = QRectF(0, 0, width, height).adjusted(1.5, 1.5, -1.5, -1.5)
+        radius = height * 0.12
+        if used:
+            painter.setPen(QPen(USED_COLOR, max(1.0, height / 40)))
+            painter.drawRoundedRect(rect, radius, radius)
+            painter.setPen(USED_COLOR)
+        else:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(fill)
+            painter.drawRoundedRect(rect, radius, radius)
+            painter.setPen(palette.color(QPalette.ColorRole.HighlightedText))
+        font = QFont()
+        font.setPixelSize(max(1, int(height * 0.4)))
+        font.setBold(True)
+        painter.setFont(font)
+        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, text)
+        painter.end()
+        QPixmapCache.insert(key, pixmap)
+    return pixmap
+
+
+# Ячейка доски. Сыгранность переключается переворотом: ячейка сжимается по ширине до ребра,
+# меняет сторону и раскрывается обратно. Перерисовывается только её собственный прямоугольник
+class CellItem(QGraphicsItem):
+    def __init__(self, text, used):
+        super().__init__()
+        self.text = text
+        self.face_used = used  # сторона, которая сейчас видна
+        self.setEnabled(not used)
+        self.animation = None
+
+    def boundingRect(self):
+        return QRectF(0, 0, CELL_W, CELL_H)
+
+    def paint(self, painter, option, widget=None):
+        # Масштаб по высоте не меняется при перевороте – по нему выбирается размер картинки
+        scale = abs(painter.worldTransform().m22())
+        width, height = max(1, math.ceil(CELL_W * scale)), max(1, math.ceil(CELL_H * scale))
+        painter.drawPixmap(self.boundingRect(), cell_face(self.text, self.face_used, width, height,
+                                                           widget.palette() if widget else QPalette()),
+                           QRectF(0, 0, width, height))
+
+    def set_used(self, used, animate=True):
+        self.setEnabled(not used)
+        if self.face_used == used and self.animation is None:
+            return
+        if self.animation is not None:
+            self.animation.stop()
+            self.animation = None
+        if not animate or self.scene() is None or not self.scene().views():
+            self.face_used = used
+            self.setTransform(QTransform())
+            self.update()
+            return
+        self.animation = QVariantAnimation()
+        self.animation.setDuration(FLIP_MS)
+        self.animation.setStartValue(0.0)
+        self.animation.setEndValue(1.0)
+        self.animation.setEasingCurve(QEasingCurve.Type.InOutSine)
+        self.animation.valueChanged.connect(lambda t, u=used: self.flip_step(t, u))
+        self.animation.finished.connect(self.flip_done)
+        self.animation.start()
+
+    def flip_step(self, t, used):
+        # Первая половина – старая сторона сжимается, вторая – новая раскрывается
+        if t >= 0.5:
+            self.face_used = used
+        scale = max(0.01, abs(math.cos(math.pi * t)))
+        self.setTransform(QTransform().translate(CELL_W / 2, 0).scale(scale, 1).translate(-CELL_W / 2, 0))
+
+    def flip_done(self):
+        self.setTransform(QTransform())
+        self.animation = None
+
+
+# Доска окна игроков на одной QGraphicsScene вместо кнопок в раскладках: сцена раунда строится
+# один раз, при изменении размера окна меняется только масштаб вида, а смена сыгранности
+# перерисовывает одну ячейку. Вопрос обычно отмечается сыгранным, пока игроки видят его страницу, –
+# такие ячейки переворачиваются, когда доска снова появляется на экране.
+# Работает на программной растеризации (без OpenGL)
+class SceneBoardWidget(QGraphicsView):
+    def __init__(self, controller, topic_width, topic_suffix=""):
+        super().__init__()
+        self.controller = controller
+        self.topic_width = topic_width
+        self.topic_suffix = topic_suffix
+        self.cells = {}        # (раунд, тема, индекс) -> CellItem
+        self.round_cells = {}  # раунд -> список ключей ячеек этого раунда
+        self.scenes = {}       # раунд -> QGraphicsScene
+        self.setFrameShape(QFrame.Shape.NoFrame)
+        self.setRenderHints(QPainter.RenderHint.Antialiasing | QPainter.RenderHint.SmoothPixmapTransform)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate)
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontSavePainterState)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setInteractive(False)
+        self.setStyleSheet("background: transparent; border: none;")
+        self.sync()
+        self.controller.question_used.connect(self.mark_used)
+        self.controller.round_changed.connect(self.sync)
+
+    def build_round(self, round_name):
+        scene = QGraphicsScene(self)
+        scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)  # элементы не двигаются
+        font = QFont()
+        font.setPixelSize(int(CELL_H * 0.3))
+        metrics = QFontMetricsF(font)
+        self.ensurePolished()  # цвет текста приходит из таблицы стилей темы
+        color = self.palette().color(QPalette.ColorRole.WindowText)
+        keys = []
+        y = 0
+        for topic, questions in self.controller.rounds[round_name].items():
+            label = QGraphicsSimpleTextItem(
+                metrics.elidedText(f"{topic}{self.topic_suffix}", Qt.TextElideMode.ElideRight, self.topic_width - GAP)
+            )
+            label.setFont(font)
+            label.setBrush(color)
+            label.setPos(0, y + (CELL_H - metrics.height()) / 2)
+            scene.addItem(label)
+            for i, q in enumerate(questions):
+                cell = CellItem(f"{q['value']}", self.controller.is_question_used(round_name, topic, i))
+                cell.setPos(self.topic_width + i * (CELL_W + GAP), y)
+                scene.addItem(cell)
+                self.cells[(round_name, topic, i)] = cell
+                keys.append((round_name, topic, i))
+            y += CELL_H + GAP
+        scene.setSceneRect(scene.itemsBoundingRect().adjusted(-GAP, -GAP, GAP, GAP))
+        self.scenes[round_name] = scene
+        self.round_cells[round_name] = keys
+
+    def sync(self):
+        round_name = self.controller.current_round
+        if round_name not in self.scenes:
+            self.build_round(round_name)
+        if self.scene() is not self.scenes[round_name]:
+            self.setScene(self.scenes[round_name])
+            self.fit()
+        for key in self.round_cells[round_name]:
+            used = self.controller.is_question_used(*key)
+            cell = self.cells[key]
+            if cell.isEnabled() == used:
+                cell.setEnabled(not used)
+        if self.isVisible():
+            self.reveal()
+
+    def reveal(self):
+        # Переворот ячеек текущего раунда, у которых видна уже не та сторона
+        for key in self.round_cells.get(self.controller.current_round, ()):
+            cell = self.cells[key]
+            if cell.face_used == cell.isEnabled():
+                cell.set_used(not cell.isEnabled())
+
+    def mark_used(self, round_name, topic, q_index, used):
+        cell = self.cells.get((round_name, topic, q_index))
+        if cell is None:
+            return
+        if self.isVisible() and round_name == self.controller.current_round:
+            cell.set_used(used)
+        else:
+            cell.setEnabled(not used)  # сторона сменится при следующем показе доски
+
+    def fit(self):
+        if self.scene() is not None:
+            self.fitInView(self.scene().sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.fit()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.reveal()
@@ -0,0 +1,115 @@
+import heapq
+import itertools
+import time
+
+from PyQt6.QtCore import QObject, Qt, QTimer
+
+
+# Обычные часы игры: монотонное время, не зависящее от перевода системных часов
+class MonotonicClock:
+    def now(self):
+        return time.monotonic()
+
+
+# Виртуальные часы: время идёт только по advance() планировщика, поэтому вся игра
+# с задержками показа ответа и отсчётами проигрывается мгновенно
+class VirtualClock:
+    def __init__(self, start=0.0):
+        self.time = start
+
+    def now(self):
+        return self.time
+
+
+# Планировщик фаз игры: отложенный показ ответа, возврат к доске, отсчёт времени на ответ,
+# автопереход к следующему раунду. У каждой задачи есть ключ: новая задача с тем же ключом
+# заменяет прежнюю, поэтому повторные нажатия ведущего не копят устаревшие вызовы,
+# а при смене вопроса все его задачи снимаются одним cancel.
+# С обычными часами задачи запускает один QTimer, взведённый на ближайший срок
+class GameScheduler(QObject):
+    def __init__(self, clock=None):
+        super().__init__()
+        self.clock = clock or MonotonicClock()
+        self.queue = []   # куча [срок, номер, ключ, функция]; снятые задачи остаются в куче с функцией None
+        self.tasks = {}   # ключ -> элемент кучи
+        self.order = itertools.count()
+        self.running = False  # выполняется задача планировщика, а не действие ведущего
+        self.timer = None
+        if not isinstance(self.clock, VirtualClock):
+            self.timer = QTimer(self)
+            self.timer.setSingleShot(True)
+            self.timer.setTimerType(Qt.TimerType.PreciseTimer)
+            self.timer.timeout.connect(self.run_due)
+
+    def now(self):
+        return self.clock.now()
+
+    def schedule(self, key, delay, callback):
+        self.cancel(key)
+        entry = [self.now() + delay, next(self.order), key, callback]
+        self.tasks[key] = entry
+        heapq.heappush(self.queue, entry)
+        self.rearm()
+
+    def cancel(self, *keys):
+        for key in keys:
+            entry = self.tasks.pop(key, None)
+            if entry is not None:
+                entry[3] = None
+        self.rearm()
+
+    def cancel_all(self):
+        self.cancel(*list(self.tasks))
+
+    def pending(self, key):
+        return key in self.tasks
+
+    def remaining(self, key):
+        entry = self.tasks.get(key)
+        return max(0.0, entry[0] - self.now()) if entry is not None else None
+
+    def pop_due(self, until):
+        # Снимает из кучи ближайшую задачу со сроком не позже until
+        while self.queue and self.queue[0][3] is None:
+            heapq.heappop(self.queue)
+        if not self.queue or self.queue[0][0] > until:
+            return None
+        entry = heapq.heappop(self.queue)
+        del self.tasks[entry[2]]
+        return entry
+
+    def run(self, entry):
+        self.running = True
+        try:
+            entry[3]()
+        finally:
+            self.running = False
+
+    def run_due(self):
+        while (entry := self.pop_due(self.now())) is not None:
+            self.run(entry)
+        self.rearm()
+
+    def advance(self, seconds):
+        # Только для виртуальных часов: сдвигает время, выполняя задачи по порядку сроков
+        target = self.clock.time + seconds
+        while (entry := self.pop_due(target)) is not None:
+            self.clock.time = max(self.clock.time, entry[0])
+            self.run(entry)
+        self.clock.time = target
+
+    def run_until_idle(self, limit=3600):
+        # Проматывает виртуальное время, пока не кончатся задачи (но не дальше limit секунд)
+        start = self.clock.time
+        while self.tasks and self.clock.time - start < limit:
+            self.advance(max(0.0, min(entry[0] for entry in self.tasks.values()) - self.clock.time))
+
+    def rearm(self):
+        if self.timer is None:
+            return
+        while self.queue and self.queue[0][3] is None:
+            heapq.heappop(self.queue)
+        if self.queue:
+            self.timer.start(max(0, round((self.queue[0][0] - self.now()) * 1000)))
+        else:
+            self.timer.stop()
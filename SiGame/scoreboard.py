@@ -0,0 +1,150 @@
+import time
+from bisect import bisect_left, bisect_right, insort
+from itertools import count
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, QTimer
+from PyQt6.QtGui import QColor
+
+COLUMNS = ["Место", "Игрок", "Очки"]
+RANK, NAME, SCORE = range(3)
+FLASH_MS = 1500  # сколько подсвечивается строка игрока, сменившего место
+FLASH_UP = QColor(46, 125, 50, 120)
+FLASH_DOWN = QColor(198, 40, 40, 120)
+
+
+# Таблица результатов. Строки всегда отсортированы по убыванию очков (при равенстве – по порядку
+# добавления): изменение счёта переставляет одну строку двоичным поиском, а не пересортировывает всех.
+# Место считается как в спорте – у равных по очкам одно место
+class ScoreboardModel(QAbstractTableModel):
+    def __init__(self, controller):
+        super().__init__()
+        self.controller = controller
+        self.order = count()
+        self.rows = []   # отсортированные ключи (-очки, порядок добавления, имя)
+        self.keys = {}   # имя -> ключ
+        self.flash = {}  # имя -> (цвет подсветки, когда погасить)
+        # Один таймер на все подсветки, а не по таймеру на каждую перестановку
+        self.flash_timer = QTimer(self)
+        self.flash_timer.setInterval(FLASH_MS // 6)
+        self.flash_timer.timeout.connect(self.end_flashes)
+        for name, score in controller.players.items():
+            key = (-score, next(self.order), name)
+            self.keys[name] = key
+            insort(self.rows, key)
+        controller.player_added.connect(self.on_player_added)
+        controller.player_removed.connect(self.on_player_removed)
+        controller.score_changed.connect(self.on_score_changed)
+        controller.roster_changed.connect(self.on_roster_changed)
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        neg_score, _, name = self.rows[index.row()]
+        # EditRole читает редактируемый список выбора игрока ведущего
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if index.column() == RANK:
+                return bisect_left(self.rows, (neg_score,)) + 1
+            return name if index.column() == NAME else -neg_score
+        if role == Qt.ItemDataRole.BackgroundRole:
+            flash = self.flash.get(name)
+            return flash[0] if flash else None
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() != NAME:
+            return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    # --- Изменения состава и счёта ---
+
+    def row_of(self, name):
+        return bisect_left(self.rows, self.keys[name])
+
+    def ranks_changed(self, low, high):
+        # Места могут измениться только у игроков с очками между старым и новым значением
+        first = bisect_left(self.rows, (-high,))
+        last = bisect_right(self.rows, (-low, float("inf"))) - 1
+        if first <= last:
+            self.dataChanged.emit(self.index(first, RANK), self.index(last, RANK))
+
+    def on_player_added(self, name):
+        key = (-self.controller.players[name], next(self.order), name)
+        row = bisect_left(self.rows, key)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.rows.insert(row, key)
+        self.keys[name] = key
+        self.endInsertRows()
+        self.ranks_changed(float("-inf"), -key[0])
+
+    def on_player_removed(self, name):
+        key = self.keys.pop(name, None)
+        if key is None:
+            return
+        row = bisect_left(self.rows, key)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.rows[row]
+        self.endRemoveRows()
+        self.flash.pop(name, None)
+        self.ranks_changed(float("-inf"), -key[0])
+
+    def on_score_changed(self, name, score):
+        old_key = self.keys.get(name)
+        if old_key is None or -old_key[0] == score:
+            return
+        key = (-score, old_key[1], name)
+        old_row = bisect_left(self.rows, old_key)
+        del self.rows[old_row]
+        row = bisect_left(self.rows, key)
+        self.rows.insert(old_row, old_key)  # строка переезжает внутри begin/endMoveRows
+        if row != old_row:
+            # Позиция назначения задаётся в нумерации до перемещения
+            self.beginMoveRows(QModelIndex(), old_row, old_row, QModelIndex(), row + 1 if row > old_row else row)
+            del self.rows[old_row]
+            self.rows.insert(row, key)
+            self.keys[name] = key
+            self.endMoveRows()
+            self.start_flash(name, FLASH_UP if row < old_row else FLASH_DOWN)
+        else:
+            self.rows[row] = key
+            self.keys[name] = key
+            self.dataChanged.emit(self.index(row, SCORE), self.index(row, SCORE))
+        self.ranks_changed(min(score, -old_key[0]), max(score, -old_key[0]))
+
+    def on_roster_changed(self, changes):
+        # Пакет изменений (загрузка списка, откат) – таблица пересобирается одной сортировкой,
+        # а не по строке на игрока; порядок добавления у оставшихся игроков сохраняется
+        self.beginResetModel()
+        for name, (_, score) in changes.items():
+            key = self.keys.pop(name, None)
+            if score is None:
+                self.flash.pop(name, None)
+            else:
+                self.keys[name] = (-score, key[1] if key else next(self.order), name)
+        self.rows = sorted(self.keys.values())
+        self.endResetModel()
+
+    def start_flash(self, name, color):
+        self.flash[name] = (color, time.monotonic() + FLASH_MS / 1000)
+        row = self.row_of(name)
+        self.dataChanged.emit(self.index(row, RANK), self.index(row, SCORE))
+        if not self.flash_timer.isActive():
+            self.flash_timer.start()
+
+    def end_flashes(self):
+        now = time.monotonic()
+        for name in [name for name, (_, until) in self.flash.items() if until <= now]:
+            del self.flash[name]
+            row = self.row_of(name)
+            self.dataChanged.emit(self.index(row, RANK), self.index(row, SCORE), [Qt.ItemDataRole.BackgroundRole])
+        if not self.flash:
+            self.flash_timer.stop()
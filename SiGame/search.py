@@ -0,0 +1,92 @@
+import os
+import pickle
+import re
+from array import array
+from bisect import bisect_left
+
+INDEX_VERSION = 1
+WORD_RE = re.compile(r"\w+")
+
+
+# Приведение текста к виду для поиска: регистр не важен, ё не отличается от е
+def normalize(text):
+    return text.casefold().replace("ё", "е")
+
+
+def tokenize(text):
+    return WORD_RE.findall(normalize(text))
+
+
+# Обратный индекс пакета: слово -> отсортированные номера вопросов, в которых оно встречается
+# в тексте вопроса, ответе или названии темы. Слова хранятся отсортированными, поэтому запрос
+# по началу слова ("кош" найдёт и "кошка", и "кошке") – это двоичный поиск и проход по соседям
+class SearchIndex:
+    def __init__(self, docs, terms, postings):
+        self.docs = docs          # номер вопроса -> (раунд, тема, индекс)
+        self.terms = terms        # отсортированные слова
+        self.postings = postings  # array("I") номеров вопросов на каждое слово
+
+    @classmethod
+    def build(cls, rounds):
+        docs = []
+        words = {}
+        for round_name, topics in rounds.items():
+            for topic, questions in topics.items():
+                topic_words = set(tokenize(topic))
+                for i, q in enumerate(questions):
+                    doc = len(docs)
+                    docs.append((round_name, topic, i))
+                    for word in topic_words.union(tokenize(q["question"]), tokenize(q["answer"])):
+                        words.setdefault(word, array("I")).append(doc)
+        terms = sorted(words)
+        return cls(docs, terms, [words[term] for term in terms])
+
+    def matching(self, prefix):
+        docs = set()
+        pos = bisect_left(self.terms, prefix)
+        while pos < len(self.terms) and self.terms[pos].startswith(prefix):
+            docs.update(self.postings[pos])
+            pos += 1
+        return docs
+
+    def search(self, query, limit=50):
+        # Все слова запроса должны встретиться (каждое – как начало слова); порядок – как в пакете
+        words = tokenize(query)
+        if not words:
+            return []
+        found = None
+        for word in sorted(set(words), key=len, reverse=True):  # длинные слова отсекают больше
+            docs = self.matching(word)
+            found = docs if found is None else found & docs
+            if not found:
+                return []
+        return [self.docs[doc] for doc in sorted(found)[:limit]]
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((INDEX_VERSION, self.docs, self.terms, self.postings), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            version, docs, terms, postings = pickle.load(f)
+        if version != INDEX_VERSION:
+            raise ValueError(f"Устаревшая версия индекса: {version}")
+        return cls(docs, terms, postings)
+
+
+# Индекс строится один раз на пакет и лежит рядом с его кэшем: имя кэша содержит хэш пакета,
+# поэтому изменённый пакет получает новый индекс сам собой
+def load_index(pack):
+    cache_path = getattr(pack, "cache_path", None)
+    if cache_path is None:
+        return SearchIndex.build(pack)
+    path = f"{os.path.splitext(cache_path)[0]}.index{INDEX_VERSION}"
+    try:
+        return SearchIndex.load(path)
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+        index = SearchIndex.build(pack)
+        index.save(path)
+        return index
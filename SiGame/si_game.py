@@ -1,206 +1,518 @@
+import time
+
+STARTED = time.perf_counter()  # до остальных импортов, чтобы отчёт о запуске учёл и их
+
+import argparse
+import os
 import sys
+from array import array
+from collections.abc import MutableMapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QPushButton, QVBoxLayout, QHBoxLayout,
-    QLineEdit, QLabel, QComboBox, QMessageBox, QStackedWidget, QScrollArea
+    QLineEdit, QLabel, QComboBox, QMessageBox, QStackedWidget, QScrollArea, QTableView, QHeaderView,
+    QTabWidget, QListWidget, QListWidgetItem, QFileDialog
 )
-from PyQt6.QtCore import pyqtSignal, QObject, QTimer, Qt
-from qt_material import apply_stylesheet
+from PyQt6.QtCore import pyqtSignal, QObject, QSize, Qt, QTimer
+from PyQt6.QtGui import QGuiApplication, QKeySequence, QShortcut
+
+from journal import GameJournal
+from media import MediaView, shared_loader
+from pack_loader import load_pack
+from scheduler import GameScheduler
+from presenter import Presenter, ScreenDialog
+from roster import append_results, read_roster, write_roster
+from scoreboard import NAME, ScoreboardModel
+from search import load_index
+from startup import StartupReport
+from textlayout import FitTextWidget, shared_renderer
+from theme import apply_theme
+
+if TYPE_CHECKING:
+    # Нужны только для аннотаций GameSession: сами модули грузятся, лишь когда включены их режимы
+    from buzzer_server import BuzzerServer
+    from recorder import FrameRecorder
+    from replay import ActionRecorder
+
+
+# Запись о вопросе в каталоге раунда. Неизменяема: одна запись разделяется всеми играми
+# и сама передаётся в состоянии вместо копий текста вопроса
+@dataclass(slots=True, frozen=True)
+class QuestionRecord:
+    topic: str
+    index: int
+    question: str
+    answer: str
+    value: int
+    cat_in_bag: bool
+    media: tuple  # пары (тип, ссылка) медиафайлов вопроса
+
+
+# Неизменяемая часть раунда: записи по позициям и исходные флаги "использован" из пакета
+# в виде битовой маски. Строится один раз и разделяется всеми играми, запущенными на этом пакете
+class RoundCatalog:
+    __slots__ = ("records", "positions", "used")
+
+    def __init__(self, topics):
+        records = []
+        self.positions = {}  # (тема, индекс) -> позиция записи
+        self.used = 0
+        for topic, q_list in topics.items():
+            topic = sys.intern(topic)  # имя темы повторяется в каждой записи и ключе
+            for i, q in enumerate(q_list):
+                self.positions[(topic, i)] = len(records)
+                if q.get("used", False):
+                    self.used |= 1 << len(records)
+                records.append(QuestionRecord(
+                    topic, i, q["question"], q["answer"], q["value"], q.get("cat_in_bag", False),
+                    tuple(tuple(m) for m in q.get("media", ()))
+                ))
+        self.records = tuple(records)
+
+
+# Каталоги раундов, которые строятся при первом обращении к раунду
+class RoundCatalogs(dict):
+    def __init__(self, rounds):
+        super().__init__()
+        self.rounds = rounds
+
+    def __missing__(self, round_name):
+        catalog = self[round_name] = RoundCatalog(self.rounds[round_name])
+        return catalog
+
+
+# Индекс вопросов раунда одной игры: общий каталог и своя битовая маска использованных вопросов.
+# Маска – неизменяемое целое, поэтому её снимок ничего не копирует, а сброс – это просто маска каталога
+class RoundIndex:
+    __slots__ = ("records", "positions", "used")
+
+    def __init__(self, catalog):
+        self.records = catalog.records
+        self.positions = catalog.positions
+        self.used = catalog.used
+
+    @property
+    def remaining(self):
+        return len(self.records) - self.used.bit_count()
+
+    def position(self, topic, q_index):
+        return self.positions.get((topic, q_index))
+
+    def is_used(self, pos):
+        return bool(self.used >> pos & 1)
+
+    def set_used(self, pos, used):
+        # Возвращает True, если флаг действительно изменился
+        if self.is_used(pos) == used:
+            return False
+        self.used ^= 1 << pos
+        return True
+
+    def load_used(self, used):
+        # Восстановление маски из снимка
+        self.used = used
+
+
+# Индексы раундов одной игры, которые строятся при первом обращении к раунду
+class RoundIndexes(dict):
+    def __init__(self, catalogs):
+        super().__init__()
+        self.catalogs = catalogs
+
+    def __missing__(self, round_name):
+        round_index = self[round_name] = RoundIndex(self.catalogs[round_name])
+        return round_index
+
+
+# Очки игроков: у каждого игрока слот в плоском массиве. Снаружи – обычное отображение имя -> очки,
+# снимок массива – одно копирование байтов
+class PlayerScores(MutableMapping):
+    def __init__(self):
+        self.slots = {}   # имя -> слот, в порядке добавления
+        self.names = []   # слот -> имя, None у удалённых
+        self.scores = array("q")
+
+    def __getitem__(self, name):
+        return self.scores[self.slots[name]]
+
+    def __setitem__(self, name, score):
+        slot = self.slots.get(name)
+        if slot is None:
+            self.slots[name] = len(self.names)
+            self.names.append(name)
+            self.scores.append(score)
+        else:
+            self.scores[slot] = score
+
+    def __delitem__(self, name):
+        slot = self.slots.pop(name)
+        self.names[slot] = None
+        self.scores[slot] = 0
+
+    def __iter__(self):
+        return iter(self.slots)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+# Снимок прогресса игры: маски использованных вопросов по раундам и очки игроков
+@dataclass(slots=True, frozen=True)
+class ProgressSnapshot:
+    used: tuple    # пары (раунд, маска)
+    names: tuple   # имена игроков по слотам
+    scores: bytes  # массив очков по слотам
+
+    def player_scores(self):
+        scores = array("q")
+        scores.frombytes(self.scores)
+        return {name: score for name, score in zip(self.names, scores) if name is not None}
+
+
+# Изменяемый прогресс игры отдельно от неизменяемого каталога вопросов
+class GameProgress:
+    def __init__(self, catalogs):
+        self.catalogs = catalogs
+        self.index = RoundIndexes(catalogs)
+        self.players = PlayerScores()
+
+    def snapshot(self):
+        return ProgressSnapshot(
+            tuple((round_name, index.used) for round_name, index in self.index.items()),
+            tuple(self.players.names),
+            self.players.scores.tobytes(),
+        )
+
+    def initial(self):
+        # Прогресс новой игры с теми же игроками: маски каталога и нулевые очки
+        return ProgressSnapshot((), tuple(self.players.names), bytes(len(self.players.scores.tobytes())))
+
+    def diff(self, old, new):
+        # Изменённые вопросы [(раунд, позиция, использован)] и очки {игрок: (было, стало)};
+        # None вместо очков – игрока нет в этом снимке. Вопросы сравниваются по маскам целиком
+        old_used, new_used = dict(old.used), dict(new.used)
+        cells = []
+        for round_name in old_used.keys() | new_used.keys():
+            initial = self.catalogs[round_name].used
+            before = old_used.get(round_name, initial)
+            after = new_used.get(round_name, initial)
+            changed = before ^ after
+            while changed:
+                low = changed & -changed
+                pos = low.bit_length() - 1
+                cells.append((round_name, pos, bool(after & low)))
+                changed ^= low
+        old_scores, new_scores = old.player_scores(), new.player_scores()
+        scores = {
+            name: (old_scores.get(name), new_scores.get(name))
+            for name in old_scores.keys() | new_scores.keys()
+            if old_scores.get(name) != new_scores.get(name)
+        }
+        return cells, scores
+
+
+REVEAL_DELAY = 3.0   # секунд до показа ответа "Кота в мешке" и до возврата к доске
+ANSWER_TIME = 10     # секунд на ответ в отсчёте, который запускает ведущий
+ROSTER_FILTER = "Списки игроков (*.csv *.jsonl *.ndjson *.json)"
 
 
 # Контроллер игры: хранит состояние текущего вопроса, раунда, темы, вопросы и игроков
 class GameController(QObject):
-    update_player_state = pyqtSignal(dict)  # сигнал для оповещения окон об изменениях
+    update_player_state = pyqtSignal(dict)  # состояние текущего вопроса и раунда
+    # Точечные сигналы: каждый несёт только изменившиеся поля
+    question_selected = pyqtSignal(str, int)   # тема, индекс вопроса
+    answer_marked = pyqtSignal(str, bool)      # игрок, правильный ли ответ
+    question_used = pyqtSignal(str, str, int, bool)  # раунд, тема, индекс вопроса, использован ли
+    score_changed = pyqtSignal(str, int)       # игрок, новый счёт
+    player_added = pyqtSignal(str)
+    player_removed = pyqtSignal(str)
+    roster_changed = pyqtSignal(dict)          # пакетное изменение состава: игрок -> (было, стало), None – нет игрока
+    round_changed = pyqtSignal(str)
+    countdown = pyqtSignal(int)                # секунд осталось на ответ; -1 – отсчёт остановлен
 
-    def __init__(self):
+    def __init__(self, pack=None, catalogs=None, scheduler=None):
         super().__init__()
         self.state = {
-            "current_topic": None,
-            "current_question": None,
-            "current_answer": None,
-            "current_value": None,
+            "record": None,         # QuestionRecord выбранного вопроса
             "show_answer": False,   # True, если показывается правильный ответ
             "incorrect": False,     # True, если был неправильный ответ
-            "cat_in_bag": False     # True, если вопрос является "Котом в мешке"
-        }
-        # Определяем раунды: первые два обычные, третий – финальный
-        # Для примера у одного из вопросов в Раунде 1 ставим флаг "cat_in_bag": True
-        self.rounds = {
-            "Раунд 1": {
-                "Кто самая-самая": [
-                    {"question": "Самая крошечная сказочная девочка?", "answer": "Дюймовочка", "value": 100, "used": False},
-                    {"question": "Самая новогодняя дама на свете", "answer": "Снегурочка", "value": 200, "used": False},
-                    {"question": "Самая квакающая дама на свете", "answer": "Царевна-лягушка", "value": 300, "used": False},
-                    {"question": "Самая лучшая дама на свете!", "answer": "Мама", "value": 400, "used": False},
-                    {"question": "Самая большая рёва на свете.", "answer": "Несмеяна", "value": 500, "used": False}
-                ],
-                "Мамины вещи": [
-                    {"question": "Эти шарики на нити\nВы примерить не хотите ль?\nНа любые ваши вкусы\nВ маминой шкатулке ...", "answer": "бусы", "value": 100, "used": False},
-                    {"question": "Всех лохматых расчесать,\nКудри в косы заплетать,\nДелать модную прическу\nПомогает нам ….", "answer": "расческа", "value": 200, "used": False},
-                    {"question": "В ушах блестят колечки,\nВ них камушки-сердечки,\nИ прочные застежки\nНа золотых ….", "answer": "сережках", "value": 300, "used": False, "cat_in_bag": True},
-                    {"question": "А у мамы под крылечко\nЗакатилось что?..", "answer": "колечко", "value": 400, "used": False},
-                    {"question": "Сладким запахом конфетки\nПахнет стол и табуретка.\nУронила из руки\nЯ французские ...", "answer": "духи", "value": 500, "used": False}
-                ],
-                "Пословицы, поговорки, крылатые выражения": [
-                    {"question": "Бабе дорога – от печи до……", "answer": "порога", "value": 100, "used": False},
-                    {"question": "Муж голова, а жена-…..", "answer": "шея", "value": 200, "used": False},
-                    {"question": "Для матери ребенок, до старости….","answer": "дитенок","value": 300,"used": False},
-                    {"question": "Бабы каются, а девки…..", "answer": "замуж собираются", "value": 400, "used": False},
-                    {"question": "Курица – птица, женщина-….", "answer": "орлица", "value": 500, "used": False, "cat_in_bag": True}
-                ],
-            },
-            "Раунд 2": {
-                "Ох эти преподы": [
-                    {"question": "Что Кулешова говорила про флешки?", "answer": "Там вирусы", "value": 200, "used": False},
-                    {"question": "Если бы он был уткой, то для него это было бы оскорбление", "answer": "Леонид Борисович", "value": 400, "used": False},
-                    {"question": "Сыграл в огромном количестве  многомиллионных фильмов", "answer": "Киселёв А. Ю. (Том Харди)", "value": 600, "used": False},
-                    {"question": "Этому преподавателю всегда нужна Интизар", "answer": "Гугняева Е.А.", "value": 800, "used": False},
-                    {"question": "Благодаря ему мы (не) знаем, что такое \"Modula 2\"", "answer": "Карнаух (DragLeo)", "value": 1000, "used": False},
-                ],
-                "Продолжи фразу": [
-                    {"question": "Благовещенск китайцы ...", "answer": "завидуйте", "value": 200, "used": False},
-                    {"question": "А почему ... больше мячей достаётся", "answer": "Интизар", "value": 400, "used": False},
-                    {"question": "Хех, ну ты ...", "answer": "даёшь/крут", "value": 600, "used": False},
-                    {"question": "что происходит после слов \"вот она вот она\"", "answer": "Черезсебяшечка", "value": 800, "used": False},
-                    {"question": "В тебе ноль ...", "answer": "мужского", "value": 1000, "used": False},
-                ],
-                "Наши любимые": [
-                    {"question": "Cамый высокий пацан в группе", "answer": "Денис", "value": 200, "used": False},
-                    {"question": "Кто первый перевелся на бюджет", "answer": "Андрей", "value": 400, "used": False, "cat_in_bag": True},
-                    {"question": "Кто знает больше всех языков программирования", "answer": "Слава", "value": 600, "used": False},
-                    {"question": "Стример, боксёр и просто приятный парень с интересными историями", "answer": "Тимоха", "value": 800, "used": False},
-                    {"question": "Кто славился своими ногами?", "answer": "Алекс", "value": 1000, "used": False},
-                ],
-            },
-            "Финальный раунд": {
-                "Угадайте о ком идёт речь": [
-                    {"question": "Они самые лучезарные, самые душевные, самые красивые, самые-самые", "answer": "Вы", "value": 2000, "used": False}
-                ]
-            }
         }
-        self.current_round = "Раунд 1"
-        self.players = {}  # ключ – имя игрока, значение – набранные очки
+        # Раунды берутся из пакета вопросов и распаковываются при первом обращении
+        self.rounds = pack if pack is not None else load_pack()
+        self.round_names = list(self.rounds)
+        self.current_round = self.round_names[0]
+        # Каталоги раундов можно передать общими для нескольких игр на одном пакете;
+        # прогресс – индексы вопросов по раундам и очки игроков (имя -> очки) – у каждой игры свой
+        self.catalogs = catalogs if catalogs is not None else RoundCatalogs(self.rounds)
+        self.progress = GameProgress(self.catalogs)
+        self.index = self.progress.index
+        self.players = self.progress.players
+        self.current = None  # (раунд, тема, индекс) выбранного вопроса
+        # Все отложенные действия игры идут через планировщик; с виртуальными часами – мгновенно
+        self.scheduler = scheduler if scheduler is not None else GameScheduler()
+        self.countdown_left = 0
+        self.auto_advance = None  # через сколько секунд после последнего вопроса раунда переходить к следующему
 
     def add_player(self, name):
         if name and name not in self.players:
             self.players[name] = 0
-            self.emit_state()
+            self.player_added.emit(name)
 
     def remove_player(self, name):
         if name in self.players:
             del self.players[name]
-            self.emit_state()
+            self.player_removed.emit(name)
+
+    def set_score(self, player, score):
+        if player in self.players and self.players[player] != score:
+            self.players[player] = score
+            self.score_changed.emit(player, score)
+
+    def apply_roster(self, roster, replace=False):
+        # Состав целиком за одну операцию: roster – имена или пары (имя, счёт). Новые игроки без счёта
+        # получают 0, у оставшихся счёт без указания не меняется; replace=True убирает не попавших в roster
+        listed = set()
+        changes = {}
+        for item in roster:
+            name, score = (item, None) if isinstance(item, str) else item
+            if not name:
+                continue
+            listed.add(name)
+            old = self.players.get(name)
+            new = score if score is not None else changes.get(name, (old, old))[1]
+            new = 0 if new is None else new
+            if old != new:
+                changes[name] = (old, new)
+            else:
+                changes.pop(name, None)  # повтор имени вернул исходный счёт
+        if replace:
+            for name, score in self.players.items():
+                if name not in listed:
+                    changes[name] = (score, None)
+        self.update_players(changes)
+        return changes
+
+    def update_players(self, changes):
+        # Применяет изменения вида игрок -> (было, стало) и сообщает о них одним сигналом roster_changed
+        for name, (old, new) in changes.items():
+            if new is None:
+                self.players.pop(name, None)
+            else:
+                self.players[name] = new
+        if changes:
+            self.roster_changed.emit(changes)
 
     def select_question(self, topic, q_index):
-        if topic in self.rounds[self.current_round] and len(self.rounds[self.current_round][topic]) > q_index:
-            q_data = self.rounds[self.current_round][topic][q_index]
-            if q_data.get("used", False):
+        round_index = self.index[self.current_round]
+        pos = round_index.position(topic, q_index)
+        if pos is not None:
+            if round_index.is_used(pos):
                 return
-            self.state["current_topic"] = topic
-            self.state["current_question"] = q_data["question"]
-            self.state["current_answer"] = q_data["answer"]
-            self.state["current_value"] = q_data["value"]
+            # Отложенные действия прошлого вопроса к новому не относятся
+            self.scheduler.cancel("reveal", "finish")
+            self.stop_countdown()
+            self.current = (self.current_round, topic, q_index)
+            self.state["record"] = round_index.records[pos]
             self.state["show_answer"] = False
             self.state["incorrect"] = False
-            self.state["cat_in_bag"] = q_data.get("cat_in_bag", False)
+            self.question_selected.emit(topic, q_index)
             self.emit_state()
 
     def mark_answer(self, player, correct: bool):
-        if player in self.players and self.state["current_question"]:
+        record = self.state["record"]
+        # На уже открытый ответ нажатия не действуют – повторный клик не начислит очки дважды
+        if player in self.players and record and not self.state["show_answer"]:
+            self.answer_marked.emit(player, correct)
             if correct:
-                self.players[player] += self.state.get("current_value", 0)
+                self.stop_countdown()
+                self.players[player] += record.value
+                self.score_changed.emit(player, self.players[player])
                 self.state["show_answer"] = True
                 self.state["incorrect"] = False
-                self.emit_state()
                 # Отмечаем вопрос как использованный
-                topic = self.state["current_topic"]
-                if topic:
-                    for q_data in self.rounds[self.current_round][topic]:
-                        if q_data["question"] == self.state["current_question"]:
-                            q_data["used"] = True
-                            break
+                if self.current:
+                    self.set_question_used(*self.current)
+                self.emit_state()
             else:
                 # Если вопрос "Кот в мешке"
-                if self.state.get("cat_in_bag", False):
+                if record.cat_in_bag:
                     self.state["incorrect"] = True
                     self.emit_state()
                     # Через 3 секунды показываем правильный ответ и отмечаем вопрос как использованный (без начисления баллов)
-                    QTimer.singleShot(3000, self.mark_cat_question_used)
+                    self.stop_countdown()
+                    self.scheduler.schedule("reveal", REVEAL_DELAY, self.mark_cat_question_used)
                 else:
                     self.state["incorrect"] = True
                     self.emit_state()
 
     def mark_cat_question_used(self):
         # Для "Кота в мешке" после неверного ответа – показываем правильный ответ и отмечаем вопрос как использованный
-        topic = self.state["current_topic"]
-        if topic:
-            for q_data in self.rounds[self.current_round][topic]:
-                if q_data["question"] == self.state["current_question"]:
-                    q_data["used"] = True
-                    break
+        if self.current:
+            self.set_question_used(*self.current)
         self.state["show_answer"] = True
         self.emit_state()
 
+    def start_countdown(self, seconds=ANSWER_TIME):
+        if self.state["record"] is None:
+            return
+        self.countdown_left = seconds
+        self.countdown.emit(seconds)
+        self.scheduler.schedule("countdown", 1.0, self.tick_countdown)
+
+    def tick_countdown(self):
+        self.countdown_left -= 1
+        self.countdown.emit(self.countdown_left)
+        if self.countdown_left > 0:
+            self.scheduler.schedule("countdown", 1.0, self.tick_countdown)
+
+    def stop_countdown(self):
+        if self.scheduler.pending("countdown") or self.countdown_left:
+            self.scheduler.cancel("countdown")
+            self.countdown_left = 0
+            self.countdown.emit(-1)
+
+    def set_question_used(self, round_name, topic, q_index, used=True):
+        round_index = self.index[round_name]
+        if round_index.set_used(round_index.position(topic, q_index), used):
+            self.question_used.emit(round_name, topic, q_index, used)
+
+    def is_question_used(self, round_name, topic, q_index):
+        round_index = self.index[round_name]
+        return round_index.is_used(round_index.position(topic, q_index))
+
     def clear_current_question(self):
-        self.state = {
-            "current_topic": None,
-            "current_question": None,
-            "current_answer": None,
-            "current_value": None,
-            "show_answer": False,
-            "incorrect": False,
-            "cat_in_bag": False
-        }
+        self.scheduler.cancel("reveal", "finish")
+        self.stop_countdown()
+        self.current = None
+        self.state = {"record": None, "show_answer": False, "incorrect": False}
         self.emit_state()
 
+    def restore(self, snapshot):
+        # Переводит прогресс к снимку, применяя только различия – с обычными сигналами
+        # Счёт – первым: в журнале пакет игроков открывает действие, и отметки вопросов попадают в него же
+        cells, scores = self.progress.diff(self.progress.snapshot(), snapshot)
+        self.update_players(scores)
+        for round_name, pos, used in cells:
+            record = self.index[round_name].records[pos]
+            self.set_question_used(round_name, record.topic, record.index, used)
+
+    def reset_progress(self):
+        # Новая игра на том же пакете с теми же игроками
+        self.restore(self.progress.initial())
+        self.clear_current_question()
+        if self.current_round != self.round_names[0]:
+            self.set_round(self.round_names[0])
+
     def is_round_over(self):
-        topics = self.rounds[self.current_round]
-        return all(all(q.get("used", False) for q in q_list) for q_list in topics.values())
+        return self.index[self.current_round].remaining == 0
 
     def advance_round(self):
-        if self.current_round == "Раунд 1":
-            self.current_round = "Раунд 2"
-        elif self.current_round == "Раунд 2":
-            self.current_round = "Финальный раунд"
-        self.emit_state()
+        pos = self.round_names.index(self.current_round)
+        if pos + 1 < len(self.round_names):
+            self.set_round(self.round_names[pos + 1])
 
     def previous_round(self):
-        if self.current_round == "Финальный раунд":
-            self.current_round = "Раунд 2"
-        elif self.current_round == "Раунд 2":
-            self.current_round = "Раунд 1"
+        pos = self.round_names.index(self.current_round)
+        if pos > 0:
+            self.set_round(self.round_names[pos - 1])
+
+    def set_round(self, round_name):
+        self.current_round = round_name
+        self.round_changed.emit(round_name)
         self.emit_state()
 
     def is_game_over(self):
-        return self.current_round == "Финальный раунд" and self.is_round_over()
+        return self.current_round == self.round_names[-1] and self.is_round_over()
 
     def emit_state(self):
         data = {
             "state": self.state,
-            "rounds": self.rounds,
             "current_round": self.current_round,
-            "players": self.players,
             "game_over": self.is_game_over()
         }
         self.update_player_state.emit(data)
 
 
-# Функция для рекурсивного очищения лэйаута
-def clear_layout(layout):
-    while layout.count():
-        item = layout.takeAt(0)
-        widget = item.widget()
-        if widget is not None:
-            widget.deleteLater()
-        else:
-            clear_layout(item.layout())
+# Доска с темами и вопросами. Виджеты раунда строятся один раз при первом показе,
+# дальше у ячеек, ключом которых служит (раунд, тема, индекс), только переключается доступность
+class BoardWidget(QWidget):
+    cell_clicked = pyqtSignal(str, int)  # тема и индекс выбранного вопроса
+
+    def __init__(self, controller, topic_width, topic_suffix="", centered=False):
+        super().__init__()
+        self.controller = controller
+        self.topic_width = topic_width
+        self.topic_suffix = topic_suffix
+        self.centered = centered
+        self.cells = {}        # (раунд, тема, индекс) -> кнопка
+        self.round_cells = {}  # раунд -> список ключей ячеек этого раунда
+        self.pages = {}        # раунд -> страница в self.stack
+        self.stack = QStackedWidget()
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.stack)
+        self.setLayout(layout)
+        self.sync()
+        self.controller.question_used.connect(self.mark_used)
+        self.controller.round_changed.connect(self.sync)
+
+    def build_round(self, round_name):
+        page = QWidget()
+        page_layout = QVBoxLayout()
+        if self.centered:
+            page_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        keys = []
+        for topic, questions in self.controller.rounds[round_name].items():
+            h_layout = QHBoxLayout()
+            topic_label = QLabel(f"{topic}{self.topic_suffix}")
+            topic_label.setFixedWidth(self.topic_width)
+            topic_label.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+            h_layout.addWidget(topic_label)
+            for i, q in enumerate(questions):
+                btn = QPushButton(f"{q['value']}")
+                btn.setObjectName("boardCell")  # оформление задаётся общей темой, см. theme.APP_QSS
+                btn.clicked.connect(lambda checked, t=topic, idx=i: self.cell_clicked.emit(t, idx))
+                btn.setEnabled(not self.controller.is_question_used(round_name, topic, i))
+                h_layout.addWidget(btn)
+                self.cells[(round_name, topic, i)] = btn
+                keys.append((round_name, topic, i))
+            page_layout.addLayout(h_layout)
+        page.setLayout(page_layout)
+        self.stack.addWidget(page)
+        self.pages[round_name] = page
+        self.round_cells[round_name] = keys
+
+    def sync(self):
+        # Показываем страницу текущего раунда и переключаем только изменившиеся ячейки
+        round_name = self.controller.current_round
+        if round_name not in self.pages:
+            self.build_round(round_name)
+        self.stack.setCurrentWidget(self.pages[round_name])
+        for key in self.round_cells[round_name]:
+            enabled = not self.controller.is_question_used(*key)
+            btn = self.cells[key]
+            if btn.isEnabled() != enabled:
+                btn.setEnabled(enabled)
+
+    def mark_used(self, round_name, topic, q_index, used):
+        btn = self.cells.get((round_name, topic, q_index))
+        if btn is not None:
+            btn.setEnabled(not used)
 
 
 # Окно ведущего
 class HostWindow(QMainWindow):
-    def __init__(self, controller, player_window):
+    def __init__(self, controller, player_window, journal=None, presenter=None):
         super().__init__()
         self.controller = controller
         self.player_window = player_window  # для управления слайдами в окне игроков
+        self.journal = journal              # журнал игры для отмены и повтора действий
+        self.presenter = presenter          # экраны игроков, если их может быть несколько
+        self.screen_dialog = None
         self.setWindowTitle("Окно ведущего")
         self.resize(900, 700)
         self.initUI()
@@ -219,22 +531,54 @@ class HostWindow(QMainWindow):
         self.current_question_label = QLabel("Нет выбранного вопроса")
         main_layout.addWidget(self.current_question_label)
 
+        # Поиск по тексту вопросов и ответов пакета: выбор найденного вопроса переводит фокус на его ячейку
+        self.search_index = None  # индекс пакета загружается при первом поиске
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Поиск вопроса или ответа (Ctrl+F)")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textEdited.connect(self.search_questions)
+        self.search_input.returnPressed.connect(lambda: self.jump_to_result(self.search_results.item(0)))
+        QShortcut(QKeySequence.StandardKey.Find, self, self.search_input.setFocus)
+        main_layout.addWidget(self.search_input)
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(150)
+        self.search_results.itemActivated.connect(self.jump_to_result)
+        self.search_results.hide()
+        main_layout.addWidget(self.search_results)
+
         # Доска с темами и вопросами
-        self.board_layout = QVBoxLayout()
-        main_layout.addLayout(self.board_layout)
-        self.populate_board()
+        self.board = BoardWidget(self.controller, 250)
+        self.board.cell_clicked.connect(self.select_question)
+        main_layout.addWidget(self.board)
 
         # Панель управления: выбор игрока и проверка ответа
         control_layout = QHBoxLayout()
+        # Выбор игрока из общей с окном игроков таблицы результатов: список не заполняется поштучно,
+        # а по вводу части имени подсказываются совпадения
         self.player_select = QComboBox()
+        self.player_select.setModel(self.player_window.scoreboard)
+        self.player_select.setModelColumn(NAME)
+        self.player_select.setEditable(True)
+        self.player_select.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        completer = self.player_select.completer()
+        completer.setFilterMode(Qt.MatchFlag.MatchContains)
+        completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        completer.setCompletionMode(completer.CompletionMode.PopupCompletion)
+        # Пакетная смена состава пересобирает таблицу целиком, и список перескочил бы на первого игрока
+        self.kept_player = ""
+        self.player_window.scoreboard.modelAboutToBeReset.connect(self.remember_player)
+        self.player_window.scoreboard.modelReset.connect(self.restore_player)
         control_layout.addWidget(QLabel("Выберите игрока:"))
         control_layout.addWidget(self.player_select)
         self.btn_correct = QPushButton("Правильный")
         self.btn_incorrect = QPushButton("Неправильный")
         self.btn_correct.clicked.connect(self.mark_correct)
         self.btn_incorrect.clicked.connect(self.mark_incorrect)
+        self.btn_countdown = QPushButton(f"Отсчёт {ANSWER_TIME} с")
+        self.btn_countdown.clicked.connect(lambda: self.controller.start_countdown())
         control_layout.addWidget(self.btn_correct)
         control_layout.addWidget(self.btn_incorrect)
+        control_layout.addWidget(self.btn_countdown)
         main_layout.addLayout(control_layout)
 
         # Панель для добавления и удаления игроков
@@ -248,6 +592,12 @@ class HostWindow(QMainWindow):
         player_mgmt_layout.addWidget(self.player_input)
         player_mgmt_layout.addWidget(self.btn_add_player)
         player_mgmt_layout.addWidget(self.btn_remove_player)
+        self.btn_import_players = QPushButton("Загрузить список…")
+        self.btn_import_players.clicked.connect(self.import_players)
+        self.btn_export_scores = QPushButton("Сохранить счёт…")
+        self.btn_export_scores.clicked.connect(self.export_scores)
+        player_mgmt_layout.addWidget(self.btn_import_players)
+        player_mgmt_layout.addWidget(self.btn_export_scores)
         main_layout.addLayout(player_mgmt_layout)
 
         # Панель переключения слайдов и перехода между раундами
@@ -273,59 +623,77 @@ class HostWindow(QMainWindow):
         slide_layout.addWidget(self.btn_show_credits)
         slide_layout.addWidget(self.btn_prev_round)
         slide_layout.addWidget(self.btn_next_round)
+        if self.presenter is not None:
+            self.btn_screens = QPushButton("Экраны…")
+            self.btn_screens.clicked.connect(self.show_screens)
+            slide_layout.addWidget(self.btn_screens)
         main_layout.addLayout(slide_layout)
 
+        # Отмена и повтор ошибочных нажатий – только при включённом журнале
+        if self.journal is not None:
+            undo_layout = QHBoxLayout()
+            self.btn_undo = QPushButton("Отменить")
+            self.btn_redo = QPushButton("Повторить")
+            self.btn_undo.setShortcut(QKeySequence.StandardKey.Undo)
+            self.btn_redo.setShortcut(QKeySequence.StandardKey.Redo)
+            self.btn_undo.clicked.connect(self.journal.undo)
+            self.btn_redo.clicked.connect(self.journal.redo)
+            undo_layout.addWidget(self.btn_undo)
+            undo_layout.addWidget(self.btn_redo)
+            main_layout.addLayout(undo_layout)
+
         central.setLayout(main_layout)
         self.setCentralWidget(central)
 
         self.controller.update_player_state.connect(self.update_view)
 
-    def populate_board(self):
-        clear_layout(self.board_layout)
-        topics = self.controller.rounds[self.controller.current_round]
-        for topic, questions in topics.items():
-            h_layout = QHBoxLayout()
-            topic_label = QLabel(topic)
-            topic_label.setFixedWidth(250)
-            topic_label.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-            h_layout.addWidget(topic_label)
-            for i, q in enumerate(questions):
-                btn = QPushButton(f"{q['value']}")
-                # TODO: change color
-                btn.setStyleSheet("QPushButton:disabled { border: 2px solid #b9d1f8; color: #b9d1f8; }")
-                btn.clicked.connect(lambda checked, t=topic, idx=i: self.select_question(t, idx))
-                btn.setEnabled(not q.get("used", False))
-                h_layout.addWidget(btn)
-            self.board_layout.addLayout(h_layout)
-
     def select_question(self, topic, index):
         self.controller.select_question(topic, index)
-        st = self.controller.state
-        self.current_question_label.setText(
-            f"Тема: {st['current_topic']} | Вопрос: {st['current_question']} | Ответ: {st['current_answer']}"
-        )
+        record = self.controller.state["record"]
+        if record:
+            self.current_question_label.setText(
+                f"Тема: {record.topic} | Вопрос: {record.question} | Ответ: {record.answer}"
+            )
         # Если вопрос является "Котом в мешке", показываем специальную страницу
-        if st.get("cat_in_bag", False):
+        if record and record.cat_in_bag:
             self.player_window.set_cat_page()
         else:
             self.player_window.set_question_page()
 
+    def selected_player(self):
+        # В поле можно ввести что угодно – засчитываем только существующего игрока
+        player = self.player_select.currentText().strip()
+        return player if player in self.controller.players else ""
+
+    def remember_player(self):
+        self.kept_player = self.player_select.currentText()
+
+    def restore_player(self):
+        # Выбранный игрок остаётся выбранным; если его удалили, в поле остаётся имя, а не чужой игрок
+        index = self.player_select.findText(self.kept_player)
+        self.player_select.setCurrentIndex(index)
+        if index < 0:
+            self.player_select.setEditText(self.kept_player)
+
     def mark_correct(self):
-        player = self.player_select.currentText()
+        player = self.selected_player()
         if not player:
             QMessageBox.warning(self, "Ошибка", "Выберите игрока")
             return
         self.controller.mark_answer(player, True)
         self.player_window.set_question_page()
-        QTimer.singleShot(3000, self.finish_question)
+        # Повторное нажатие не копит вызовы: задача с тем же ключом заменяет прежнюю
+        self.controller.scheduler.schedule("finish", REVEAL_DELAY, self.finish_question)
 
     def finish_question(self):
         self.controller.clear_current_question()
         self.player_window.set_board_page()
-        self.populate_board()
+        c = self.controller
+        if c.auto_advance is not None and c.is_round_over() and c.current_round != c.round_names[-1]:
+            c.scheduler.schedule("advance", c.auto_advance, self.advance_round)
 
     def mark_incorrect(self):
-        player = self.player_select.currentText()
+        player = self.selected_player()
         if not player:
             QMessageBox.warning(self, "Ошибка", "Выберите игрока")
             return
@@ -336,40 +704,106 @@ class HostWindow(QMainWindow):
         name = self.player_input.text().strip()
         if name:
             self.controller.add_player(name)
-            self.player_select.addItem(name)
             self.player_input.clear()
         else:
             QMessageBox.warning(self, "Ошибка", "Введите имя игрока")
 
     def remove_player(self):
-        player = self.player_select.currentText()
+        player = self.selected_player()
         if player:
             self.controller.remove_player(player)
-            index = self.player_select.currentIndex()
-            self.player_select.removeItem(index)
         else:
             QMessageBox.warning(self, "Ошибка", "Выберите игрока для удаления")
 
+    def import_players(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Список игроков", "", ROSTER_FILTER)
+        if not path:
+            return
+        try:
+            changes = self.controller.apply_roster(read_roster(path))
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось загрузить список: {e}")
+            return
+        self.statusBar().showMessage(f"Изменено игроков: {len(changes)}")
+
+    def export_scores(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Счёт игроков", "", ROSTER_FILTER)
+        if not path:
+            return
+        try:
+            count = write_roster(path, self.controller.players)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить счёт: {e}")
+            return
+        self.statusBar().showMessage(f"Сохранено игроков: {count}")
+
+    def on_buzzed(self, name):
+        # Игрок первым нажал кнопку на пульте – сразу выбираем его для проверки ответа
+        self.player_select.setCurrentIndex(self.player_select.findText(name))
+        self.statusBar().showMessage(f"Отвечает: {name}")
+
     def advance_round(self):
+        self.controller.scheduler.cancel("advance")
         self.controller.advance_round()
-        self.populate_board()
         self.current_question_label.setText("Нет выбранного вопроса")
         self.round_label.setText(f"{self.controller.current_round}")
         self.player_window.set_board_page()
 
     def go_previous_round(self):
+        self.controller.scheduler.cancel("advance")
         self.controller.previous_round()
-        self.populate_board()
         self.current_question_label.setText("Нет выбранного вопроса")
         self.round_label.setText(f"{self.controller.current_round}")
         self.player_window.set_board_page()
 
+    def show_screens(self):
+        if self.screen_dialog is None:
+            self.screen_dialog = ScreenDialog(self.presenter, self)
+        self.screen_dialog.show()
+        self.screen_dialog.raise_()
+
+    def search_questions(self, text):
+        if self.search_index is None:
+            self.search_index = load_index(self.controller.rounds)
+        self.search_results.clear()
+        # Сначала вопросы текущего раунда, из них – ещё не сыгранные
+        current = self.controller.current_round
+        found = sorted(
+            self.search_index.search(text),
+            key=lambda key: (key[0] != current, self.controller.is_question_used(*key)),
+        )
+        for key in found:
+            round_name, topic, index = key
+            q = self.controller.rounds[round_name][topic][index]
+            used = " (сыгран)" if self.controller.is_question_used(*key) else ""
+            item = QListWidgetItem(f"{round_name} · {topic} · {q['value']}{used}: {q['question']}")
+            item.setData(Qt.ItemDataRole.UserRole, key)
+            self.search_results.addItem(item)
+        self.search_results.setVisible(bool(text.strip()))
+        if text.strip() and not found:
+            self.search_results.addItem("Ничего не найдено")
+
+    def jump_to_result(self, item):
+        key = item.data(Qt.ItemDataRole.UserRole) if item is not None else None
+        if key is None:
+            return
+        round_name, topic, index = key
+        if round_name != self.controller.current_round:
+            self.statusBar().showMessage(f"Вопрос из раунда «{round_name}», тема «{topic}»")
+            return
+        btn = self.board.cells[key]
+        if not btn.isEnabled():
+            self.statusBar().showMessage(f"Вопрос «{topic}» за {btn.text()} уже сыгран")
+            return
+        # Ячейка получает фокус: Enter или пробел сразу выбирают вопрос
+        btn.setFocus()
+        self.search_results.hide()
+
     def update_view(self, data):
-        self.populate_board()
-        st = data["state"]
-        if st["current_question"]:
+        record = data["state"]["record"]
+        if record:
             self.current_question_label.setText(
-                f"Тема: {st['current_topic']} | Вопрос: {st['current_question']} | Ответ: {st['current_answer']}"
+                f"Тема: {record.topic} | Вопрос: {record.question} | Ответ: {record.answer}"
             )
         else:
             self.current_question_label.setText("Нет выбранного вопроса")
@@ -378,183 +812,480 @@ class HostWindow(QMainWindow):
 
 # Окно для игроков (только для отображения)
 class PlayerWindow(QMainWindow):
-    def __init__(self, controller):
+    PAGES = ["welcome", "board", "question", "results", "credits", "cat"]
+
+    def __init__(self, controller, lazy=False, board="widgets"):
         super().__init__()
         self.controller = controller
+        self.lazy = lazy
+        self.board_mode = board  # "widgets" – кнопки в раскладках, "scene" – одна QGraphicsScene
+        self.media = shared_loader(controller.rounds)
+        self.texts = shared_renderer()
+        self.text_timer = QTimer(self)
+        self.text_timer.setSingleShot(True)
+        self.text_timer.setInterval(200)
+        self.text_timer.timeout.connect(self.prefetch_text)
+        self.scoreboard = ScoreboardModel(controller)
         self.setWindowTitle("Окно игроков")
         self.resize(600, 500)
         self.initUI()
         self.controller.update_player_state.connect(self.update_view)
+        self.controller.countdown.connect(self.on_countdown)
+        self.controller.round_changed.connect(self.on_round_changed)
         self.setStyleSheet(
             "QLabel { font-size: 24px; } "
             "QPushButton { font-size: 24px; } "
             "QLineEdit { font-size: 24px; } "
-            "QComboBox { font-size: 24px; }"
+            "QComboBox { font-size: 24px; } "
+            "QTableView { font-size: 24px; }"
         )
 
+    # Страницы создаются пустыми и наполняются при первом показе (build_page). В ленивом режиме
+    # окно появляется сразу, а ещё не показанные страницы достраиваются по одной, пока цикл событий
+    # свободен; без него все страницы строятся в конструкторе
     def initUI(self):
         self.stack = QStackedWidget()
+        self.built = set()
+        for name in self.PAGES:
+            page = QWidget()
+            setattr(self, f"{name}_page", page)
+            self.stack.addWidget(page)
+        self.setCentralWidget(self.stack)
+        self.stack.setCurrentIndex(0)
+        self.warmup_timer = QTimer(self)
+        self.warmup_timer.timeout.connect(self.build_next_page)
+        if self.lazy:
+            self.build_page(0)
+        else:
+            for index in range(len(self.PAGES)):
+                self.build_page(index)
 
-        # Страница 0: Приветствие
-        self.welcome_page = QWidget()
+    def build_page(self, index):
+        if index not in self.built:
+            self.built.add(index)
+            getattr(self, f"build_{self.PAGES[index]}_page")(self.stack.widget(index))
+
+    def build_next_page(self):
+        missing = [index for index in range(len(self.PAGES)) if index not in self.built]
+        if missing:
+            self.build_page(missing[0])
+        if len(missing) <= 1:
+            self.warmup_timer.stop()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if len(self.built) < len(self.PAGES):
+            self.warmup_timer.start(0)
+
+    # Страница 0: Приветствие
+    def build_welcome_page(self, page):
         welcome_layout = QVBoxLayout()
         welcome_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.welcome_label = QLabel("Добро пожаловать на игру 'Своя игра - 8 марта'!")
         welcome_layout.addWidget(self.welcome_label)
-        self.welcome_page.setLayout(welcome_layout)
-        self.stack.addWidget(self.welcome_page)
+        page.setLayout(welcome_layout)
 
-        # Страница 1: Доска с темами и вопросами (только для чтения)
-        self.board_page = QWidget()
+    # Страница 1: Доска с темами и вопросами (только для чтения)
+    def build_board_page(self, page):
         board_layout = QVBoxLayout()
         board_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.round_label = QLabel(f"{self.controller.current_round}")
         self.round_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.round_label.setStyleSheet("margin-top: 50px;")
         board_layout.addWidget(self.round_label)
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        self.board_container = QWidget()
-        self.board_container_layout = QVBoxLayout()
-        self.board_container_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.board_container.setLayout(self.board_container_layout)
-        scroll_area.setWidget(self.board_container)
-        board_layout.addWidget(scroll_area)
-        self.board_page.setLayout(board_layout)
-        self.stack.addWidget(self.board_page)
-
-        # Страница 2: Страница вопроса с разделением на 3 зоны
-        self.question_page = QWidget()
+        if self.board_mode == "scene":
+            # Сцена сама вписывается в окно – прокрутка не нужна
+            from scene_board import SceneBoardWidget
+            self.board = SceneBoardWidget(self.controller, 300, topic_suffix=":")
+            board_layout.addWidget(self.board, 1)
+        else:
+            scroll_area = QScrollArea()
+            scroll_area.setWidgetResizable(True)
+            self.board = BoardWidget(self.controller, 300, topic_suffix=":", centered=True)
+            scroll_area.setWidget(self.board)
+            board_layout.addWidget(scroll_area)
+        page.setLayout(board_layout)
+
+    # Страница 2: Страница вопроса с разделением на 3 зоны
+    def build_question_page(self, page):
         q_layout = QVBoxLayout()
         q_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.topic_label = QLabel("")
-        self.center_question_label = QLabel("")
-        self.feedback_label = QLabel("")
-        self.topic_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.center_question_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.feedback_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        q_layout.addWidget(self.topic_label)
-        q_layout.addWidget(self.center_question_label)
-        q_layout.addWidget(self.feedback_label)
-        self.question_page.setLayout(q_layout)
-        self.stack.addWidget(self.question_page)
-
-        # Страница 3: Страница результатов
-        self.results_page = QWidget()
+        # Тексты вписываются в свои зоны крупнейшим помещающимся шрифтом; раскладки текстов
+        # вероятных следующих вопросов готовятся в фоне заранее (см. prefetch_text)
+        self.topic_label = FitTextWidget(self.texts, max_size=48, bold=True)
+        self.center_question_label = FitTextWidget(self.texts, max_size=96)
+        self.feedback_label = FitTextWidget(self.texts, max_size=64, bold=True)
+        q_layout.addWidget(self.topic_label, 1)
+        q_layout.addWidget(self.center_question_label, 3)
+        self.media_view = MediaView(self.media)
+        q_layout.addWidget(self.media_view)
+        q_layout.addWidget(self.feedback_label, 1)
+        self.countdown_label = QLabel("")
+        self.countdown_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        q_layout.addWidget(self.countdown_label)
+        page.setLayout(q_layout)
+        # Размеры зон станут известны после раскладки страницы – тогда и готовятся тексты
+        self.text_timer.start()
+
+    # Страница 3: Страница результатов – таблица рисует только видимые строки
+    # и обновляется моделью по каждому изменению счёта
+    def build_results_page(self, page):
         r_layout = QVBoxLayout()
-        r_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.results_label = QLabel("")
+        self.results_label = QLabel("Результаты:")
+        self.results_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         r_layout.addWidget(self.results_label)
-        self.results_page.setLayout(r_layout)
-        self.stack.addWidget(self.results_page)
+        self.results_view = QTableView()
+        self.results_view.setModel(self.scoreboard)
+        self.results_view.verticalHeader().hide()
+        self.results_view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.results_view.horizontalHeader().setSectionResizeMode(NAME, QHeaderView.ResizeMode.Stretch)
+        self.results_view.setSelectionMode(QTableView.SelectionMode.NoSelection)
+        self.results_view.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        r_layout.addWidget(self.results_view)
+        page.setLayout(r_layout)
 
-        # Страница 4: Страница титров
-        self.credits_page = QWidget()
+    # Страница 4: Страница титров
+    def build_credits_page(self, page):
         c_layout = QVBoxLayout()
         c_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.credits_label = QLabel("")
         c_layout.addWidget(self.credits_label)
-        self.credits_page.setLayout(c_layout)
-        self.stack.addWidget(self.credits_page)
+        page.setLayout(c_layout)
 
-        # Страница 5: Страница "Кот в мешке"
-        self.cat_page = QWidget()
+    # Страница 5: Страница "Кот в мешке"
+    def build_cat_page(self, page):
         cat_layout = QVBoxLayout()
         cat_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.cat_label = QLabel("Этот вопрос – КОТ В МЕШКЕ!")
         cat_layout.addWidget(self.cat_label)
-        self.cat_page.setLayout(cat_layout)
-        self.stack.addWidget(self.cat_page)
-
-        self.setCentralWidget(self.stack)
-        self.stack.setCurrentIndex(0)
+        page.setLayout(cat_layout)
 
     # Методы для переключения страниц
+    def show_page(self, index):
+        self.build_page(index)
+        self.stack.setCurrentIndex(index)
+
     def set_welcome_page(self):
-        self.stack.setCurrentIndex(0)
+        self.show_page(0)
 
     def set_board_page(self):
-        self.populate_board()
+        self.build_page(1)
+        self.board.sync()
+        self.prefetch_media()
+        self.prefetch_text()
+        self.round_label.setText(f"{self.controller.current_round}")
         self.stack.setCurrentIndex(1)
 
     def set_question_page(self):
+        self.build_page(2)
         self.update_question_page()
         self.stack.setCurrentIndex(2)
 
     def set_results_page(self):
-        self.update_results_page()
-        self.stack.setCurrentIndex(3)
+        self.show_page(3)
 
     def set_credits_page(self):
+        self.build_page(4)
         self.update_credits_page()
         self.stack.setCurrentIndex(4)
 
     def set_cat_page(self):
-        self.stack.setCurrentIndex(5)
-
-    def populate_board(self):
-        clear_layout(self.board_container_layout)
-        topics = self.controller.rounds[self.controller.current_round]
-        for topic, questions in topics.items():
-            h_layout = QHBoxLayout()
-            topic_label = QLabel(f"{topic}:")
-            topic_label.setFixedWidth(300)
-            topic_label.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-            h_layout.addWidget(topic_label)
-            for q in questions:
-                btn = QPushButton(f"{q['value']}")
-                # TODO: change color
-                btn.setStyleSheet("QPushButton:disabled { border: 2px solid #b9d1f8; color: #b9d1f8; }")
-                btn.setEnabled(not q.get("used", False))
-                h_layout.addWidget(btn)
-            self.board_container_layout.addLayout(h_layout)
+        self.show_page(5)
 
     def update_question_page(self):
         state = self.controller.state
-        if state["current_question"]:
-            self.topic_label.setText(f"{state['current_topic']}")
-            self.center_question_label.setText(f"{state['current_question']}")
+        record = state["record"]
+        if record:
+            self.topic_label.setText(f"{record.topic}")
+            self.center_question_label.setText(f"{record.question}")
+            self.media_view.show_media(record.media)
             if state.get("show_answer", False):
-                self.feedback_label.setText(f"{state['current_answer']}")
-            elif state.get("incorrect", False):
-                self.feedback_label.setText("Неправильный ответ!")
+                self.feedback_label.setText(f"{record.answer}")
             else:
-                self.feedback_label.setText("")
+                # Раскладка ответа готовится при выборе вопроса, чтобы показ ответа только выводил текст
+                self.feedback_label.prepare(f"{record.answer}")
+                self.feedback_label.setText("Неправильный ответ!" if state.get("incorrect", False) else "")
         else:
             self.topic_label.setText("Нет выбранной темы")
             self.center_question_label.setText("Нет выбранного вопроса")
+            self.media_view.stop()
             self.feedback_label.setText("")
 
-    def update_results_page(self):
-        scores = self.controller.players
-        results_text = "Результаты:\n" + "\n".join(f"{p}: {s}" for p, s in scores.items())
-        self.results_label.setText(results_text)
-
     def update_credits_page(self):
         credits_text = "С 8 марта!\n\nСпасибо за игру!"
         self.credits_label.setText(credits_text)
         self.credits_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
     def update_view(self, data):
-        if self.stack.currentIndex() == 1:
-            self.populate_board()
-            self.round_label.setText(f"{data['current_round']}")
-        elif self.stack.currentIndex() == 2:
+        if self.stack.currentIndex() == 2:
             self.update_question_page()
 
+    def prefetch_media(self):
+        # Медиа ещё не сыгранных вопросов текущего раунда грузятся в фоне заранее
+        round_index = self.controller.index[self.controller.current_round]
+        self.media.prefetch(
+            key for pos, record in enumerate(round_index.records)
+            if not round_index.is_used(pos) for key in record.media
+        )
+
+    def prefetch_text(self):
+        # В фоне под текущий размер зон раскладываются тексты вопросов, которые скорее всего выберут
+        # следующими, – первых несыгранных в каждой теме; остальные раскладываются при показе
+        if 2 not in self.built:
+            return
+        round_index = self.controller.index[self.controller.current_round]
+        records = {}
+        for pos, record in enumerate(round_index.records):
+            if record.topic not in records and not round_index.is_used(pos):
+                records[record.topic] = record
+        records = list(records.values())
+        self.texts.prefetch(self.topic_label.key_for(record.topic) for record in records)
+        self.texts.prefetch(self.center_question_label.key_for(record.question) for record in records)
+        self.texts.prefetch(self.feedback_label.key_for(record.answer) for record in records)
+        self.texts.request(self.feedback_label.key_for("Неправильный ответ!"))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        # Под прежний размер заготовки уже не подходят; новые готовятся, когда размер перестанет меняться
+        self.text_timer.start()
+
+    def on_countdown(self, seconds):
+        if 2 not in self.built:
+            return
+        if seconds < 0:
+            self.countdown_label.setText("")
+        else:
+            self.countdown_label.setText(f"{seconds}" if seconds else "Время вышло!")
+
+    def on_round_changed(self, round_name):
+        if 1 in self.built:
+            self.round_label.setText(round_name)
+        if 2 in self.built:
+            self.media_view.stop()
+        # Кэш медиа общий для всех игр – прошлый раунд не выгружается, а вытесняется по мере подгрузки нового
+        self.prefetch_media()
+        self.prefetch_text()
+
+
+# Одна игра в сессии: контроллер, окна и необязательные журнал и сервер пультов
+@dataclass(slots=True)
+class GameSession:
+    name: str
+    controller: GameController
+    player_window: PlayerWindow
+    host_window: HostWindow
+    journal: GameJournal = None
+    server: "BuzzerServer" = None  # импортируется, только когда сервер нужен
+    memory_kb: int = None  # прирост RSS процесса при создании игры
+    recorder: "FrameRecorder" = None
+    presenter: Presenter = None
+    actions: "ActionRecorder" = None  # запись действий ведущего для replay.py
+
+
+def current_rss_kb():
+    # Текущий (не пиковый) размер процесса; без /proc замер недоступен
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+# Несколько параллельных игр в одном процессе. Пакет, каталоги раундов и тема загружаются один раз
+# и общие для всех игр, у каждой игры свои игроки, счёт и битовые карты использованных вопросов
+class SessionManager(QObject):
+    game_added = pyqtSignal(object)  # GameSession
+
+    def __init__(self, pack, journal_dir=None, server_port=None, auto_advance=None, lazy=False,
+                 record=None, record_size=None, board="widgets", displays=1, results=None,
+                 actions=None, pack_path=None):
+        super().__init__()
+        self.pack = pack
+        self.pack_path = pack_path
+        self.results = results
+        self.actions = actions
+        self.displays = displays
+        self.lazy = lazy
+        self.board = board
+        self.record = record
+        self.record_size = record_size
+        self.auto_advance = auto_advance
+        self.catalogs = RoundCatalogs(pack)
+        self.journal_dir = journal_dir
+        self.server_port = server_port
+        self.games = []
+
+    def add_game(self, players=()):
+        number = len(self.games) + 1
+        name = f"Игра {number}"
+        before = current_rss_kb()
+        controller = GameController(self.pack, self.catalogs)
+        controller.auto_advance = self.auto_advance
+        journal = None
+        if self.journal_dir:
+            # Первая игра пишет журнал прямо в каталог, как и без сессий, остальные – в подкаталоги
+            directory = self.journal_dir if number == 1 else os.path.join(self.journal_dir, f"game-{number}")
+            # Журнал открывается до создания окон: восстановленное состояние они прочитают уже готовым
+            journal = GameJournal(controller, directory)
+            # Стартовый состав – только для новой игры: продолженная берёт игроков из журнала
+            if not journal.open():
+                journal.seed(players)
+        else:
+            controller.apply_roster(players)
+        player_window = PlayerWindow(controller, self.lazy, self.board)
+        if number > 1:
+            player_window.setWindowTitle(f"Окно игроков – {name}")
+        recorder = source = None
+        if self.record:
+            from recorder import FrameRecorder, FrameSource, game_record_path, open_sink
+            # Один источник кадров на запись и дополнительные экраны игроков
+            source = FrameSource(player_window, self.record_size)
+            recorder = FrameRecorder(source, open_sink(game_record_path(self.record, number), self.record_size),
+                                     size=self.record_size)
+        presenter = Presenter(player_window, source)
+        host_window = HostWindow(controller, player_window, journal, presenter)
+        server = None
+        if self.server_port is not None:
+            # asyncio и весь сервер пультов грузятся, только если пульты включены
+            from buzzer_server import BuzzerServer
+            server = BuzzerServer(controller, port=self.server_port + number - 1)
+            server.player_joined.connect(controller.add_player)
+            server.buzzed.connect(host_window.on_buzzed)
+            server.start()
+            host_window.statusBar().showMessage(f"Пульты игроков: http://<адрес этого компьютера>:{server.port}/")
+        actions = None
+        if self.actions:
+            from replay import ActionRecorder, game_log_path
+            actions = ActionRecorder(game_log_path(self.actions, number), controller, player_window, host_window,
+                                     journal, self.pack_path, self.board)
+        after = current_rss_kb()
+        game = GameSession(name, controller, player_window, host_window, journal, server,
+                           after - before if before is not None and after is not None else None, recorder, presenter,
+                           actions)
+        self.games.append(game)
+        self.game_added.emit(game)
+        return game
+
+    def close(self):
+        for game in self.games:
+            if self.results and game.controller.players:
+                append_results(self.results, f"{time.strftime('%Y-%m-%d %H:%M')} {game.name}", game.controller.players)
+            if game.actions is not None:
+                game.actions.close()
+            game.presenter.close()
+            if game.recorder is not None:
+                game.recorder.close()
+            game.player_window.texts.close()
+            game.player_window.media.close()
+            if game.server is not None:
+                game.server.stop()
+            if game.journal is not None:
+                game.journal.close()
+
+
+# Окно ведущего для сессии: по вкладке на игру, у каждой игры своё окно игроков
+class SessionWindow(QMainWindow):
+    def __init__(self, manager):
+        super().__init__()
+        self.manager = manager
+        self.setWindowTitle("Окно ведущего")
+        self.resize(900, 700)
+        self.tabs = QTabWidget()
+        self.tabs.setTabBarAutoHide(True)  # для одной игры вкладки не показываются
+        btn_new_game = QPushButton("Новая игра")
+        btn_new_game.clicked.connect(lambda: self.manager.add_game())
+        self.tabs.setCornerWidget(btn_new_game)
+        self.setCentralWidget(self.tabs)
+        for game in manager.games:
+            self.add_tab(game)
+        manager.game_added.connect(self.add_tab)
+
+    def add_tab(self, game):
+        game.host_window.setWindowFlags(Qt.WindowType.Widget)  # окно ведущего встраивается во вкладку
+        self.tabs.setCurrentIndex(self.tabs.addTab(game.host_window, game.name))
+        game.player_window.show()
+        # Дополнительные экраны игроков – по умолчанию на следующие мониторы, если они есть
+        screens = QGuiApplication.screens()
+        for number in range(1, self.manager.displays):
+            game.presenter.add_display(screens[number] if number < len(screens) and len(screens) > 1 else None)
+        if game.memory_kb is not None and len(self.manager.games) > 1:
+            self.statusBar().showMessage(f"Игр: {len(self.manager.games)}, {game.name} заняла {game.memory_kb} КБ")
+
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    apply_stylesheet(app, theme='my_theme.xml')
-    controller = GameController()
+    parser = argparse.ArgumentParser(description="Своя игра")
+    parser.add_argument("pack", nargs="?", help="пакет вопросов (.json, .yaml или .siq)")
+    parser.add_argument("--games", type=int, default=1, help="сколько параллельных игр (комнат) запустить")
+    parser.add_argument("--server-port", type=int,
+                        help="запустить сервер пультов для телефонов на этом порту (у следующих игр – на следующих)")
+    parser.add_argument("--journal", help="каталог журнала игры; при повторном запуске игра продолжится с места падения")
+    parser.add_argument("--auto-advance", type=float, metavar="SECONDS",
+                        help="переходить к следующему раунду через столько секунд после последнего вопроса")
+    parser.add_argument("--profile", help="каталог для замеров (timings.csv и trace.json); накладка с цифрами – F12 в окне ведущего")
+    parser.add_argument("--record", metavar="PATH",
+                        help="записывать окно игроков: в каталог PNG-кадров или, для .mp4/.mkv/.mov/.webm, через ffmpeg")
+    parser.add_argument("--record-size", default="1280x720", metavar="WxH", help="размер кадра записи")
+    parser.add_argument("--board", choices=["widgets", "scene"], default="widgets",
+                        help="доска в окне игроков: кнопки в раскладках или одна графическая сцена с анимацией")
+    parser.add_argument("--displays", type=int, default=1,
+                        help="сколько экранов игроков открыть (назначаются на мониторы кнопкой «Экраны…» у ведущего)")
+    parser.add_argument("--players", metavar="FILE",
+                        help="список игроков (.csv, .jsonl или .json: player и, необязательно, score) вместо стандартного")
+    parser.add_argument("--results", metavar="FILE",
+                        help="дописывать итоги каждой игры при выходе (.csv или .jsonl); сводка лиги – python roster.py FILE")
+    parser.add_argument("--record-actions", metavar="FILE",
+                        help="записывать действия ведущего (.jsonl) для проверки воспроизведением: python replay.py FILE")
+    parser.add_argument("--fast-start", action="store_true",
+                        help="показать окно ведущего сразу, а страницы окна игроков и остальные игры достроить потом")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="вывести в stderr время запуска по этапам")
+    args, qt_args = parser.parse_known_args()
+    startup = StartupReport(STARTED)
+    startup.mark("импорт модулей")
+    with startup.phase("QApplication"):
+        app = QApplication(sys.argv[:1] + qt_args)
+    with startup.phase("тема"):
+        apply_theme(app)
+    instrument = None
+    if args.profile:
+        from instrument import Instrumentation
+        # Замеряемые методы подменяются до создания окон, чтобы попасть и в подключённые слоты
+        instrument = Instrumentation(args.profile)
+        instrument.install({
+            GameController: ["select_question", "mark_answer", "clear_current_question", "set_round", "emit_state"],
+            BoardWidget: ["build_round", "sync", "mark_used"],
+            HostWindow: ["select_question", "mark_correct", "mark_incorrect", "finish_question", "update_view"],
+            PlayerWindow: ["set_board_page", "set_question_page", "set_results_page", "update_view",
+                           "on_round_changed"],
+        })
+        app.aboutToQuit.connect(instrument.close)
+    if args.record_actions:
+        from replay import install_recording
+        install_recording({"host": HostWindow, "players": PlayerWindow, "controller": GameController,
+                           "journal": GameJournal})
+    with startup.phase("загрузка пакета"):
+        pack = load_pack(args.pack)
+    record_size = QSize(*map(int, args.record_size.lower().split("x")))
+    manager = SessionManager(pack, args.journal, args.server_port, args.auto_advance, args.fast_start,
+                             args.record, record_size, args.board, args.displays, args.results,
+                             args.record_actions, args.pack)
+    app.aboutToQuit.connect(manager.close)
     # Предзаполнение списка игроков
     default_players = ["Вика", "Алина", "Интизар", "Олеся", "Оля", "Настя", "Арина", "Соня", "Милена", "Марина Юрьевна"]
-    for name in default_players:
-        controller.add_player(name)
-    player_window = PlayerWindow(controller)
-    host_window = HostWindow(controller, player_window)
-    for name in default_players:
-        host_window.player_select.addItem(name)
-    host_window.show()
-    player_window.show()
+    if args.players:
+        default_players = list(read_roster(args.players))
+    # При быстром запуске до показа окна создаётся только первая игра, остальные – уже в открытом окне
+    with startup.phase("создание игр"):
+        for _ in range(1 if args.fast_start else args.games):
+            manager.add_game(default_players)
+    with startup.phase("окно сессии"):
+        session_window = SessionWindow(manager)
+        if instrument is not None:
+            instrument.attach_overlay(session_window)
+        session_window.show()
+    if args.startup_report:
+        # Срабатывает, когда цикл событий разберёт уже накопленные события показа и отрисовки окон
+        QTimer.singleShot(0, lambda: (startup.mark("первый кадр"), startup.print()))
+    for _ in range(args.games - len(manager.games)):
+        QTimer.singleShot(0, lambda: manager.add_game(default_players))
     sys.exit(app.exec())
@@ -0,0 +1,286 @@
+# Автоигра без ведущего: полные игры через GameController с моделями точности игроков,
+# "Котами в мешке" и переходами между раундами. Много игр идут параллельно в пуле процессов,
+# по ним собирается статистика очков и сбалансированности стоимостей вопросов.
+# Режим --soak гоняет игры подряд в одном процессе вместе с окнами и следит за ростом памяти и виджетов.
+# Запуск: python simulate.py [пакет] --games 10000 --player "Аня=fixed:0.6" --player "Боря=value:0.9:0.3"
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+DEFAULT_PLAYERS = ["Аня=fixed:0.5", "Боря=fixed:0.3", "Вика=value:0.9:0.2", "Гоша=value:0.7:0.4"]
+HISTOGRAM_BINS = 10
+
+
+# Постоянная вероятность верного ответа
+class FixedAccuracy:
+    def __init__(self, p):
+        self.p = p
+
+    def probability(self, record, topic_size):
+        return self.p
+
+
+# Вероятность падает от easy на первом (самом дешёвом) вопросе темы до hard на последнем
+class ValueAccuracy:
+    def __init__(self, easy, hard):
+        self.easy = easy
+        self.hard = hard
+
+    def probability(self, record, topic_size):
+        share = record.index / (topic_size - 1) if topic_size > 1 else 0
+        return self.easy + (self.hard - self.easy) * share
+
+
+MODELS = {"fixed": FixedAccuracy, "value": ValueAccuracy}
+
+
+def parse_player(spec):
+    # "Имя=модель:параметр[:параметр]"
+    name, _, model = spec.partition("=")
+    kind, *params = (model or "fixed:0.5").split(":")
+    if kind not in MODELS:
+        raise argparse.ArgumentTypeError(f"Неизвестная модель точности: {kind}")
+    return name.strip(), kind, tuple(float(p) for p in params)
+
+
+# Статистика по сыгранным играм. Складывается из частей, посчитанных в разных процессах
+class SimulationStats:
+    def __init__(self):
+        self.games = 0
+        self.scores = {}    # игрок -> итоговые очки по играм
+        self.wins = {}      # игрок -> побед (при равенстве победа делится)
+        self.by_value = {}  # стоимость -> [задано, отвечено верно, попыток ответа]
+        self.by_topic = {}  # тема -> [задано, отвечено верно]
+        self.cats = [0, 0]  # "Котов в мешке": [задано, отвечено верно]
+        self.seconds = 0.0
+
+    def add_question(self, record, correct, attempts):
+        value = self.by_value.setdefault(record.value, [0, 0, 0])
+        value[0] += 1
+        value[1] += correct
+        value[2] += attempts
+        topic = self.by_topic.setdefault(record.topic, [0, 0])
+        topic[0] += 1
+        topic[1] += correct
+        if record.cat_in_bag:
+            self.cats[0] += 1
+            self.cats[1] += correct
+
+    def add_game(self, players):
+        self.games += 1
+        best = max(players.values(), default=0)
+        winners = [name for name, score in players.items() if score == best]
+        for name, score in players.items():
+            self.scores.setdefault(name, []).append(score)
+            self.wins[name] = self.wins.get(name, 0) + (1 / len(winners) if name in winners else 0)
+
+    def merge(self, other):
+        self.games += other.games
+        self.seconds += other.seconds
+        for name, scores in other.scores.items():
+            self.scores.setdefault(name, []).extend(scores)
+        for name, wins in other.wins.items():
+            self.wins[name] = self.wins.get(name, 0) + wins
+        for target, source in ((self.by_value, other.by_value), (self.by_topic, other.by_topic)):
+            for key, counts in source.items():
+                mine = target.setdefault(key, [0] * len(counts))
+                for i, n in enumerate(counts):
+                    mine[i] += n
+        self.cats = [a + b for a, b in zip(self.cats, other.cats)]
+
+    def report(self):
+        lines = [f"Сыграно игр: {self.games}"]
+        lines.append(f"\n{'игрок':16} {'среднее':>9} {'σ':>8} {'медиана':>9} {'p10':>7} {'p90':>7} {'побед':>7}")
+        for name, scores in self.scores.items():
+            ordered = sorted(scores)
+            n = len(ordered)
+            lines.append(
+                f"{name:16} {statistics.fmean(ordered):9.0f} {statistics.pstdev(ordered):8.0f} "
+                f"{statistics.median(ordered):9.0f} {ordered[n // 10]:7} {ordered[min(n - 1, n * 9 // 10)]:7} "
+                f"{self.wins.get(name, 0) / self.games:7.1%}"
+            )
+        lines.append("\nРаспределение очков (все игроки):")
+        lines.extend(histogram([s for scores in self.scores.values() for s in scores]))
+        # Сбалансированность: дорогие вопросы должны отвечаться реже, но приносить больше в среднем
+        lines.append(f"\n{'стоимость':>10} {'задано':>8} {'верно':>7} {'попыток':>8} {'ожид. очки':>11}")
+        for value in sorted(self.by_value):
+            asked, correct, attempts = self.by_value[value]
+            lines.append(
+                f"{value:10} {asked:8} {correct / asked:7.1%} {attempts / asked:8.2f} {value * correct / asked:11.1f}"
+            )
+        hard = sorted(self.by_topic.items(), key=lambda item: item[1][1] / item[1][0])[:5]
+        lines.append("\nСамые трудные темы: " + ", ".join(f"{t} ({c / a:.0%})" for t, (a, c) in hard))
+        if self.cats[0]:
+            lines.append(f"\"Кот в мешке\": задано {self.cats[0]}, отвечено верно {self.cats[1] / self.cats[0]:.1%}")
+        if self.seconds:
+            lines.append(f"\nСкорость: {self.games / self.seconds:.0f} игр/с на процесс")
+        return "\n".join(lines)
+
+
+def histogram(values, bins=HISTOGRAM_BINS, width=40):
+    low, high = min(values), max(values)
+    step = max(1, -(-(high - low + 1) // bins))
+    counts = [0] * bins
+    for v in values:
+        counts[min(bins - 1, (v - low) // step)] += 1
+    peak = max(counts)
+    return [
+        f"  {low + i * step:7}..{low + (i + 1) * step - 1:<7} {'#' * round(width * c / peak):{width}} {c}"
+        for i, c in enumerate(counts)
+    ]
+
+
+# Одна полная игра. Ведущий выбирает случайный неиспользованный вопрос, игроки отвечают
+# в случайном порядке, пока кто-то не ответит верно; "Кота в мешке" ведущий отдаёт одному игроку.
+# Если переданы окна, игра идёт через них, как при ручном ведении
+def play_game(controller, models, rng, stats, host_window=None, player_window=None):
+    names = list(models)
+    while True:
+        round_index = controller.index[controller.current_round]
+        topic_sizes = {topic: len(q) for topic, q in controller.rounds[controller.current_round].items()}
+        while not controller.is_round_over():
+            pos = rng.choice([p for p in range(len(round_index.records)) if not round_index.is_used(p)])
+            record = round_index.records[pos]
+            if host_window is not None:
+                host_window.select_question(record.topic, record.index)
+            else:
+                controller.select_question(record.topic, record.index)
+            order = [rng.choice(names)] if record.cat_in_bag else rng.sample(names, len(names))
+            correct = False
+            attempts = 0
+            for name in order:
+                attempts += 1
+                correct = rng.random() < models[name].probability(record, topic_sizes[record.topic])
+                controller.mark_answer(name, correct)
+                if correct:
+                    break
+            if not correct:
+                # Никто не ответил: ведущий показывает ответ. У "Кота в мешке" ответ открывается сам
+                # по планировщику – на виртуальных часах сразу
+                if record.cat_in_bag:
+                    controller.scheduler.run_until_idle()
+                else:
+                    controller.set_question_used(*controller.current)
+            stats.add_question(record, correct, attempts)
+            if host_window is not None:
+                host_window.finish_question()
+            else:
+                controller.clear_current_question()
+        if player_window is not None:
+            player_window.set_results_page()
+        if controller.current_round == controller.round_names[-1]:
+            break
+        controller.advance_round()
+        if player_window is not None:
+            player_window.set_board_page()
+    stats.add_game(dict(controller.players))
+
+
+def make_models(players):
+    return {name: MODELS[kind](*params) for name, kind, params in players}
+
+
+# Пачка игр в процессе пула: один контроллер, между играми прогресс сбрасывается
+def run_batch(pack_path, players, seeds):
+    from PyQt6.QtCore import QCoreApplication
+
+    from pack_loader import load_pack
+    from scheduler import GameScheduler, VirtualClock
+    from si_game import GameController
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])  # без приложения таймеры Qt не работают
+    models = make_models(players)
+    controller = GameController(load_pack(pack_path), scheduler=GameScheduler(VirtualClock()))
+    controller.apply_roster(models)
+    stats = SimulationStats()
+    start = time.perf_counter()
+    for seed in seeds:
+        controller.reset_progress()
+        play_game(controller, models, random.Random(seed), stats)
+    stats.seconds = time.perf_counter() - start
+    app.sendPostedEvents()
+    return stats
+
+
+def simulate(pack_path, players, games, workers=None, seed=0, batch_size=200):
+    seeds = list(range(seed, seed + games))
+    batches = [seeds[i:i + batch_size] for i in range(0, games, batch_size)]
+    total = SimulationStats()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part in pool.map(run_batch, [pack_path] * len(batches), [players] * len(batches), batches):
+            total.merge(part)
+    return total
+
+
+# Длительный прогон в одном процессе вместе с окнами: одна пара окон переживает все игры,
+# каждые checkpoint игр замеряются RSS, объекты Python и число виджетов. Растущий тренд – утечка
+def soak(pack_path, players, games, checkpoint=50, seed=0):
+    from PyQt6.QtWidgets import QApplication
+
+    from pack_loader import load_pack
+    from scheduler import GameScheduler, VirtualClock
+    from si_game import GameController, HostWindow, PlayerWindow, current_rss_kb
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    models = make_models(players)
+    controller = GameController(load_pack(pack_path), scheduler=GameScheduler(VirtualClock()))
+    controller.apply_roster(models)
+    player_window = PlayerWindow(controller)
+    host_window = HostWindow(controller, player_window)
+    host_window.show()
+    player_window.show()
+    stats = SimulationStats()
+    rng = random.Random(seed)
+    tracemalloc.start()
+    points = []
+    print(f"{'игр':>6} {'RSS, КБ':>9} {'Python, КБ':>11} {'объектов':>9} {'виджетов':>9}")
+    for game in range(1, games + 1):
+        controller.reset_progress()
+        player_window.set_board_page()
+        play_game(controller, models, rng, stats, host_window, player_window)
+        # Отложенные события (раскладка, deleteLater); задачи игры – на виртуальных часах планировщика
+        app.sendPostedEvents()
+        if game % checkpoint == 0 or game == games:
+            gc.collect()
+            point = (game, current_rss_kb() or 0, tracemalloc.get_traced_memory()[0] // 1024,
+                     len(gc.get_objects()), len(app.allWidgets()))
+            points.append(point)
+            print(f"{point[0]:6} {point[1]:9} {point[2]:11} {point[3]:9} {point[4]:9}")
+    tracemalloc.stop()
+    if len(points) >= 3:
+        # Первую точку пропускаем: в ней разовые построения страниц и кэшей
+        first, last = points[1], points[-1]
+        per_game = [(b - a) / (last[0] - first[0]) for a, b in zip(first[1:], last[1:])]
+        print(f"Прирост на игру после прогрева: RSS {per_game[0]:.2f} КБ, Python {per_game[1]:.2f} КБ, "
+              f"объектов {per_game[2]:.2f}, виджетов {per_game[3]:.3f}")
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Автоигра и статистика Своей игры")
+    parser.add_argument("pack", nargs="?", help="пакет вопросов (.json, .yaml или .siq)")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--player", action="append", type=parse_player,
+                        help="игрок и модель точности: Имя=fixed:p или Имя=value:p_дешёвых:p_дорогих")
+    parser.add_argument("--workers", type=int, help="процессов в пуле (по умолчанию – по числу ядер)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--soak", action="store_true", help="играть подряд в одном процессе с окнами и следить за памятью")
+    parser.add_argument("--checkpoint", type=int, default=50, help="через сколько игр замерять память в режиме --soak")
+    args = parser.parse_args()
+
+    players = args.player or [parse_player(spec) for spec in DEFAULT_PLAYERS]
+    started = time.perf_counter()
+    if args.soak:
+        result = soak(args.pack, players, args.games, args.checkpoint, args.seed)
+    else:
+        result = simulate(args.pack, players, args.games, args.workers, args.seed)
+    print(result.report())
+    print(f"Всего {time.perf_counter() - started:.1f} с")
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+
+def process_age():
+    # Сколько секунд назад запущен процесс: включает старт интерпретатора до первой строки программы.
+    # Считается по /proc, поэтому есть только в Linux
+    try:
+        with open("/proc/self/stat") as f:
+            started = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(0.0, uptime - started / os.sysconf("SC_CLK_TCK"))
+
+
+# Отчёт о запуске: время по этапам от старта процесса до первого показа окна.
+# Этапы размечаются либо блоком with phase(...), либо отметкой mark(...) – от предыдущей отметки
+class StartupReport:
+    def __init__(self, origin=None):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.last = self.origin
+        self.before = process_age()
+        if self.before is not None:
+            # Возраст процесса уже включает время от origin до этой строки
+            self.before = max(0.0, self.before - (time.perf_counter() - self.origin))
+        self.phases = []  # (этап, длительность, с)
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.last = time.perf_counter()
+            self.phases.append((name, self.last - start))
+
+    def report(self):
+        lines = []
+        total = self.last - self.origin
+        if self.before is not None:
+            lines.append(f"{'запуск интерпретатора':28} {self.before * 1000:8.1f} мс")
+            total += self.before
+        lines += [f"{name:28} {elapsed * 1000:8.1f} мс" for name, elapsed in self.phases]
+        lines.append(f"{'итого до первого кадра':28} {total * 1000:8.1f} мс")
+        return "\n".join(lines)
+
+    def print(self, file=sys.stderr):
+        print(self.report(), file=file)
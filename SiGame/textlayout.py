@@ -0,0 +1,284 @@
+import atexit
+import threading
+import weakref
+
+from PyQt6.QtCore import QObject, QPointF, QRunnable, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtGui import QFont, QFontMetricsF, QPainter, QPalette, QStaticText, QTextLayout, QTextOption, QTransform
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+from media import MediaCache
+
+RENDERERS = weakref.WeakSet()  # все рендереры процесса – их потоки дожидаются при выходе
+REFERENCE_SIZE = 100  # кегль (в пикселях), при котором один раз меряются слова текста
+MIN_SIZE = 12
+MAX_CACHE_BYTES = 4 * 1024 * 1024  # раскладки всех окон процесса
+MAX_MEASURES = 20000               # замеров слов держится не больше – потом набираются заново
+LINES_OVERHEAD = 512               # примерная память раскладки без учёта текста
+BYTES_PER_CHAR = 64                # и на символ строки: текст, глифы и позиции QStaticText
+
+
+# Стиль текста: от него зависят и замеры, и готовая картинка
+def text_font(family, bold, size):
+    font = QFont(family)
+    font.setPixelSize(max(1, int(size)))
+    font.setBold(bold)
+    return font
+
+
+# Замеры текста при опорном кегле: ширины слов, пробела и высота строки. По ним подбор кегля –
+# это арифметика (ширины масштабируются линейно), а не перекладка текста на каждом пробном размере
+class TextMeasure:
+    __slots__ = ("words", "space", "line_height")
+
+    def __init__(self, text, family, bold):
+        metrics = QFontMetricsF(text_font(family, bold, REFERENCE_SIZE))
+        self.words = [metrics.horizontalAdvance(word) for word in text.split()]
+        self.space = metrics.horizontalAdvance(" ")
+        self.line_height = metrics.lineSpacing()
+
+    def lines(self, size, width):
+        # Жадный перенос по словам, как у QTextLayout; слишком длинное слово рвётся на несколько строк
+        scale = size / REFERENCE_SIZE
+        lines, used = 1, 0.0
+        for word in self.words:
+            word *= scale
+            if used and used + self.space * scale + word <= width:
+                used += self.space * scale + word
+                continue
+            if used:
+                lines += 1
+            extra, used = divmod(word, width)
+            lines += int(extra) - (1 if extra and not used else 0)
+        return lines
+
+    def fits(self, size, width, height):
+        return self.lines(size, width) * self.line_height * size / REFERENCE_SIZE <= height
+
+    def fit(self, width, height, max_size):
+        # Наибольший кегль, при котором текст помещается, – двоичным поиском по замерам
+        low, high = MIN_SIZE, max(MIN_SIZE, int(max_size))
+        if self.fits(high, width, height):
+            return high
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.fits(middle, width, height):
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+
+def layout_text(text, font, width):
+    layout = QTextLayout(text, font)
+    option = QTextOption(Qt.AlignmentFlag.AlignHCenter)
+    option.setWrapMode(QTextOption.WrapMode.WrapAtWordBoundaryOrAnywhere)
+    layout.setTextOption(option)
+    layout.beginLayout()
+    y = 0.0
+    while True:
+        line = layout.createLine()
+        if not line.isValid():
+            break
+        line.setLineWidth(width)
+        line.setPosition(QPointF(0, y))
+        y += line.height()
+    layout.endLayout()
+    return layout, y
+
+
+# Готовая раскладка текста: кегль и строки с их положением. Это несколько строк и чисел, а не картинка
+# размером с зону, поэтому в кэш помещаются раскладки всех вопросов раунда при любом разрешении экрана.
+# Глифы выводятся QStaticText. Его раскладка глифов делается в GUI-потоке (prepare) – для готовых заранее
+# текстов, как только результат пришёл из пула, а не при первом выводе на экран
+class TextLines:
+    __slots__ = ("family", "bold", "size", "lines", "height", "static")
+
+    def __init__(self, family, bold, size, lines, height):
+        self.family = family
+        self.bold = bold
+        self.size = size
+        self.lines = lines  # (текст строки, x, y) в логических пикселях
+        self.height = height
+        self.static = None
+
+    def cost(self):
+        # Примерный объём в памяти для бюджета кэша
+        return LINES_OVERHEAD + sum(len(text) for text, _, _ in self.lines) * BYTES_PER_CHAR
+
+    def prepare(self):
+        if self.static is None:
+            font = text_font(self.family, self.bold, self.size)
+            self.static = []
+            for text, x, y in self.lines:
+                static = QStaticText(text)
+                static.setTextFormat(Qt.TextFormat.PlainText)
+                static.setPerformanceHint(QStaticText.PerformanceHint.AggressiveCaching)
+                static.prepare(QTransform(), font)
+                self.static.append((static, x, y))
+        return self
+
+    def draw(self, painter, area_height):
+        self.prepare()
+        painter.setFont(text_font(self.family, self.bold, self.size))
+        top = (area_height - self.height) / 2
+        for static, x, y in self.static:
+            painter.drawStaticText(QPointF(x, top + y), static)
+
+
+# Текст, вписанный в прямоугольник: кегль по замерам и одна настоящая раскладка, из которой берутся
+# строки. Если из-за кернинга текст всё же не влез, кегль уменьшается – обычно ни разу
+def fit_text(text, measure, width, height, family, bold, max_size):
+    size = measure.fit(width, height, max_size)
+    while True:
+        layout, text_height = layout_text(text, text_font(family, bold, size), width)
+        if text_height <= height or size <= MIN_SIZE:
+            break
+        size -= 1
+    lines = []
+    for i in range(layout.lineCount()):
+        line = layout.lineAt(i)
+        line_text = text[line.textStart():line.textStart() + line.textLength()].rstrip()
+        if line_text:
+            lines.append((line_text, line.naturalTextRect().x(), line.y()))
+    return TextLines(family, bold, size, lines, text_height)
+
+
+# Раскладка одного текста в пуле потоков. Результат приходит сигналом рендерера,
+# который живёт дольше задачи: снятая с ожидания задача может ещё дорабатывать в потоке
+class TextTask(QRunnable):
+    def __init__(self, renderer, key):
+        super().__init__()
+        self.renderer = renderer
+        self.key = key
+
+    def run(self):
+        self.renderer.done.emit(self.key, self.renderer.render(self.key))
+
+
+# Раскладки текстов вопросов, общие для всех окон и игр процесса (см. shared_renderer): ключ –
+# текст, размер зоны и стиль, так что одинаковые зоны разных окон делят одну раскладку.
+# Заранее в пуле потоков готовятся только тексты вопросов, которые вероятно выберут следующими;
+# остальные раскладываются при выборе вопроса или при показе – это доли миллисекунды, картинка не нужна
+class TextRenderer(QObject):
+    done = pyqtSignal(object, object)  # ключ, TextLines – из потока пула
+    rendered = pyqtSignal(object)      # ключ готовой раскладки
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES, threads=1):
+        super().__init__()
+        self.cache = MediaCache(max_bytes)
+        self.measures = {}  # (текст, шрифт, жирный) -> TextMeasure
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.done.connect(self.on_done)
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(threads)
+        RENDERERS.add(self)
+
+    def measure(self, text, family, bold):
+        key = (text, family, bold)
+        with self.lock:
+            measure = self.measures.get(key)
+        if measure is None:
+            measure = TextMeasure(text, family, bold)
+            with self.lock:
+                if len(self.measures) >= MAX_MEASURES:
+                    self.measures.clear()
+                self.measures[key] = measure
+        return measure
+
+    def render(self, key):
+        # key: (текст, ширина, высота, шрифт, жирный, наибольший кегль)
+        text, width, height, family, bold, max_size = key
+        return fit_text(text, self.measure(text, family, bold), width, height, family, bold, max_size)
+
+    def get(self, key):
+        lines = self.cache.get(key)
+        if lines is None:
+            # Не успели подготовить заранее (или окно изменило размер) – раскладываем сразу
+            lines = self.render(key).prepare()
+            self.cache.put(key, lines, lines.cost())
+        return lines
+
+    def request(self, key):
+        if key in self.cache or key in self.pending:
+            return
+        self.pending.add(key)
+        self.pool.start(TextTask(self, key))
+
+    def prefetch(self, keys):
+        for key in keys:
+            self.request(key)
+
+    def on_done(self, key, lines):
+        if key not in self.pending:
+            return
+        self.pending.discard(key)
+        # Сигнал из пула приходит в GUI-поток – здесь же готовятся глифы, до показа вопроса
+        self.cache.put(key, lines.prepare(), lines.cost())
+        self.rendered.emit(key)
+
+    def cancel(self):
+        # Снимает ещё не начатые задачи; результаты уже идущих будут отброшены в on_done
+        self.pool.clear()
+        self.pending.clear()
+
+    def clear(self):
+        self.cancel()
+        self.cache.clear()
+
+    def close(self):
+        self.cancel()
+        self.pool.waitForDone()
+
+
+SHARED = None
+
+
+def shared_renderer():
+    # Один рендерер с одним бюджетом памяти на все окна игроков и игры процесса
+    global SHARED
+    if SHARED is None:
+        SHARED = TextRenderer()
+    return SHARED
+
+
+# Текст, вписанный в свою область по размеру шрифта. Выводит готовую раскладку из TextRenderer
+class FitTextWidget(QWidget):
+    def __init__(self, renderer, max_size=120, bold=False):
+        super().__init__()
+        self.renderer = renderer
+        self.max_size = max_size
+        self.bold = bold
+        self.text = ""
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setMinimumHeight(MIN_SIZE * 2)
+
+    def setText(self, text):
+        if text != self.text:
+            self.text = text
+            self.update()
+
+    def prepare(self, text):
+        # Раскладка текста, который виджет покажет позже, – чтобы показ только выводил готовое
+        if text and self.width() > 0 and self.height() > 0:
+            self.renderer.get(self.key_for(text))
+
+    def key_for(self, text):
+        # Ключ раскладки для этого виджета при его текущем размере – по нему же тексты готовятся заранее.
+        # Масштаб экрана и цвет в ключ не входят: раскладка в логических пикселях, цвет задаётся при выводе
+        return (text, self.width(), self.height(), self.font().family(), self.bold, self.max_size)
+
+    def paintEvent(self, event):
+        if not self.text or self.width() <= 0 or self.height() <= 0:
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        painter.setPen(self.palette().color(QPalette.ColorRole.WindowText))
+        self.renderer.get(self.key_for(self.text)).draw(painter, self.height())
+
+
+# Задача, дорабатывающая в потоке пула во время завершения интерпретатора, роняет процесс
+@atexit.register
+def close_renderers():
+    for renderer in list(RENDERERS):
+        renderer.close()
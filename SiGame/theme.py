@@ -0,0 +1,96 @@
+import hashlib
+import importlib.util
+import json
+import os
+import platform
+import shutil
+
+from PyQt6.QtCore import QDir
+from PyQt6.QtGui import QColor, QFontDatabase, QGuiApplication, QPalette
+
+THEME_CACHE_VERSION = 2
+THEME_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".theme_cache")
+DEFAULT_THEME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "my_theme.xml")
+
+# Общие правила приложения поверх темы: ячейки доски стилизуются по objectName,
+# а не отдельной таблицей стилей на каждой кнопке
+APP_QSS = """
+QPushButton#boardCell:disabled { border: 2px solid #b9d1f8; color: #b9d1f8; }
+"""
+
+
+def qt_material_spec():
+    # Путь к пакету без его импорта: сам qt_material тянет Jinja2 и нужен только для сборки кэша
+    return importlib.util.find_spec("qt_material")
+
+
+def qt_material_dir():
+    return list(qt_material_spec().submodule_search_locations)[0]
+
+
+def theme_key(theme_path):
+    digest = hashlib.sha256()
+    with open(theme_path, "rb") as f:
+        digest.update(f.read())
+    # Вместо версии из importlib.metadata (его импорт дороже всей темы из кэша) –
+    # размер и время изменения модуля qt_material: они меняются при любой переустановке пакета
+    stat = os.stat(qt_material_spec().origin)
+    digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    digest.update(f"{THEME_CACHE_VERSION}:{platform.system()}".encode())
+    return digest.hexdigest()[:16]
+
+
+def build_theme_cache(theme_path, cache_dir):
+    from xml.dom.minidom import parse
+
+    from qt_material import build_stylesheet
+
+    tmp_dir = cache_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    # Иконки темы qt_material генерирует в каталог, переданный как parent
+    stylesheet = build_stylesheet(theme=theme_path, parent=os.path.join(tmp_dir, "icons"), export=True)
+    with open(os.path.join(tmp_dir, "style.qss"), "w", encoding="utf-8") as f:
+        f.write(stylesheet)
+    # Цвета темы тоже кладутся в кэш, чтобы не разбирать XML на каждом запуске
+    colors = {
+        node.getAttribute("name"): node.firstChild.nodeValue
+        for node in parse(theme_path).getElementsByTagName("color")
+    }
+    with open(os.path.join(tmp_dir, "colors.json"), "w", encoding="utf-8") as f:
+        json.dump(colors, f)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+    # Кэши прежних версий темы и qt_material больше не прочитаются – удаляем, чтобы не копились
+    parent = os.path.dirname(cache_dir)
+    for name in os.listdir(parent):
+        if name != os.path.basename(cache_dir):
+            shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+
+
+# Применение темы: QSS и иконки собираются из my_theme.xml один раз и дальше берутся из кэша,
+# ключом которого служит хэш темы и версия qt_material
+def apply_theme(app, theme_path=DEFAULT_THEME):
+    cache_dir = os.path.join(THEME_CACHE_DIR, theme_key(theme_path))
+    if not os.path.exists(os.path.join(cache_dir, "style.qss")):
+        build_theme_cache(theme_path, cache_dir)
+    with open(os.path.join(cache_dir, "style.qss"), encoding="utf-8") as f:
+        stylesheet = f.read()
+    with open(os.path.join(cache_dir, "colors.json"), encoding="utf-8") as f:
+        colors = json.load(f)
+
+    material_dir = qt_material_dir()
+    QDir.setSearchPaths("icon", [os.path.join(cache_dir, "icons")])
+    fonts_dir = os.path.join(material_dir, "fonts", "roboto")
+    for font in os.listdir(fonts_dir):
+        if font.endswith(".ttf"):
+            QFontDatabase.addApplicationFont(os.path.join(fonts_dir, font))
+
+    # Как и qt_material, подкрашиваем текст-подсказку основным цветом темы
+    palette = QGuiApplication.palette()
+    color = QColor(colors["primaryColor"])
+    color.setAlpha(92)
+    palette.setColor(QPalette.ColorRole.Text, color)
+    QGuiApplication.setPalette(palette)
+
+    app.setStyleSheet(stylesheet + APP_QSS)
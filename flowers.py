@@ -1,85 +1,225 @@
-import turtle
-import random
-
-screen = turtle.Screen()
-screen.bgcolor("lightblue")
-screen.title("Букет роз")
-screen.setup(width=500, height=500)
-
-t = turtle.Turtle()
-t.speed(-1)
-t.width(3)
-
-def draw_rose_bud(x, y, color, angle):
-    t.penup()
-    t.goto(x, y)
-    t.setheading(angle)
-    t.pendown()
-    t.color(color)
-    t.begin_fill()
-    t.circle(20, 180)
-    t.circle(40, 180)
-    t.end_fill()
-
-def draw_stem(x, y, length, angle):
-    t.penup()
-    t.goto(x, y)
-    t.setheading(90 + angle)
-    t.pendown()
-    t.color("green")
-    t.forward(length)
-    return t.pos()
-
-def draw_flower(x, y, bud_color, stem_length, stem_angle):
-    end_of_stem = draw_stem(x, y, stem_length, stem_angle)
-    draw_rose_bud(end_of_stem[0], end_of_stem[1], bud_color, 90 + stem_angle)
-
-def draw_bow(x, y, color):
-    t.penup()
-    t.goto(x, y)
-    t.pendown()
-    t.color(color)
-    t.begin_fill()
-    t.left(45)
-    t.forward(50)
-    t.right(90)
-    t.forward(40)
-    t.right(90)
-    t.forward(40)
-    t.right(90)
-    t.forward(40)
-    t.end_fill()
-    t.begin_fill()
-    t.right(135)
-    t.forward(40)
-    t.left(90)
-    t.forward(40)
-    t.left(90)
-    t.forward(40)
-    t.left(90)
-    t.forward(40)
-    t.end_fill()
-
-def write_text(x, y, text):
-    t.penup()
-    t.goto(x, y)
-    t.pendown()
-    t.color("black")
-    t.write(text, align="center", font=("Arial", 36, "bold"))
-
-num_flowers = 9
-base_x, base_y = 0, -100
-
-for _ in range(num_flowers):
-    bud_color = random.choice(["red", "pink", "magenta", "purple"])
-    stem_length = random.randint(150, 200)
-    stem_angle = random.randint(-20, 20)
-    draw_flower(base_x, base_y, bud_color, stem_length, stem_angle)
-
-bow_color = random.choice(["red", "blue", "yellow", "orange"])
-draw_bow( 15, base_y + 20, bow_color)
-
-write_text(base_x, base_y + 250, "С 8 марта!")
-
-t.hideturtle()
-screen.mainloop()
\ No newline at end of file
+import argparse
+import struct
+import zlib
+
+import numpy as np
+
+WIDTH, HEIGHT = 500, 500
+BACKGROUND = "lightblue"
+BUD_COLORS = ["red", "pink", "magenta", "purple"]
+BOW_COLORS = ["red", "blue", "yellow", "orange"]
+# Цвета Tk по именам – нужны для отрисовки в файл без окна
+RGB = {
+    "lightblue": (173, 216, 230), "red": (255, 0, 0), "pink": (255, 192, 203), "magenta": (255, 0, 255),
+    "purple": (160, 32, 240), "green": (0, 128, 0), "blue": (0, 0, 255), "yellow": (255, 255, 0),
+    "orange": (255, 165, 0), "black": (0, 0, 0),
+}
+ARC_STEPS = 24  # отрезков на полуокружность бутона
+
+
+# Геометрия букета. Все углы, длины стеблей и цвета разыгрываются одним пакетом,
+# а дуги бутонов и концы стеблей считаются аналитически сразу для всех цветов в массивах NumPy –
+# так же, как их нарисовала бы черепашка: circle(20, 180) и circle(40, 180) от конца стебля
+class Bouquet:
+    def __init__(self, num_flowers=9, seed=None, base_x=0, base_y=-100):
+        rng = np.random.default_rng(seed)
+        self.bud_colors = rng.integers(0, len(BUD_COLORS), num_flowers)
+        self.stem_lengths = rng.integers(150, 201, num_flowers)
+        self.stem_angles = rng.integers(-20, 21, num_flowers)
+        self.bow_color = BOW_COLORS[rng.integers(len(BOW_COLORS))]
+        self.base = np.array([base_x, base_y], dtype=float)
+
+        headings = np.radians(90 + self.stem_angles)
+        direction = np.stack([np.cos(headings), np.sin(headings)], axis=1)
+        left = np.stack([-np.sin(headings), np.cos(headings)], axis=1)  # нормаль слева от курса
+        ends = self.base + self.stem_lengths[:, None] * direction
+        self.stems = np.stack([np.broadcast_to(self.base, ends.shape), ends], axis=1)  # (n, 2, 2)
+
+        sweep = np.pi * np.arange(1, ARC_STEPS + 1) / ARC_STEPS
+        # Малая дуга: центр в 20 слева от конца стебля, начинается справа от центра
+        phi = headings[:, None] - np.pi / 2 + sweep
+        small = (ends + 20 * left)[:, None, :] + 20 * np.stack([np.cos(phi), np.sin(phi)], axis=2)
+        # Большая дуга: после разворота на 180° её центр приходится ровно на конец стебля
+        phi = headings[:, None] + np.pi / 2 + sweep
+        large = ends[:, None, :] + 40 * np.stack([np.cos(phi), np.sin(phi)], axis=2)
+        self.buds = np.concatenate([ends[:, None, :], small, large], axis=1)  # (n, 1 + 2 * ARC_STEPS, 2)
+
+        # Бант рисуется курсом последнего бутона
+        last_heading = 90 + (int(self.stem_angles[-1]) if num_flowers else 0)
+        self.bow = bow(15, base_y + 20, last_heading)
+        self.text = (np.array([[base_x, base_y + 250]], dtype=float), "С 8 марта!")
+
+    # Готовые фигуры для любого способа отрисовки: группа на цветок, затем бант и надпись
+    def groups(self):
+        for stem, bud, color in zip(self.stems, self.buds, self.bud_colors):
+            yield [("line", stem, "green"), ("polygon", bud, BUD_COLORS[color])]
+        yield [("polygon", loop, self.bow_color) for loop in self.bow]
+        yield [("text", self.text[0], "black", self.text[1])]
+
+
+# Бант: две петли-квадрата, пройденные черепашкой от (x, y) с курсом heading
+def bow(x, y, heading):
+    turns = np.array([[45, -90, -90, -90], [-135, 90, 90, 90]])
+    steps = np.array([[50, 40, 40, 40], [40, 40, 40, 40]])
+    angles = np.radians(heading + np.cumsum(turns.ravel())).reshape(turns.shape)
+    moves = steps[:, :, None] * np.stack([np.cos(angles), np.sin(angles)], axis=2)
+    start = np.array([x, y], dtype=float)
+    first = start + np.concatenate([[[0, 0]], np.cumsum(moves[0], axis=0)])
+    second = first[-1] + np.concatenate([[[0, 0]], np.cumsum(moves[1], axis=0)])
+    return [first, second]
+
+
+# Пакетная отрисовка на холсте окна черепашки: готовые многоугольники создаются
+# напрямую на Tk Canvas, экран обновляется один раз на цветок
+def draw_on_canvas(screen, groups):
+    screen.tracer(0)
+    canvas = screen.getcanvas()
+    for group in groups:
+        for kind, points, color, *rest in group:
+            coords = (points * [1, -1]).ravel().tolist()
+            if kind == "polygon":
+                canvas.create_polygon(coords, fill=color, outline=color, width=3)
+            elif kind == "line":
+                canvas.create_line(coords, fill=color, width=3)
+            else:
+                canvas.create_text(coords, text=rest[0], fill=color, font=("Arial", 36, "bold"), anchor="s")
+        screen.update()
+
+
+# Та же отрисовка черепашкой, но без трассировки: фигура идёт по готовым точкам
+def draw_with_turtle(screen, groups):
+    import turtle
+
+    screen.tracer(0)
+    t = turtle.Turtle()
+    t.hideturtle()
+    t.width(3)
+    for group in groups:
+        for kind, points, color, *rest in group:
+            points = points.tolist()
+            t.penup()
+            t.goto(points[0])
+            t.pendown()
+            t.color(color)
+            if kind == "text":
+                t.write(rest[0], align="center", font=("Arial", 36, "bold"))
+                continue
+            if kind == "polygon":
+                t.begin_fill()
+            for point in points[1:]:
+                t.goto(point)
+            if kind == "polygon":
+                t.end_fill()
+        screen.update()
+
+
+# Растр для отрисовки в файл без окна. Многоугольник заливается по правилу чёт-нечет
+# сразу для всех пикселей описанного прямоугольника
+class Raster:
+    def __init__(self, width, height, background):
+        self.width = width
+        self.height = height
+        self.pixels = np.empty((height, width, 3), dtype=np.uint8)
+        self.pixels[:] = RGB[background]
+
+    def fill_polygon(self, points, color):
+        ax = points[:, 0] + self.width / 2
+        ay = self.height / 2 - points[:, 1]
+        x0, x1 = max(0, int(ax.min())), min(self.width, int(np.ceil(ax.max())) + 1)
+        y0, y1 = max(0, int(ay.min())), min(self.height, int(np.ceil(ay.max())) + 1)
+        if x0 >= x1 or y0 >= y1:
+            return
+        bx, by = np.roll(ax, -1), np.roll(ay, -1)
+        rows = np.arange(y0, y1)[:, None] + 0.5
+        cols = np.arange(x0, x1) + 0.5
+        crosses = (ay <= rows) != (by <= rows)  # строки × рёбра
+        with np.errstate(divide="ignore", invalid="ignore"):
+            xs = ax + (rows - ay) * (bx - ax) / (by - ay)
+        hits = crosses[:, :, None] & (xs[:, :, None] < cols)
+        inside = hits.sum(axis=1) % 2 == 1
+        self.pixels[y0:y1, x0:x1][inside] = RGB[color]
+
+    def draw_lines(self, lines, color, width=3):
+        # Толстые отрезки – вытянутые четырёхугольники, посчитанные для всех линий сразу
+        start, end = lines[:, 0], lines[:, 1]
+        delta = end - start
+        length = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+        offset = np.stack([-delta[:, 1], delta[:, 0]], axis=1) / length[:, None] * width / 2
+        for quad in np.stack([start + offset, end + offset, end - offset, start - offset], axis=1):
+            self.fill_polygon(quad, color)
+
+    def save_png(self, path):
+        rows = self.pixels.reshape(self.height, self.width * 3)
+        raw = np.hstack([np.zeros((self.height, 1), dtype=np.uint8), rows]).tobytes()
+
+        def chunk(kind, data):
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n")
+            f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)))
+            f.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+            f.write(chunk(b"IEND", b""))
+
+
+def render_png(bouquet, path, width=WIDTH, height=HEIGHT):
+    # Надпись в растр не выводится: для текста без окна нужен шрифтовой движок, его даёт SVG
+    raster = Raster(width, height, BACKGROUND)
+    for i, (stem, bud) in enumerate(zip(bouquet.stems, bouquet.buds)):
+        raster.draw_lines(stem[None], "green")
+        raster.fill_polygon(bud, BUD_COLORS[bouquet.bud_colors[i]])
+    for loop in bouquet.bow:
+        raster.fill_polygon(loop, bouquet.bow_color)
+    raster.save_png(path)
+
+
+def render_svg(groups, path, width=WIDTH, height=HEIGHT):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+            f'viewBox="{-width / 2} {-height / 2} {width} {height}">\n'
+            f'<rect x="{-width / 2}" y="{-height / 2}" width="{width}" height="{height}" fill="{BACKGROUND}"/>\n'
+        )
+        for group in groups:
+            for kind, points, color, *rest in group:
+                coords = " ".join(f"{x:.1f},{-y:.1f}" for x, y in points)
+                if kind == "polygon":
+                    f.write(f'<polygon points="{coords}" fill="{color}" stroke="{color}" stroke-width="3"/>\n')
+                elif kind == "line":
+                    f.write(f'<polyline points="{coords}" fill="none" stroke="{color}" stroke-width="3"/>\n')
+                else:
+                    x, y = points[0]
+                    f.write(
+                        f'<text x="{x}" y="{-y}" fill="{color}" font-family="Arial" font-size="36" '
+                        f'font-weight="bold" text-anchor="middle">{rest[0]}</text>\n'
+                    )
+        f.write("</svg>\n")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Букет роз")
+    parser.add_argument("--flowers", type=int, default=9, help="количество цветов")
+    parser.add_argument("--seed", type=int, help="зерно случайных чисел для повторяемого букета")
+    parser.add_argument("--mode", choices=["canvas", "turtle"], default="canvas",
+                        help="canvas – многоугольники сразу на холст, turtle – черепашкой без трассировки")
+    parser.add_argument("--output", help="сохранить букет в файл .png или .svg без открытия окна")
+    args = parser.parse_args()
+
+    bouquet = Bouquet(args.flowers, args.seed)
+    if args.output:
+        if args.output.lower().endswith(".svg"):
+            render_svg(bouquet.groups(), args.output)
+        else:
+            render_png(bouquet, args.output)
+    else:
+        import turtle
+
+        screen = turtle.Screen()
+        screen.bgcolor(BACKGROUND)
+        screen.title("Букет роз")
+        screen.setup(width=WIDTH, height=HEIGHT)
+        if args.mode == "canvas":
+            draw_on_canvas(screen, bouquet.groups())
+        else:
+            draw_with_turtle(screen, bouquet.groups())
+        screen.mainloop()